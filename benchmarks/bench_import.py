@@ -0,0 +1,79 @@
+"""
+Замер времени холодного импорта модулей приложения в чистом процессе.
+
+Запуск: python benchmarks/bench_import.py [--repeats 5] [--budget-ms 1500]
+
+Каждый замер выполняется в новом интерпретаторе. Для football_analysis и
+football_cli также проверяется, что импорт не загружает интерфейс и графики
+(streamlit, plotly). Код возврата 1, если один из них превысил бюджет или
+загрузил лишние модули.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Модули, которые замеряются (ядро, пакетный режим, графики и приложение целиком)
+IMPORT_TARGETS = ["football_analysis", "football_cli", "football_charts", "football"]
+
+# Модули без интерфейса: бюджет импорта и отсутствие streamlit/plotly проверяются
+HEADLESS_TARGETS = ["football_analysis", "football_cli"]
+
+# Модули интерфейса, которые не должно загружать ядро анализа
+UI_MODULES = ["streamlit", "plotly", "matplotlib"]
+
+# Скрипт замера: время импорта (мс) и загруженные модули интерфейса
+MEASURE_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = (time.perf_counter() - start) * 1000
+loaded = sorted({{name.split(".")[0] for name in sys.modules}} & set({ui_modules!r}))
+print(json.dumps({{"ms": elapsed, "ui_modules": loaded}}))
+"""
+
+
+# Функция для замера импорта модуля в новом процессе
+def measure_import(module, repeats):
+    """
+    Возвращает минимальное время импорта (мс) и список загруженных модулей интерфейса.
+    """
+    script = MEASURE_SCRIPT.format(module=module, ui_modules=UI_MODULES)
+    best = None
+    loaded = []
+    for _ in range(repeats):
+        output = subprocess.run(
+            [sys.executable, "-c", script], cwd=REPO_DIR, check=True, capture_output=True, text=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        best = result["ms"] if best is None else min(best, result["ms"])
+        loaded = result["ui_modules"]
+    return best, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Время холодного импорта модулей приложения")
+    parser.add_argument("--repeats", type=int, default=5, help="Повторов замера (берется минимум)")
+    parser.add_argument("--budget-ms", type=float, default=1500.0,
+                        help="Допустимое время импорта модулей без интерфейса")
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'Модуль':<20}{'мс':>10}  Модули интерфейса")
+    for module in IMPORT_TARGETS:
+        elapsed, loaded = measure_import(module, args.repeats)
+        print(f"{module:<20}{elapsed:>10.1f}  {', '.join(loaded) or '-'}")
+        if module in HEADLESS_TARGETS and (loaded or elapsed > args.budget_ms):
+            failed = True
+
+    if failed:
+        print("Модуль без интерфейса превысил бюджет импорта или загрузил модули интерфейса", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
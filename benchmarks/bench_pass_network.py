@@ -0,0 +1,62 @@
+"""
+Сравнение обычной и пакетной отрисовки сети пасов.
+
+Запуск: python benchmarks/bench_pass_network.py [количество игроков]
+"""
+import os
+import sys
+import time
+from collections import defaultdict
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from football_charts import create_pass_network_chart  # noqa: E402
+
+
+# Функция для создания плотной сети пасов одной команды
+def make_team_stats(n_players, seed=0):
+    rng = np.random.default_rng(seed)
+    players = [f"Игрок {i + 1}" for i in range(n_players)]
+    pass_combinations = defaultdict(lambda: defaultdict(int))
+    for player1 in players:
+        for player2 in players:
+            if player1 != player2:
+                pass_combinations[player1][player2] = int(rng.integers(0, 25))
+    return {"Команда": {"pass_combinations": pass_combinations}}
+
+
+# Функция для замера построения и сериализации графика
+def measure(team_stats, batched, repeats=5):
+    build_times, serialize_times = [], []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fig = create_pass_network_chart(team_stats, "Команда", "#0088FE", 600, min_passes=1, batched=batched)
+        build_times.append(time.perf_counter() - start)
+        
+        start = time.perf_counter()
+        payload = fig.to_json()
+        serialize_times.append(time.perf_counter() - start)
+    return {
+        "traces": len(fig.data),
+        "payload_kb": len(payload.encode("utf-8")) / 1024,
+        "build_ms": min(build_times) * 1000,
+        "serialize_ms": min(serialize_times) * 1000,
+    }
+
+
+def main():
+    n_players = int(sys.argv[1]) if len(sys.argv) > 1 else 22
+    team_stats = make_team_stats(n_players)
+    
+    print(f"Игроков: {n_players}")
+    print(f"{'Режим':<12}{'Трассы':>8}{'JSON, КБ':>12}{'Построение, мс':>18}{'Сериализация, мс':>20}")
+    for name, batched in [("обычный", False), ("пакетный", True)]:
+        result = measure(team_stats, batched)
+        print(f"{name:<12}{result['traces']:>8}{result['payload_kb']:>12.1f}"
+              f"{result['build_ms']:>18.1f}{result['serialize_ms']:>20.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""
+Набор бенчмарков: разбор CSV, агрегация, построение каждого графика и полный
+запуск дашборда на синтетических матчах разного размера.
+
+Запуск: python benchmarks/bench_suite.py [--sizes 1000 10000 100000 1000000]
+        [--repeats 3] [--save] [--threshold 1.5]
+
+Результаты сравниваются с benchmarks/baselines.json; --save записывает текущие
+результаты как новые базовые. Код возврата 1, если какой-либо шаг медленнее
+базового более чем в threshold раз.
+"""
+import argparse
+import gc
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Импорт streamlit меняет шаблон plotly по умолчанию на тему приложения; графики
+# замеряются с ним, как в дашборде, независимо от того, запускался ли дашборд
+import streamlit  # noqa: E402,F401
+
+import football_analysis  # noqa: E402
+import football_charts  # noqa: E402
+from synthetic_match import BENCHMARK_SIZES, generate_match_csv  # noqa: E402
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+
+# Шаги короче этого порога не проверяются на регрессию (слишком велик шум)
+MIN_COMPARED_MS = 20.0
+
+
+# Функция для замера минимального времени выполнения (в миллисекундах)
+def measure(function, repeats):
+    # Первый вызов не замеряется: в нем оплачиваются ленивые импорты (plotly) и прогрев кэшей
+    result = function()
+    best = None
+    # Сборщик мусора на время замера отключается (как в timeit), иначе его паузы
+    # попадают в случайные шаги
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            result = function()
+            elapsed = (time.perf_counter() - start) * 1000
+            best = elapsed if best is None else min(best, elapsed)
+    finally:
+        gc.enable()
+    return best, result
+
+
+# Функция для построения списка графиков с аргументами
+def chart_calls(team_stats):
+    """
+    Возвращает пары (имя, функция без аргументов) для всех функций create_*.
+    Графики одной команды строятся для первой команды матча.
+    """
+    teams = list(team_stats.keys())
+    team = teams[0]
+    colors = football_charts.get_color_scheme({"color_scheme": "Стандартная"}, teams)
+    color = colors["team1"]
+    calls = [(chart.__name__, lambda chart=chart: chart(team_stats, colors, 500))
+             for chart in football_charts.REPORT_MATCH_CHARTS]
+    team_charts = football_charts.REPORT_TEAM_CHARTS + [
+        football_charts.create_foot_by_event_chart,
+        football_charts.create_save_types_chart,
+        football_charts.create_player_foot_usage_chart,
+    ]
+    calls += [(chart.__name__, lambda chart=chart: chart(team_stats, team, color, 500))
+              for chart in team_charts]
+    calls.append(("create_player_stats_chart",
+                  lambda: football_charts.create_player_stats_chart(team_stats, team, "passes", color, 500)))
+    calls.append(("create_event_types_chart",
+                  lambda: football_charts.create_event_types_chart(team_stats, team, "Pass", color, 500)))
+    return calls
+
+
+# Скрипт дашборда для AppTest: загрузчик файла подменяется файлом из окружения
+def dashboard_app():
+    import io
+    import os
+    import sys
+
+    import streamlit as st
+
+    sys.path.insert(0, os.environ["BENCH_REPO"])
+
+    class UploadedFile(io.BytesIO):
+        name = "match.csv"
+
+    with open(os.environ["BENCH_MATCH"], "rb") as match_file:
+        data = match_file.read()
+    st.file_uploader = lambda *args, **kwargs: UploadedFile(data)
+
+    import football
+    football.main()
+
+
+# Функция для замера полного запуска дашборда
+def measure_dashboard(csv_bytes):
+    """
+    Запускает main() через streamlit AppTest (без кэша матча) и возвращает время в мс.
+    """
+    from streamlit.testing.v1 import AppTest
+
+    with tempfile.NamedTemporaryFile(suffix=".csv", delete=False) as match_file:
+        match_file.write(csv_bytes)
+    os.environ["BENCH_MATCH"] = match_file.name
+    os.environ["BENCH_REPO"] = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        app = AppTest.from_function(dashboard_app, default_timeout=600)
+        start = time.perf_counter()
+        app.run()
+        elapsed = (time.perf_counter() - start) * 1000
+        if app.exception:
+            raise RuntimeError(app.exception[0].value)
+        return elapsed
+    finally:
+        os.unlink(match_file.name)
+
+
+# Функция для прогона всех шагов на одном размере
+def run_size(n_events, repeats, dashboard=True):
+    """
+    Возвращает словарь шаг -> время в мс для синтетического матча из n_events событий.
+    """
+    csv_bytes = generate_match_csv(n_events)
+    results = {}
+    results["parse"], df = measure(lambda: football_analysis.read_match_csv(io.BytesIO(csv_bytes)), repeats)
+    results["aggregate"], team_stats = measure(lambda: football_analysis.analyze_match_data(df), repeats)
+    for name, call in chart_calls(team_stats):
+        # Время графика включает сериализацию в JSON, которую выполняет st.plotly_chart
+        results[f"chart:{name}"], _ = measure(lambda: call().to_json(), repeats)
+    if dashboard:
+        results["dashboard"] = measure_dashboard(csv_bytes)
+    return results
+
+
+# Функция для сравнения результатов с базовыми
+def compare(results, baselines, threshold):
+    """
+    Печатает таблицу сравнения и возвращает список регрессий (размер, шаг, отношение).
+    """
+    regressions = []
+    print(f"{'Размер':>9}  {'Шаг':<44}{'мс':>10}{'базовое, мс':>14}{'отношение':>11}")
+    for size, steps in results.items():
+        for step, value in steps.items():
+            base = baselines.get(size, {}).get(step)
+            ratio = value / base if base else None
+            mark = ""
+            if ratio is not None and ratio > threshold and max(value, base) >= MIN_COMPARED_MS:
+                regressions.append((size, step, ratio))
+                mark = "  <- регрессия"
+            ratio_text = f"{ratio:>11.2f}" if ratio is not None else f"{'-':>11}"
+            base_text = f"{base:>14.1f}" if base else f"{'-':>14}"
+            print(f"{size:>9}  {step:<44}{value:>10.1f}{base_text}{ratio_text}{mark}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарки разбора, агрегации и графиков")
+    parser.add_argument("--sizes", type=int, nargs="+", default=BENCHMARK_SIZES, help="Количество событий")
+    parser.add_argument("--repeats", type=int, default=3, help="Повторов каждого шага (берется минимум)")
+    parser.add_argument("--no-dashboard", action="store_true", help="Не замерять полный запуск дашборда")
+    parser.add_argument("--save", action="store_true", help="Сохранить результаты как базовые")
+    parser.add_argument("--threshold", type=float, default=1.5, help="Допустимое замедление относительно базового")
+    args = parser.parse_args()
+
+    results = {}
+    for n_events in args.sizes:
+        # На самых больших размерах повторы почти не уменьшают шум, но сильно удлиняют прогон
+        repeats = 1 if n_events >= 1_000_000 else args.repeats
+        print(f"Размер {n_events}...", file=sys.stderr)
+        results[str(n_events)] = run_size(n_events, repeats, dashboard=not args.no_dashboard)
+
+    baselines = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH, encoding="utf-8") as baseline_file:
+            baselines = json.load(baseline_file).get("results", {})
+    regressions = compare(results, baselines, args.threshold)
+
+    if args.save:
+        # Новые размеры добавляются к уже сохраненным базовым результатам
+        baselines.update(results)
+        with open(BASELINE_PATH, "w", encoding="utf-8") as baseline_file:
+            json.dump({
+                "machine": {
+                    "platform": platform.platform(),
+                    "python": platform.python_version(),
+                    "cpu_count": os.cpu_count(),
+                },
+                "results": baselines,
+            }, baseline_file, ensure_ascii=False, indent=2)
+        print(f"Базовые результаты сохранены в {BASELINE_PATH}", file=sys.stderr)
+        return 0
+
+    if regressions:
+        print(f"Регрессий: {len(regressions)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
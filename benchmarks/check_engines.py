@@ -0,0 +1,114 @@
+"""
+Проверка совпадения построчного и векторного движков анализа на CSV с пустыми
+необязательными ячейками (Type, Results, Foot_Used и т.д.) и на таблице с
+вещественным столбцом Half (пустые тайма и дополнительное время 3.0/4.0).
+На второй таблице также проверяется, что ключи half_stats у analyze_match_data,
+MatchTimeIndex и метки оси half у EventCube - целые номера таймов.
+
+Запуск: python benchmarks/check_engines.py [количество событий]
+
+Код возврата 1, если team_stats движков различаются.
+"""
+import io
+import math
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from football_analysis import (  # noqa: E402
+    EventCube, MatchTimeIndex, analyze_match_data, analyze_match_data_loop, analyze_match_data_vectorized,
+    read_match_csv,
+)
+from synthetic_match import generate_match_csv, generate_match_events  # noqa: E402
+
+
+# Функция для поиска расхождений между двумя team_stats
+def find_differences(left, right, path=()):
+    """
+    Возвращает список путей к ключам, значения которых различаются.
+    Порядок ключей не учитывается, но их тип учитывается (3 и 3.0 в JSON
+    пишутся по-разному); вещественные числа сравниваются с относительной
+    точностью 1e-9.
+    """
+    if isinstance(left, dict) and isinstance(right, dict):
+        if {repr(key) for key in left} != {repr(key) for key in right}:
+            return [path]
+        differences = []
+        for key in left:
+            differences += find_differences(left[key], right[key], path + (key,))
+        return differences
+    if isinstance(left, float) or isinstance(right, float):
+        return [] if math.isclose(left, right, rel_tol=1e-9, abs_tol=1e-9) else [path]
+    return [] if left == right else [path]
+
+
+# Функция для сравнения движков на одной таблице с выводом расхождений
+def compare_engines(title, df):
+    """
+    Печатает число пустых ячеек и расхождений, возвращает число расхождений.
+    """
+    blank_cells = int(df.isna().sum().sum())
+    differences = find_differences(analyze_match_data_loop(df), analyze_match_data_vectorized(df))
+    print(f"{title}: событий {len(df)}, пустых ячеек: {blank_cells}, расхождений: {len(differences)}")
+    for path in differences[:20]:
+        print("  " + " / ".join(map(str, path)))
+    return len(differences)
+
+
+# Функция для таблицы с вещественным Half: пустые тайма и дополнительное время
+def float_half_events(n_events):
+    """
+    Таблица генератора без read_match_csv: Half вещественный (как у обычного
+    pd.read_csv при пустых ячейках), последние события в таймах 3.0 и 4.0.
+    """
+    df = generate_match_events(n_events)
+    halves = df['Half'].astype(float).to_numpy()
+    halves[int(n_events * 0.8):int(n_events * 0.9)] = 3.0
+    halves[int(n_events * 0.9):] = 4.0
+    halves[::97] = np.nan
+    df['Half'] = halves
+    return df
+
+
+# Функция для проверки типа номеров таймов в team_stats, индексе времени и кубе
+def check_half_keys(df):
+    """
+    Печатает номера таймов каждого источника, возвращает число источников,
+    где номер тайма не целое число (например, 3.0 вместо 3).
+    """
+    time_index = MatchTimeIndex.from_events(df)
+    sources = {
+        'analyze_match_data': analyze_match_data(df),
+        'MatchTimeIndex': time_index.window_stats(0, time_index.n_minutes),
+    }
+    halves = {
+        title: sorted({half for stats in team_stats.values() for half in stats['half_stats']})
+        for title, team_stats in sources.items()
+    }
+    halves['EventCube'] = sorted(half for half in EventCube.from_events(df).axes['half'] if not pd.isna(half))
+    failures = 0
+    for title, keys in halves.items():
+        typed = all(type(half) is int for half in keys)
+        failures += not typed
+        print(f"  {title}: таймы {keys}{'' if typed else ' - не целые'}")
+    return failures
+
+
+def main():
+    n_events = int(sys.argv[1]) if len(sys.argv) > 1 else 4000
+
+    # Пустые строки генератора в CSV становятся пустыми ячейками (NaN при чтении)
+    differences = compare_engines("CSV", read_match_csv(io.BytesIO(generate_match_csv(n_events))))
+    float_half = float_half_events(n_events)
+    differences += compare_engines("Вещественный Half", float_half)
+    differences += check_half_keys(float_half)
+    return 1 if differences else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
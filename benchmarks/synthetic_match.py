@@ -0,0 +1,153 @@
+"""
+Детерминированный генератор синтетических событий матчей в формате CSV приложения.
+
+Запуск: python benchmarks/synthetic_match.py количество_событий [-o файл.csv]
+        [--teams 2] [--players 14] [--seed 0]
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Частоты типов событий (в сумме 1)
+EVENT_FREQUENCIES = {
+    "Pass": 0.55,
+    "Dribble": 0.08,
+    "Tackle": 0.07,
+    "Interception": 0.06,
+    "Clearance": 0.05,
+    "Shot": 0.03,
+    "Foul": 0.04,
+    "Goalkeeper Action": 0.06,
+    "Corner": 0.015,
+    "Offside": 0.005,
+    "Throw-in": 0.04,
+}
+
+# Размеры стандартной выборки для бенчмарков
+BENCHMARK_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+
+# Длительность матча (секунды) и начало второго тайма
+MATCH_SECONDS = 95 * 60
+SECOND_HALF_START = 47 * 60
+
+
+# Вспомогательная функция: выбор значений с заданными вероятностями
+def choose(rng, values, probabilities, size):
+    return np.asarray(values, dtype=object)[rng.choice(len(values), size=size, p=probabilities)]
+
+
+# Функция для генерации таблицы событий
+def generate_match_events(n_events, n_teams=2, players_per_team=14, events_per_match=2000, seed=0):
+    """
+    Генерирует n_events событий, разбитых на матчи по events_per_match событий.
+    В каждом матче играют две команды из n_teams; владение переходит сериями
+    (длина серии - геометрическое распределение), время событий возрастает
+    внутри матча. Одинаковые параметры всегда дают одинаковую таблицу.
+    """
+    rng = np.random.default_rng(seed)
+    index = np.arange(n_events)
+    match_id = index // events_per_match
+    n_matches = int(match_id[-1]) + 1 if n_events else 0
+
+    # Пары команд по матчам и серии владения внутри матча
+    teams = np.array([f"Team {i + 1}" for i in range(n_teams)], dtype=object)
+    home = rng.integers(n_teams, size=n_matches)
+    away = (home + 1 + rng.integers(max(n_teams - 1, 1), size=n_matches)) % n_teams
+    run_lengths = rng.geometric(0.25, size=n_events + 1)
+    run_id = np.repeat(np.arange(len(run_lengths)), run_lengths)[:n_events]
+    side = (run_id + match_id) % 2
+    team_index = np.where(side == 0, home[match_id], away[match_id])
+
+    # Игроки и получатели паса (всегда партнер по команде)
+    player_index = rng.integers(players_per_team, size=n_events)
+    receiver_index = (player_index + 1 + rng.integers(players_per_team - 1, size=n_events)) % players_per_team
+    names = np.array(
+        [[f"{team} Player {i + 1}" for i in range(players_per_team)] for team in teams], dtype=object
+    )
+
+    # Время: равномерная сетка внутри матча с небольшим случайным сдвигом
+    position = index % events_per_match
+    seconds = (position + rng.random(n_events)) / events_per_match * MATCH_SECONDS
+    half = np.where(seconds < SECOND_HALF_START, 1, 2)
+
+    event = choose(rng, list(EVENT_FREQUENCIES), list(EVENT_FREQUENCIES.values()), n_events)
+    is_pass = event == "Pass"
+    is_shot = event == "Shot"
+    is_tackle = event == "Tackle"
+    is_goalkeeper = event == "Goalkeeper Action"
+
+    # Координаты: удары ближе к воротам соперника, пасы направлены вперед
+    x1 = rng.uniform(0, 100, n_events)
+    y1 = rng.uniform(0, 100, n_events)
+    x1[is_shot] = rng.uniform(70, 99, is_shot.sum())
+    y1[is_shot] = np.clip(rng.normal(50, 12, is_shot.sum()), 0, 100)
+    x2 = np.clip(x1 + rng.normal(8, 15, n_events), 0, 100)
+    y2 = np.clip(y1 + rng.normal(0, 15, n_events), 0, 100)
+
+    empty = np.full(n_events, "", dtype=object)
+    pass_type = choose(rng, ["Short", "Long", "Cross", "Through Ball"], [0.6, 0.2, 0.12, 0.08], n_events)
+    shot_type = choose(rng, ["Normal", "Header", "Volley"], [0.7, 0.2, 0.1], n_events)
+    shot_result = choose(rng, ["Goal", "On Target", "Off Target", "Blocked"], [0.1, 0.25, 0.4, 0.25], n_events)
+    tackle_result = choose(rng, ["Successful", "Failed"], [0.6, 0.4], n_events)
+    pass_outcome = choose(rng, ["Successful", "Unsuccessful"], [0.8, 0.2], n_events)
+    pressure = choose(rng, ["Yes", "No"], [0.3, 0.7], n_events)
+    foot = choose(rng, ["Right", "Left", "Head"], [0.6, 0.3, 0.1], n_events)
+    gk_action = choose(rng, ["Save", "Catch", "Punch", "Long Pass"], [0.4, 0.3, 0.1, 0.2], n_events)
+    save_type = choose(rng, ["Dive", "Block", "Parry"], [0.5, 0.3, 0.2], n_events)
+    in_box = (x1 > 83) & (y1 > 21) & (y1 < 79)
+
+    minutes, rest = np.divmod(seconds.astype(int), 60)
+    return pd.DataFrame({
+        "Time": [f"{m:02d}:{s:02d}" for m, s in zip(minutes, rest)],
+        "Match Time": np.round(seconds, 1),
+        "Half": half,
+        "Team_1": teams[team_index],
+        "Player_Name_1": names[team_index, player_index],
+        "X1": np.round(x1, 1),
+        "Y1": np.round(y1, 1),
+        "X2": np.where(is_pass, np.round(x2, 1), np.nan),
+        "Y2": np.where(is_pass, np.round(y2, 1), np.nan),
+        "Event_Catalog": event,
+        "Type": np.where(is_pass, pass_type, empty),
+        "Type_Shots": np.where(is_shot, shot_type, empty),
+        "Shot_Location": np.where(is_shot, np.where(in_box, "Inside Box", "Outside Box"), empty),
+        "Results": np.where(is_shot, shot_result, np.where(is_tackle, tackle_result, empty)),
+        "Pass_Outcome": np.where(is_pass, pass_outcome, empty),
+        "Pressure": np.where(is_pass | is_shot, pressure, empty),
+        "Foot_Used": np.where(is_pass | is_shot, foot, empty),
+        "GK_Action": np.where(is_goalkeeper, gk_action, empty),
+        "Save_Type": np.where(is_goalkeeper & (gk_action == "Save"), save_type, empty),
+        "Player_Name_2": np.where(is_pass, names[team_index, receiver_index], empty),
+    })
+
+
+# Функция для генерации CSV в памяти
+def generate_match_csv(n_events, **kwargs):
+    """
+    Возвращает содержимое CSV (bytes) с n_events синтетическими событиями.
+    """
+    return generate_match_events(n_events, **kwargs).to_csv(index=False).encode("utf-8")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Генерация синтетического CSV с событиями матчей")
+    parser.add_argument("events", type=int, help="Количество событий")
+    parser.add_argument("--output", "-o", help="Файл для записи (по умолчанию - стандартный вывод)")
+    parser.add_argument("--teams", type=int, default=2, help="Количество команд")
+    parser.add_argument("--players", type=int, default=14, help="Игроков в команде")
+    parser.add_argument("--seed", type=int, default=0, help="Зерно генератора")
+    args = parser.parse_args()
+
+    df = generate_match_events(args.events, n_teams=args.teams, players_per_team=args.players, seed=args.seed)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        df.to_csv(args.output, index=False)
+    else:
+        df.to_csv(sys.stdout, index=False)
+
+
+if __name__ == "__main__":
+    main()
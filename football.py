@@ -1,15 +1,39 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-import numpy as np
-from collections import defaultdict
 import io
-import re
-import math  # Для расчетов в сетевой диаграмме
+import os
+import sys
+import json
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from concurrent.futures import ProcessPoolExecutor
 
-# Настройка страницы
-st.set_page_config(layout="wide", page_title="Футбольная аналитика")
+# Агрегация и аналитика без интерфейса (импортируется только с pandas/NumPy)
+from football_analysis import (
+    BINARY_TABLE_EXTENSIONS, REQUIRED_COLUMNS, LRUCache, estimate_size,
+    compute_content_hash, read_match_csv, read_match_table, save_match_table,
+    load_match_table, analyze_match_file, analyze_match_data,
+    analyze_match_csv_streaming, MatchStats, EventCube, PITCH_LAYOUTS,
+    PASS_HEATMAP_RESOLUTIONS, MatchTimeIndex, EVENT_INDEX_COLUMNS, EventIndex,
+    PassNetwork, generate_match_insights, EventStore, LiveMatchTail,
+)
+
+# Графики plotly (без streamlit, общие с пакетными отчетами)
+from football_charts import (
+    get_color_scheme, create_team_stats_chart, create_pass_stats_chart,
+    create_pass_heatmap, create_pass_zones_chart, create_shot_types_chart,
+    create_shot_outcomes_chart, create_player_stats_chart, create_half_comparison_chart,
+    create_possession_chains_chart, create_events_category_chart, create_event_types_chart,
+    create_foot_usage_chart, create_foot_by_event_chart, create_goalkeeper_actions_chart,
+    create_save_types_chart, create_pressure_results_chart, create_pass_network_chart,
+    PASS_NETWORK_COLUMN_NAMES, create_player_foot_usage_chart, create_shot_heatmap,
+    create_filtered_events_chart, create_event_breakdown_chart,
+)
+
+# Пакетный режим (отчеты и загрузка в базу) без интерфейса
+from football_cli import run_cli, CLI_COMMANDS
 
 # Получаем настройки из боковой панели
 def add_settings_sidebar():
@@ -30,6 +54,23 @@ def add_settings_sidebar():
     
     chart_height = st.sidebar.slider("Высота графиков", 300, 800, 400, 50)
     
+    heatmap_resolution = st.sidebar.selectbox(
+        "Разрешение тепловой карты пасов",
+        PASS_HEATMAP_RESOLUTIONS,
+        index=PASS_HEATMAP_RESOLUTIONS.index((12, 8)),
+        format_func=lambda resolution: f"{resolution[0]}×{resolution[1]}"
+    )
+    heatmap_smoothing = st.sidebar.slider("Сглаживание тепловой карты", 0.0, 2.0, 0.0, 0.5)
+    
+    zone_layout = st.sidebar.selectbox(
+        "Схема зон поля",
+        list(PITCH_LAYOUTS),
+        format_func=lambda layout: PITCH_LAYOUTS[layout]['name']
+    )
+    
+    # Графики строятся только для раскрытых разделов и выбранной команды
+    lazy_rendering = st.sidebar.checkbox("Ленивая отрисовка разделов", value=True)
+    
     # Настройки анализа
     st.sidebar.header("Анализ")
     
@@ -39,6 +80,22 @@ def add_settings_sidebar():
         value="Средняя"
     )
     
+    # Сезонный режим: несколько файлов матчей анализируются параллельно и объединяются
+    season_mode = st.sidebar.checkbox("Сезонный режим (несколько матчей)", value=False)
+    
+    # Большие файлы читаются частями без загрузки всей таблицы в память
+    streaming_ingestion = st.sidebar.checkbox("Потоковая обработка больших файлов", value=False)
+    
+    # Живой режим: локальный CSV дописывается во время матча, дашборд обновляется по таймеру
+    live_mode = st.sidebar.checkbox("Живой режим (файл дописывается во время матча)", value=False)
+    live_interval = st.sidebar.slider("Интервал обновления (секунды)", 1, 30, 2) if live_mode else 2
+    
+    # Матчи сохраняются в локальную базу SQLite и открываются из нее без повторной загрузки
+    event_store = st.sidebar.checkbox("Хранить матчи в базе SQLite", value=False)
+    
+    # Замер времени и памяти этапов (tracemalloc заметно замедляет работу, поэтому по умолчанию выключен)
+    profiling = st.sidebar.checkbox("Профилирование этапов", value=False)
+    
     # Добавляем новые настройки для расширенного анализа
     st.sidebar.header("Расширенный анализ")
     
@@ -53,7 +110,17 @@ def add_settings_sidebar():
         "show_help": show_help,
         "color_scheme": color_scheme,
         "chart_height": chart_height,
+        "heatmap_resolution": heatmap_resolution,
+        "heatmap_smoothing": heatmap_smoothing,
+        "zone_layout": zone_layout,
+        "lazy_rendering": lazy_rendering,
         "analysis_detail": analysis_detail,
+        "season_mode": season_mode,
+        "streaming_ingestion": streaming_ingestion,
+        "live_mode": live_mode,
+        "live_interval": live_interval,
+        "event_store": event_store,
+        "profiling": profiling,
         "show_event_categories": show_event_categories,
         "show_pressure_analysis": show_pressure_analysis,
         "show_foot_analysis": show_foot_analysis,
@@ -61,1515 +128,395 @@ def add_settings_sidebar():
         "show_goalkeeper_analysis": show_goalkeeper_analysis
     }
 
-# Получаем цветовую схему на основе настроек
-def get_color_scheme(settings, teams=None):
-    if settings["color_scheme"] == "Командные цвета" and teams and len(teams) >= 2:
-        # Можно настроить цвета команд (пример с Шахтером - оранжево-черный)
-        team_colors = {
-            "Shakhtar": "#ff6600",  # Оранжевый для Шахтера
-            "Kozak": "#1e88e5"  # Синий для Козака (предположим)
-        }
-        
-        return {
-            "team1": team_colors.get(teams[0], "#ff6600"),
-            "team2": team_colors.get(teams[1], "#1e88e5")
-        }
-    elif settings["color_scheme"] == "Зеленый-Оранжевый":
-        return {"team1": "#15803d", "team2": "#c2410c"}
-    elif settings["color_scheme"] == "Пастельная":
-        return {"team1": "#0ea5e9", "team2": "#f472b6"}
-    else:  # Стандартная
-        return {"team1": "#0088FE", "team2": "#FF8042"}
+# Максимальный суммарный размер кэша разобранных матчей (в байтах)
+MATCH_CACHE_MAX_BYTES = 512 * 1024 * 1024
 
-# Функция для анализа данных футбольного матча
-def analyze_match_data(df):
-    """
-    Анализирует данные футбольного матча из CSV и возвращает статистику для обеих команд.
-    """
-    # Определяем команды
-    teams = list(df['Team_1'].unique())
-    
-    # Инициализируем словарь для статистики
-    team_stats = {team: {} for team in teams}
-    
-    # Основные счетчики для общей статистики
-    for team in teams:
-        team_stats[team]['shots'] = 0
-        team_stats[team]['shots_on_target'] = 0
-        team_stats[team]['shots_off_target'] = 0
-        team_stats[team]['blocked_shots'] = 0
-        team_stats[team]['goals'] = 0
-        team_stats[team]['passes'] = 0
-        team_stats[team]['successful_passes'] = 0
-        team_stats[team]['crosses'] = 0
-        team_stats[team]['successful_crosses'] = 0
-        team_stats[team]['tackles'] = 0
-        team_stats[team]['successful_tackles'] = 0
-        team_stats[team]['interceptions'] = 0
-        team_stats[team]['fouls'] = 0
-        team_stats[team]['corners'] = 0
-        team_stats[team]['offsides'] = 0
-        team_stats[team]['possession_time'] = 0
-        team_stats[team]['player_stats'] = {}
-        team_stats[team]['pass_zones'] = defaultdict(int)
-        team_stats[team]['shot_locations'] = defaultdict(int)
-        team_stats[team]['shot_types'] = defaultdict(int)
-        team_stats[team]['pressure_stats'] = {'under_pressure': 0, 'no_pressure': 0}
-        team_stats[team]['half_stats'] = {1: {}, 2: {}}
-        
-        # Добавляем новые счетчики для расширенного анализа
-        team_stats[team]['event_categories'] = defaultdict(int)
-        team_stats[team]['event_types'] = defaultdict(lambda: defaultdict(int))
-        team_stats[team]['foot_used'] = defaultdict(int)
-        team_stats[team]['foot_by_event'] = defaultdict(lambda: defaultdict(int))
-        team_stats[team]['player_foot_usage'] = defaultdict(lambda: defaultdict(int))
-        team_stats[team]['gk_actions'] = defaultdict(int)
-        team_stats[team]['save_types'] = defaultdict(int)
-        team_stats[team]['pass_combinations'] = defaultdict(lambda: defaultdict(int))
-        team_stats[team]['pressure_results'] = defaultdict(lambda: defaultdict(int))
-        
-        # Инициализируем статистику по таймам
-        for half in [1, 2]:
-            team_stats[team]['half_stats'][half] = {
-                'shots': 0,
-                'goals': 0,
-                'passes': 0,
-                'successful_passes': 0,
-                'possession_time': 0
-            }
-    
-    # Анализируем каждое событие
-    for _, row in df.iterrows():
-        team = row['Team_1']
-        event = row['Event_Catalog']
-        event_type = row.get('Type', '')
-        match_half = row.get('Half', 1)  # По умолчанию первый тайм, если нет данных
-        
-        # Обновляем счетчик категорий событий
-        team_stats[team]['event_categories'][event] += 1
-        if event_type:
-            team_stats[team]['event_types'][event][event_type] += 1
-        
-        # Обновляем статистику по игрокам
-        player_name = row['Player_Name_1']
-        if player_name not in team_stats[team]['player_stats']:
-            team_stats[team]['player_stats'][player_name] = {
-                'shots': 0,
-                'goals': 0,
-                'passes': 0,
-                'successful_passes': 0,
-                'tackles': 0,
-                'interceptions': 0
-            }
-        
-        # Анализ использования ноги
-        foot_used = row.get('Foot_Used', '')
-        if foot_used:
-            team_stats[team]['foot_used'][foot_used] += 1
-            team_stats[team]['foot_by_event'][event][foot_used] += 1
-            team_stats[team]['player_foot_usage'][player_name][foot_used] += 1
-        
-        # Анализ событий
-        if event == 'Shot':
-            team_stats[team]['shots'] += 1
-            team_stats[team]['half_stats'][match_half]['shots'] += 1
-            team_stats[team]['player_stats'][player_name]['shots'] += 1
-            
-            # Типы ударов
-            shot_type = row.get('Type_Shots', 'Unknown')
-            if shot_type:
-                team_stats[team]['shot_types'][shot_type] += 1
-            
-            # Местоположение удара
-            shot_location = row.get('Shot_Location', 'Unknown')
-            if shot_location:
-                team_stats[team]['shot_locations'][shot_location] += 1
-            
-            # Результат удара
-            result = row.get('Results', '')
-            if result == 'Goal':
-                team_stats[team]['goals'] += 1
-                team_stats[team]['half_stats'][match_half]['goals'] += 1
-                team_stats[team]['player_stats'][player_name]['goals'] += 1
-                team_stats[team]['shots_on_target'] += 1
-            elif result == 'On Target':
-                team_stats[team]['shots_on_target'] += 1
-            elif result == 'Off Target':
-                team_stats[team]['shots_off_target'] += 1
-            elif result == 'Blocked':
-                team_stats[team]['blocked_shots'] += 1
-            
-            # Анализ под давлением для ударов
-            pressure = row.get('Pressure', '')
-            if pressure:
-                team_stats[team]['pressure_results'][pressure][result] += 1
-        
-        elif event == 'Pass':
-            team_stats[team]['passes'] += 1
-            team_stats[team]['half_stats'][match_half]['passes'] += 1
-            team_stats[team]['player_stats'][player_name]['passes'] += 1
-            
-            # Зона паса (используем координаты X2, Y2)
-            x2, y2 = row.get('X2', 0), row.get('Y2', 0)
-            zone = get_field_zone(x2, y2)
-            team_stats[team]['pass_zones'][zone] += 1
-            
-            # Тип паса
-            pass_type = row.get('Type', 'Normal')
-            
-            # Успешные пасы
-            pass_outcome = row.get('Pass_Outcome', '')
-            if pass_outcome == 'Successful':
-                team_stats[team]['successful_passes'] += 1
-                team_stats[team]['half_stats'][match_half]['successful_passes'] += 1
-                team_stats[team]['player_stats'][player_name]['successful_passes'] += 1
-                
-                # Учитываем комбинации пасов между игроками
-                if 'Player_Name_2' in row and pd.notna(row['Player_Name_2']):
-                    receiving_player = row['Player_Name_2']
-                    team_stats[team]['pass_combinations'][player_name][receiving_player] += 1
-            
-            # Кросс
-            if pass_type == 'Cross':
-                team_stats[team]['crosses'] += 1
-                if pass_outcome == 'Successful':
-                    team_stats[team]['successful_crosses'] += 1
-            
-            # Статистика под давлением
-            pressure = row.get('Pressure', '')
-            if pressure == 'Yes':
-                team_stats[team]['pressure_stats']['under_pressure'] += 1
-                # Анализируем результаты пасов под давлением
-                team_stats[team]['pressure_results']['Yes'][pass_outcome] += 1
-            elif pressure == 'No':
-                team_stats[team]['pressure_stats']['no_pressure'] += 1
-                team_stats[team]['pressure_results']['No'][pass_outcome] += 1
-        
-        elif event == 'Tackle':
-            team_stats[team]['tackles'] += 1
-            team_stats[team]['player_stats'][player_name]['tackles'] += 1
-            
-            # Успешные отборы
-            result = row.get('Results', '')
-            if result == 'Successful':
-                team_stats[team]['successful_tackles'] += 1
-        
-        elif event == 'Interception':
-            team_stats[team]['interceptions'] += 1
-            team_stats[team]['player_stats'][player_name]['interceptions'] += 1
-        
-        elif event == 'Foul':
-            team_stats[team]['fouls'] += 1
-        
-        elif event == 'Corner':
-            team_stats[team]['corners'] += 1
-        
-        elif event == 'Offside':
-            team_stats[team]['offsides'] += 1
-            
-        elif event == 'Goalkeeper Action':
-            # Анализ действий вратаря
-            gk_action = row.get('GK_Action', '')
-            if gk_action:
-                team_stats[team]['gk_actions'][gk_action] += 1
-            
-            # Тип сейва
-            save_type = row.get('Save_Type', '')
-            if save_type:
-                team_stats[team]['save_types'][save_type] += 1
-    
-    # Расчет процентов и соотношений
-    for team in teams:
-        # Точность ударов
-        if team_stats[team]['shots'] > 0:
-            team_stats[team]['shot_accuracy'] = round(
-                team_stats[team]['shots_on_target'] / team_stats[team]['shots'] * 100, 1
-            )
-        else:
-            team_stats[team]['shot_accuracy'] = 0
-        
-        # Точность пасов
-        if team_stats[team]['passes'] > 0:
-            team_stats[team]['pass_accuracy'] = round(
-                team_stats[team]['successful_passes'] / team_stats[team]['passes'] * 100, 1
-            )
-        else:
-            team_stats[team]['pass_accuracy'] = 0
-        
-        # Точность кроссов
-        if team_stats[team]['crosses'] > 0:
-            team_stats[team]['cross_accuracy'] = round(
-                team_stats[team]['successful_crosses'] / team_stats[team]['crosses'] * 100, 1
-            )
-        else:
-            team_stats[team]['cross_accuracy'] = 0
-        
-        # Точность отборов
-        if team_stats[team]['tackles'] > 0:
-            team_stats[team]['tackle_success'] = round(
-                team_stats[team]['successful_tackles'] / team_stats[team]['tackles'] * 100, 1
-            )
-        else:
-            team_stats[team]['tackle_success'] = 0
-        
-        # Статистика под давлением
-        total_pressure_events = (team_stats[team]['pressure_stats']['under_pressure'] + 
-                               team_stats[team]['pressure_stats']['no_pressure'])
-        if total_pressure_events > 0:
-            team_stats[team]['pressure_percentage'] = round(
-                team_stats[team]['pressure_stats']['under_pressure'] / total_pressure_events * 100, 1
-            )
-        else:
-            team_stats[team]['pressure_percentage'] = 0
-            
-        # Расчет статистики для игроков
-        for player in team_stats[team]['player_stats']:
-            player_stats = team_stats[team]['player_stats'][player]
-            
-            # Точность пасов игроков
-            if player_stats['passes'] > 0:
-                player_stats['pass_accuracy'] = round(
-                    player_stats['successful_passes'] / player_stats['passes'] * 100, 1
-                )
-            else:
-                player_stats['pass_accuracy'] = 0
-                
-            # Эффективность ударов игроков
-            if player_stats['shots'] > 0:
-                player_stats['goal_conversion'] = round(
-                    player_stats['goals'] / player_stats['shots'] * 100, 1
-                )
-            else:
-                player_stats['goal_conversion'] = 0
-    
-    return team_stats
+# Максимальное количество построенных графиков в кэше
+FIGURE_CACHE_MAX_ENTRIES = 256
+
+# Общий для всех сессий кэш матчей (переживает перезапуски скрипта Streamlit)
+@st.cache_resource
+def get_match_cache():
+    return LRUCache(MATCH_CACHE_MAX_BYTES)
 
-# Функция для определения зоны поля на основе координат
-def get_field_zone(x, y):
+# Функция для загрузки матча с кэшированием по хэшу содержимого
+def load_match_csv(file_bytes, match_key, file_name="match.csv"):
     """
-    Определяет зону поля на основе координат.
-    Предполагаем, что координаты нормализованы от 0 до 100.
+    Загружает таблицу событий матча. Порядок поиска: кэш в памяти, бинарная копия
+    на диске (Feather), разбор исходного файла. Разобранный CSV сохраняется
+    в бинарный кэш, поэтому повторное открытие того же матча не требует разбора.
     """
-    # Упрощенная модель с 9 зонами (3x3)
-    if x < 33:
-        if y < 33:
-            return "Defensive Left"
-        elif y < 66:
-            return "Defensive Center"
+    cache = get_match_cache()
+    df = cache.get((match_key, 'df'))
+    if df is not None:
+        return df
+    
+    df = load_match_table(match_key)
+    if df is None:
+        if file_name.lower().endswith(BINARY_TABLE_EXTENSIONS):
+            df = read_match_table(io.BytesIO(file_bytes), file_name)
         else:
-            return "Defensive Right"
-    elif x < 66:
-        if y < 33:
-            return "Middle Left"
-        elif y < 66:
-            return "Middle Center"
-        else:
-            return "Middle Right"
-    else:
-        if y < 33:
-            return "Attacking Left"
-        elif y < 66:
-            return "Attacking Center"
-        else:
-            return "Attacking Right"
+            df = read_match_csv(io.BytesIO(file_bytes))
+            try:
+                save_match_table(df, match_key)
+            except OSError as e:
+                # Кэш на диске не обязателен для работы приложения
+                print(f"Не удалось сохранить бинарную копию матча: {e}", file=sys.stderr)
+    
+    cache.put((match_key, 'df'), df, estimate_size(df))
+    return df
 
-# Функция для создания графика статистики команд
-def create_team_stats_chart(team_stats, colors, height=400):
-    """
-    Создает график сравнения основной статистики команд.
-    """
-    teams = list(team_stats.keys())
-    
-    # Создаем данные для графика
-    data = []
-    for team in teams:
-        data.append({
-            'Команда': team,
-            'Показатель': 'Удары',
-            'Значение': team_stats[team].get('shots', 0)
-        })
-        data.append({
-            'Команда': team,
-            'Показатель': 'Удары в створ',
-            'Значение': team_stats[team].get('shots_on_target', 0)
-        })
-        data.append({
-            'Команда': team,
-            'Показатель': 'Голы',
-            'Значение': team_stats[team].get('goals', 0)
-        })
-        data.append({
-            'Команда': team,
-            'Показатель': 'Угловые',
-            'Значение': team_stats[team].get('corners', 0)
-        })
-        data.append({
-            'Команда': team,
-            'Показатель': 'Офсайды',
-            'Значение': team_stats[team].get('offsides', 0)
-        })
-        data.append({
-            'Команда': team,
-            'Показатель': 'Фолы',
-            'Значение': team_stats[team].get('fouls', 0)
-        })
-    
-    df = pd.DataFrame(data)
-    
-    # Создаем график
-    fig = px.bar(
-        df, 
-        x='Показатель', 
-        y='Значение', 
-        color='Команда',
-        barmode='group',
-        color_discrete_map={teams[0]: colors['team1'], teams[1]: colors['team2']} if len(teams) > 1 else None,
-        height=height
-    )
-    
-    fig.update_layout(
-        title='Основная статистика команд',
-        xaxis_title=None,
-        yaxis_title='Количество',
-        legend_title='Команда'
-    )
-    
-    return fig
+# Общий для всех сессий наблюдатель за дописываемым файлом матча (по пути к файлу)
+@st.cache_resource
+def get_live_match(path):
+    return LiveMatchTail(path)
 
-# Функция для создания графика пасов
-def create_pass_stats_chart(team_stats, colors, height=400):
-    """
-    Создает график статистики пасов команд.
-    """
-    teams = list(team_stats.keys())
-    
-    # Создаем данные для графика
-    data = []
-    for team in teams:
-        data.append({
-            'Команда': team,
-            'Показатель': 'Всего пасов',
-            'Значение': team_stats[team].get('passes', 0)
-        })
-        data.append({
-            'Команда': team,
-            'Показатель': 'Точность пасов (%)',
-            'Значение': team_stats[team].get('pass_accuracy', 0)
-        })
-        data.append({
-            'Команда': team,
-            'Показатель': 'Кроссы',
-            'Значение': team_stats[team].get('crosses', 0)
-        })
-        data.append({
-            'Команда': team,
-            'Показатель': 'Точность кроссов (%)',
-            'Значение': team_stats[team].get('cross_accuracy', 0)
-        })
-        data.append({
-            'Команда': team,
-            'Показатель': 'Пасы под давлением (%)',
-            'Значение': team_stats[team].get('pressure_percentage', 0)
-        })
-    
-    df = pd.DataFrame(data)
-    
-    # Создаем график
-    fig = px.bar(
-        df, 
-        x='Показатель', 
-        y='Значение', 
-        color='Команда',
-        barmode='group',
-        color_discrete_map={teams[0]: colors['team1'], teams[1]: colors['team2']} if len(teams) > 1 else None,
-        height=height
-    )
-    
-    fig.update_layout(
-        title='Статистика пасов',
-        xaxis_title=None,
-        yaxis_title='Значение',
-        legend_title='Команда'
-    )
-    
-    return fig
+# Общая для всех сессий база сохраненных матчей
+@st.cache_resource
+def get_event_store():
+    return EventStore()
 
-# Функция для создания тепловой карты пасов
-def create_pass_heatmap(team_stats, team, color, height=500):
+# Функция для открытия сохраненного в базе матча
+def load_stored_match(store, match_key):
     """
-    Создает тепловую карту пасов на футбольном поле.
+    Возвращает таблицу событий матча из базы (с кэшированием в памяти, как у загруженных файлов).
     """
-    # Получаем данные о зонах пасов
-    pass_zones = team_stats[team].get('pass_zones', {})
-    total_passes = sum(pass_zones.values()) if pass_zones else 0
-    
-    # Создаем фигуру
-    fig = go.Figure()
-    
-    # Создаем сетку данных для тепловой карты
-    grid_size = 10
-    x = np.linspace(0, 100, grid_size)
-    y = np.linspace(0, 100, grid_size)
-    z = np.zeros((grid_size, grid_size))
-    
-    # Заполняем тепловую карту
-    zone_to_coords = {
-        "Defensive Left": (16, 16),
-        "Defensive Center": (16, 50),
-        "Defensive Right": (16, 84),
-        "Middle Left": (50, 16),
-        "Middle Center": (50, 50),
-        "Middle Right": (50, 84),
-        "Attacking Left": (84, 16),
-        "Attacking Center": (84, 50),
-        "Attacking Right": (84, 84)
-    }
-    
-    for zone, count in pass_zones.items():
-        if zone in zone_to_coords and total_passes > 0:
-            i, j = zone_to_coords[zone]
-            # Находим ближайшие индексы в нашей сетке
-            i_idx = int(i / 100 * (grid_size - 1))
-            j_idx = int(j / 100 * (grid_size - 1))
-            
-            # Добавляем "тепло" пропорционально количеству пасов
-            if i_idx < grid_size and j_idx < grid_size:
-                z[i_idx, j_idx] = count / total_passes * 100
-    
-    # Добавляем тепловую карту
-    fig.add_trace(go.Heatmap(
-        z=z,
-        x=y,  # Обратите внимание на переворот x и y для правильного отображения поля
-        y=x,
-        colorscale=[[0, 'rgba(255,255,255,0)'], [1, color]],
-        showscale=True,
-        colorbar=dict(title="% пасов")
-    ))
-    
-    # Добавляем контуры футбольного поля
-    # Внешние границы поля
-    fig.add_shape(type="rect", x0=0, y0=0, x1=100, y1=100, line=dict(color="white"), fillcolor="rgba(0,100,0,0.3)")
-    
-    # Центральный круг
-    fig.add_shape(type="circle", x0=40, y0=40, x1=60, y1=60, line=dict(color="white"))
-    
-    # Центральная линия
-    fig.add_shape(type="line", x0=0, y0=50, x1=100, y1=50, line=dict(color="white"))
-    
-    # Штрафные площади
-    fig.add_shape(type="rect", x0=0, y0=30, x1=16, y1=70, line=dict(color="white"))
-    fig.add_shape(type="rect", x0=84, y0=30, x1=100, y1=70, line=dict(color="white"))
-    
-    # Настраиваем макет
-    fig.update_layout(
-        title=f"Тепловая карта пасов - {team}",
-        height=height,
-        xaxis=dict(showgrid=False, zeroline=False, range=[0, 100], scaleanchor="y", scaleratio=1),
-        yaxis=dict(showgrid=False, zeroline=False, range=[0, 100]),
-        margin=dict(l=0, r=0, t=40, b=0)
-    )
-    
-    return fig
+    cache = get_match_cache()
+    df = cache.get((match_key, 'df'))
+    if df is None:
+        df = store.load_events(match_key)
+        cache.put((match_key, 'df'), df, estimate_size(df))
+    return df
 
-# Функция для создания диаграммы типов ударов
-def create_shot_types_chart(team_stats, team, color, height=400):
+# Функция для сезонной статистики по сохраненным в базе матчам
+def get_stored_season_stats(store, match_keys):
     """
-    Создает диаграмму типов ударов команды.
+    Суммирует статистику выбранных матчей одним запросом к базе.
+    Возвращает ключ сезона (как у get_season_team_stats) и объединенную team_stats.
     """
-    shot_types = team_stats[team].get('shot_types', {})
-    
-    if not shot_types:
-        fig = go.Figure()
-        fig.update_layout(
-            title=f"Нет данных о типах ударов для {team}",
-            height=height
-        )
-        return fig
-    
-    # Преобразуем словарь в списки для построения графика
-    labels = list(shot_types.keys())
-    values = list(shot_types.values())
-    
-    # Создаем круговую диаграмму
-    fig = go.Figure(data=[go.Pie(
-        labels=labels,
-        values=values,
-        hole=.3,
-        marker_colors=[color, color+'90', color+'70', color+'50', color+'30']
-    )])
-    
-    fig.update_layout(
-        title=f"Типы ударов - {team}",
-        height=height
-    )
-    
-    return fig
+    season_key = compute_content_hash("".join(sorted(match_keys)).encode("utf-8"))
+    cache = get_match_cache()
+    team_stats = cache.get((season_key, 'team_stats'))
+    if team_stats is None:
+        team_stats = store.team_stats(list(dict.fromkeys(match_keys)))
+        cache.put((season_key, 'team_stats'), team_stats, estimate_size(team_stats))
+    return season_key, team_stats
 
-# Функция для создания диаграммы результатов ударов
-def create_shot_outcomes_chart(team_stats, team, color, height=400):
+# Функция для выбора сохраненных в базе матчей
+def select_stored_matches(store, season_mode):
     """
-    Создает диаграмму результатов ударов команды.
+    Показывает список матчей из базы и возвращает ключи выбранных
+    (в сезонном режиме - несколько, иначе не больше одного).
     """
-    # Собираем данные о результатах ударов
-    shot_outcomes = {
-        'Голы': team_stats[team].get('goals', 0),
-        'Удары в створ (не голы)': team_stats[team].get('shots_on_target', 0) - team_stats[team].get('goals', 0),
-        'Удары мимо': team_stats[team].get('shots_off_target', 0),
-        'Заблокированные удары': team_stats[team].get('blocked_shots', 0)
+    matches = store.list_matches()
+    if matches.empty:
+        return []
+    labels = {
+        row.match_key: f"{row.name or row.match_key[:12]} ({row.n_events} событий, {row.ingested_at})"
+        for row in matches.itertuples()
     }
-    
-    # Преобразуем словарь в списки для построения графика
-    labels = list(shot_outcomes.keys())
-    values = list(shot_outcomes.values())
-    
-    # Цвета для разных исходов
-    colors = ['#2ecc71', '#3498db', '#e74c3c', '#95a5a6']
-    
-    # Создаем круговую диаграмму
-    fig = go.Figure(data=[go.Pie(
-        labels=labels,
-        values=values,
-        hole=.3,
-        marker_colors=colors
-    )])
-    
-    fig.update_layout(
-        title=f"Результаты ударов - {team}",
-        height=height
+    if season_mode:
+        return st.multiselect("Матчи из базы", list(labels), format_func=labels.get)
+    selected = st.selectbox(
+        "Матч из базы", [None, *labels], format_func=lambda key: "Не выбран" if key is None else labels[key]
     )
-    
-    return fig
+    return [selected] if selected is not None else []
 
-# Функция для создания графика статистики игроков
-def create_player_stats_chart(team_stats, team, category, color, height=500, top_n=10):
+# Функция для получения статистики матча с кэшированием по хэшу содержимого
+def get_match_team_stats(match_key, df=None, file_bytes=None, store=None):
     """
-    Создает график статистики игроков по выбранной категории.
-    
-    Args:
-        team_stats: Статистика команд
-        team: Команда для анализа
-        category: Категория статистики ('goals', 'passes', 'pass_accuracy', etc.)
-        color: Цвет для графика
-        height: Высота графика
-        top_n: Количество лучших игроков для отображения
+    Возвращает team_stats для матча, повторно используя ранее рассчитанный результат.
+    Если матч сохранен в базе store, статистика берется из нее запросом SQL.
+    Если DataFrame не передан, файл анализируется потоково по частям.
     """
-    player_stats = team_stats[team].get('player_stats', {})
-    
-    # Категория для отображения
-    category_display = {
-        'goals': 'Голы',
-        'shots': 'Удары',
-        'passes': 'Пасы',
-        'pass_accuracy': 'Точность пасов (%)',
-        'tackles': 'Отборы',
-        'interceptions': 'Перехваты',
-        'goal_conversion': 'Конверсия ударов в голы (%)'
-    }
-    
-    # Создаем данные для графика
-    data = []
-    for player, stats in player_stats.items():
-        if category in stats:
-            data.append({
-                'Игрок': player,
-                category_display.get(category, category): stats[category]
-            })
-    
-    # Сортируем по убыванию и берем топ N
-    data = sorted(data, key=lambda x: x[category_display.get(category, category)], reverse=True)[:top_n]
-    
-    if not data:
-        fig = go.Figure()
-        fig.update_layout(
-            title=f"Нет данных о {category_display.get(category, category)} для игроков {team}",
-            height=height
-        )
-        return fig
-    
-    # Создаем DataFrame
-    df = pd.DataFrame(data)
-    
-# Создаем горизонтальную столбчатую диаграмму
-    fig = px.bar(
-        df,
-        y='Игрок',
-        x=category_display.get(category, category),
-        color_discrete_sequence=[color],
-        height=height,
-        orientation='h'
-    )
-    
-    fig.update_layout(
-        title=f"Топ-{len(data)} игроков по {category_display.get(category, category).lower()} - {team}",
-        xaxis_title=category_display.get(category, category),
-        yaxis_title=None
-    )
-    
-    return fig
+    cache = get_match_cache()
+    team_stats = cache.get((match_key, 'team_stats'))
+    if team_stats is None:
+        if store is not None and store.has_match(match_key):
+            team_stats = store.team_stats(match_key)
+        elif df is None:
+            team_stats = analyze_match_csv_streaming(io.BytesIO(file_bytes))
+        else:
+            team_stats = analyze_match_data(df, cube=get_match_cube(match_key, df))
+        cache.put((match_key, 'team_stats'), team_stats, estimate_size(team_stats))
+    return team_stats
 
-# Функция для создания графика сравнения статистики по таймам
-def create_half_comparison_chart(team_stats, colors, height=400):
+# Функция для получения куба событий матча
+def get_match_cube(match_key, df):
     """
-    Создает график сравнения статистики команд по таймам.
+    Возвращает EventCube матча (строится один раз и кэшируется по хэшу файла).
+    Из него считается team_stats матча и строятся разбивки событий.
     """
-    teams = list(team_stats.keys())
-    
-    # Создаем данные для графика
-    data = []
-    for team in teams:
-        for half in [1, 2]:
-            half_stats = team_stats[team]['half_stats'][half]
-            
-            data.append({
-                'Команда': team,
-                'Тайм': f"{half} тайм",
-                'Метрика': 'Удары',
-                'Значение': half_stats.get('shots', 0)
-            })
-            
-            data.append({
-                'Команда': team,
-                'Тайм': f"{half} тайм",
-                'Метрика': 'Голы',
-                'Значение': half_stats.get('goals', 0)
-            })
-            
-            data.append({
-                'Команда': team,
-                'Тайм': f"{half} тайм",
-                'Метрика': 'Пасы / 10',  # Делим на 10 для лучшей визуализации
-                'Значение': half_stats.get('passes', 0) / 10
-            })
-            
-            data.append({
-                'Команда': team,
-                'Тайм': f"{half} тайм",
-                'Метрика': 'Точность пасов (%)',
-                'Значение': half_stats.get('passes', 0) > 0 and half_stats.get('successful_passes', 0) / half_stats.get('passes', 0) * 100 or 0
-            })
-    
-    df = pd.DataFrame(data)
-    
-    # Создаем график
-    fig = px.bar(
-        df, 
-        x='Метрика', 
-        y='Значение', 
-        color='Команда',
-        barmode='group',
-        facet_col='Тайм',
-        color_discrete_map={teams[0]: colors['team1'], teams[1]: colors['team2']} if len(teams) > 1 else None,
-        height=height
-    )
-    
-    fig.update_layout(
-        title='Сравнение по таймам',
-        xaxis_title=None,
-        yaxis_title='Значение',
-        legend_title='Команда'
-    )
-    
-    return fig
+    cache = get_match_cache()
+    cube = cache.get((match_key, 'cube'))
+    if cube is None:
+        cube = EventCube.from_events(df)
+        cache.put((match_key, 'cube'), cube, sys.getsizeof(cube))
+    return cube
 
-# НОВЫЕ ФУНКЦИИ ДЛЯ РАСШИРЕННОГО АНАЛИЗА
-
-# Функция для создания графика по категориям событий
-def create_events_category_chart(team_stats, colors, height=500):
+# Функция для получения индекса статистики матча по минутам
+def get_match_time_index(match_key, df):
     """
-    Создает график распределения событий по категориям для команд.
+    Возвращает MatchTimeIndex матча (строится один раз и кэшируется по хэшу файла)
+    или None, если в данных нет игрового времени.
     """
-    teams = list(team_stats.keys())
-    
-    # Создаем данные для графика
-    data = []
-    for team in teams:
-        event_categories = team_stats[team].get('event_categories', {})
-        for category, count in event_categories.items():
-            data.append({
-                'Команда': team,
-                'Категория': category,
-                'Количество': count
-            })
-    
-    # Сортируем данные
-    df = pd.DataFrame(data)
-    if df.empty:
-        fig = go.Figure()
-        fig.update_layout(
-            title="Нет данных о категориях событий",
-            height=height
-        )
-        return fig
-    
-    # Создаем график
-    fig = px.bar(
-        df,
-        x='Категория',
-        y='Количество',
-        color='Команда',
-        barmode='group',
-        color_discrete_map={teams[0]: colors['team1'], teams[1]: colors['team2']} if len(teams) > 1 else None,
-        height=height
-    )
-    
-    fig.update_layout(
-        title='Распределение событий по категориям',
-        xaxis_title=None,
-        yaxis_title='Количество',
-        legend_title='Команда'
-    )
-    
-    return fig
+    cache = get_match_cache()
+    if (match_key, 'time_index') in cache:
+        return cache.get((match_key, 'time_index'))
+    time_index = MatchTimeIndex.from_events(df)
+    cache.put((match_key, 'time_index'), time_index, sys.getsizeof(time_index))
+    return time_index
 
-# Функция для создания графика типов событий для выбранной категории
-def create_event_types_chart(team_stats, team, event_category, color, height=400):
+# Функция для получения инвертированного индекса событий матча
+def get_match_event_index(match_key, df):
     """
-    Создает график типов событий для выбранной категории.
+    Возвращает EventIndex матча (строится один раз и кэшируется по хэшу файла).
     """
-    event_types = team_stats[team].get('event_types', {}).get(event_category, {})
-    
-    if not event_types:
-        fig = go.Figure()
-        fig.update_layout(
-            title=f"Нет данных о типах событий для категории '{event_category}' команды {team}",
-            height=height
-        )
-        return fig
-    
-    # Создаем данные для графика
-    data = []
-    for event_type, count in event_types.items():
-        data.append({
-            'Тип': event_type,
-            'Количество': count
-        })
-    
-    # Сортируем по количеству
-    data = sorted(data, key=lambda x: x['Количество'], reverse=True)
-    
-    # Создаем DataFrame
-    df = pd.DataFrame(data)
-    
-    # Создаем график
-    fig = px.bar(
-        df,
-        y='Тип',
-        x='Количество',
-        color_discrete_sequence=[color],
-        height=height,
-        orientation='h'
-    )
-    
-    fig.update_layout(
-        title=f"Типы событий для категории '{event_category}' - {team}",
-        xaxis_title='Количество',
-        yaxis_title=None
-    )
-    
-    return fig
+    cache = get_match_cache()
+    event_index = cache.get((match_key, 'event_index'))
+    if event_index is None:
+        event_index = EventIndex.from_events(df)
+        cache.put((match_key, 'event_index'), event_index, sys.getsizeof(event_index))
+    return event_index
 
-# Функция для создания графика использования ног
-def create_foot_usage_chart(team_stats, colors, height=400):
+# Функция для получения аналитических выводов матча
+def get_match_insights(match_key, team_stats, detail_level):
     """
-    Создает график распределения использования ног по командам.
+    Возвращает выводы всех команд матча (таблица правил проверяется один раз
+    для всех команд) и кэширует их по ключу матча и уровню детализации.
     """
-    teams = list(team_stats.keys())
-    
-    # Создаем данные для графика
-    data = []
-    for team in teams:
-        foot_usage = team_stats[team].get('foot_used', {})
-        for foot, count in foot_usage.items():
-            # Преобразуем английские названия в русские для отображения
-            foot_display = {
-                'Right': 'Правая',
-                'Left': 'Левая',
-                'Head': 'Голова',
-                'Other': 'Другое'
-            }.get(foot, foot)
-            
-            data.append({
-                'Команда': team,
-                'Часть тела': foot_display,
-                'Количество': count
-            })
-    
-    # Создаем DataFrame
-    df = pd.DataFrame(data)
-    
-    if df.empty:
-        fig = go.Figure()
-        fig.update_layout(
-            title="Нет данных об использовании ног",
-            height=height
-        )
-        return fig
-    
-    # Создаем график
-    fig = px.bar(
-        df,
-        x='Часть тела',
-        y='Количество',
-        color='Команда',
-        barmode='group',
-        color_discrete_map={teams[0]: colors['team1'], teams[1]: colors['team2']} if len(teams) > 1 else None,
-        height=height
-    )
-    
-    fig.update_layout(
-        title='Использование частей тела при игре',
-        xaxis_title=None,
-        yaxis_title='Количество',
-        legend_title='Команда'
-    )
-    
-    return fig
+    if match_key is None:
+        return generate_match_insights(team_stats, detail_level)
+    cache = get_match_cache()
+    insights = cache.get((match_key, 'insights', detail_level))
+    if insights is None:
+        insights = generate_match_insights(team_stats, detail_level)
+        cache.put((match_key, 'insights', detail_level), insights, estimate_size(insights))
+    return insights
 
-# Функция для создания графика использования ног по типам событий
-def create_foot_by_event_chart(team_stats, team, color, height=400):
-    """
-    Создает график распределения использования ног по типам событий.
+# Функция для сезонной статистики по нескольким матчам
+def get_season_team_stats(match_files, max_workers=None):
     """
-    foot_by_event = team_stats[team].get('foot_by_event', {})
+    Анализирует несколько матчей параллельно в пуле процессов и объединяет статистику.
+    Проценты (точность пасов, ударов, конверсия) рассчитываются по суммарным счетчикам.
     
-    if not foot_by_event:
-        fig = go.Figure()
-        fig.update_layout(
-            title=f"Нет данных об использовании ног по типам событий для {team}",
-            height=height
-        )
-        return fig
-    
-    # Создаем данные для графика
-    data = []
-    for event, foot_data in foot_by_event.items():
-        for foot, count in foot_data.items():
-            # Преобразуем английские названия в русские для отображения
-            foot_display = {
-                'Right': 'Правая',
-                'Left': 'Левая',
-                'Head': 'Голова',
-                'Other': 'Другое'
-            }.get(foot, foot)
-            
-            data.append({
-                'Событие': event,
-                'Часть тела': foot_display,
-                'Количество': count
-            })
-    
-    # Создаем DataFrame
-    df = pd.DataFrame(data)
-    
-    # Создаем график
-    fig = px.bar(
-        df,
-        x='Событие',
-        y='Количество',
-        color='Часть тела',
-        barmode='stack',
-        height=height
-    )
-    
-    fig.update_layout(
-        title=f"Использование частей тела по типам событий - {team}",
-        xaxis_title=None,
-        yaxis_title='Количество',
-        legend_title='Часть тела'
-    )
+    Args:
+        match_files: Список пар (имя файла, содержимое файла)
+        max_workers: Количество процессов (по умолчанию - число ядер)
     
-    return fig
-
-# Функция для создания графика действий вратаря
-def create_goalkeeper_actions_chart(team_stats, team, color, height=400):
+    Returns:
+        Ключ сезона (хэш набора файлов) и объединенная team_stats
     """
-    Создает график действий вратаря.
+    match_keys = [compute_content_hash(file_bytes) for _, file_bytes in match_files]
+    season_key = compute_content_hash("".join(sorted(match_keys)).encode("utf-8"))
+    
+    cache = get_match_cache()
+    team_stats = cache.get((season_key, 'team_stats'))
+    if team_stats is not None:
+        return season_key, team_stats
+    
+    # Счетчики отдельных матчей тоже кэшируются: добавление файла не пересчитывает остальные
+    match_counts = {key: cache.get((key, 'counts')) for key in match_keys}
+    pending = {}
+    for key, (file_name, file_bytes) in zip(match_keys, match_files):
+        if match_counts[key] is None and key not in pending:
+            pending[key] = (file_name, file_bytes)
+    
+    if len(pending) == 1:
+        key, (file_name, file_bytes) = next(iter(pending.items()))
+        match_counts[key] = analyze_match_file(file_name, file_bytes)
+    elif pending:
+        workers = min(max_workers or os.cpu_count() or 1, len(pending))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                key: executor.submit(analyze_match_file, file_name, file_bytes)
+                for key, (file_name, file_bytes) in pending.items()
+            }
+            for key, future in futures.items():
+                match_counts[key] = future.result()
+    for key in pending:
+        cache.put((key, 'counts'), match_counts[key], estimate_size(match_counts[key].counts))
+    
+    # Объединяем матчи в порядке загрузки (повторно загруженный файл учитывается один раз)
+    season_stats = MatchStats()
+    for key in dict.fromkeys(match_keys):
+        season_stats.update(match_counts[key])
+    team_stats = season_stats.finalize()
+    
+    cache.put((season_key, 'team_stats'), team_stats, estimate_size(team_stats))
+    return season_key, team_stats
+
+# Общий для всех сессий кэш построенных графиков
+@st.cache_resource
+def get_figure_cache():
+    return LRUCache(FIGURE_CACHE_MAX_ENTRIES)
+
+# Функция для приведения аргументов графика к хэшируемому ключу
+def _freeze(value):
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+# Функция для получения графика с мемоизацией
+def get_cached_figure(match_key, create_chart, team_stats, *args, **kwargs):
     """
-    gk_actions = team_stats[team].get('gk_actions', {})
-    
-    if not gk_actions:
-        fig = go.Figure()
-        fig.update_layout(
-            title=f"Нет данных о действиях вратаря для {team}",
-            height=height
-        )
-        return fig
-    
-    # Создаем данные для графика
-    data = []
-    for action, count in gk_actions.items():
-        data.append({
-            'Действие': action,
-            'Количество': count
-        })
-    
-    # Сортируем по количеству
-    data = sorted(data, key=lambda x: x['Количество'], reverse=True)
-    
-    # Создаем DataFrame
-    df = pd.DataFrame(data)
-    
-    # Создаем график
-    fig = px.bar(
-        df,
-        y='Действие',
-        x='Количество',
-        color_discrete_sequence=[color],
-        height=height,
-        orientation='h'
-    )
-    
-    fig.update_layout(
-        title=f"Действия вратаря - {team}",
-        xaxis_title='Количество',
-        yaxis_title=None
-    )
+    Строит график функцией create_chart или берет ранее построенный из кэша.
     
+    Ключ кэша: хэш матча, имя функции графика и все остальные параметры
+    (команда, цвет, высота и специфичные для графика настройки).
+    """
+    if match_key is None:
+        with profile_stage(f"Построение: {create_chart.__name__}"):
+            return create_chart(team_stats, *args, **kwargs)
+    
+    key = (match_key, create_chart.__name__, _freeze(args), _freeze(kwargs))
+    cache = get_figure_cache()
+    fig = cache.get(key)
+    if fig is None:
+        with profile_stage(f"Построение: {create_chart.__name__}"):
+            fig = create_chart(team_stats, *args, **kwargs)
+        cache.put(key, fig, 1)
     return fig
 
-# Функция для создания графика типов сейвов
-def create_save_types_chart(team_stats, team, color, height=400):
+# Профилировщик этапов построения дашборда
+class StageProfiler:
     """
-    Создает диаграмму типов сейвов вратаря.
+    Замеряет время (perf_counter) и память (tracemalloc) именованных этапов.
+    Этапы могут быть вложенными; пик памяти этапа учитывает пики вложенных.
+    Выключенный профилировщик возвращает пустой контекст и ничего не замеряет.
     """
-    save_types = team_stats[team].get('save_types', {})
-    
-    if not save_types:
-        fig = go.Figure()
-        fig.update_layout(
-            title=f"Нет данных о типах сейвов для {team}",
-            height=height
-        )
-        return fig
     
-    # Преобразуем словарь в списки для построения графика
-    labels = list(save_types.keys())
-    values = list(save_types.values())
-    
-    # Создаем круговую диаграмму
-    fig = go.Figure(data=[go.Pie(
-        labels=labels,
-        values=values,
-        hole=.3,
-        marker_colors=[color, color+'90', color+'70', color+'50', color+'30']
-    )])
-    
-    fig.update_layout(
-        title=f"Типы сейвов вратаря - {team}",
-        height=height
-    )
-    
-    return fig
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.records = []
+        self._stack = []
+    
+    def stage(self, name):
+        """
+        Возвращает контекстный менеджер, замеряющий этап name.
+        """
+        if not self.enabled:
+            return nullcontext()
+        return self._measure(name)
+    
+    @contextmanager
+    def _measure(self, name):
+        record = {'stage': name, 'depth': len(self._stack)}
+        self.records.append(record)
+        
+        # Пик внешнего этапа до сброса сохраняется, чтобы не потерять его
+        current, peak = tracemalloc.get_traced_memory()
+        if self._stack:
+            self._stack[-1]['child_peak'] = max(self._stack[-1]['child_peak'], peak)
+        tracemalloc.reset_peak()
+        frame = {'child_peak': 0}
+        self._stack.append(frame)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            end_current, end_peak = tracemalloc.get_traced_memory()
+            self._stack.pop()
+            peak = max(end_peak, frame['child_peak'])
+            if self._stack:
+                self._stack[-1]['child_peak'] = max(self._stack[-1]['child_peak'], peak)
+            record['time_ms'] = round(elapsed * 1000, 2)
+            record['peak_kb'] = round((peak - current) / 1024, 1)
+            record['delta_kb'] = round((end_current - current) / 1024, 1)
+    
+    def to_json(self):
+        """
+        Возвращает результаты замеров в формате JSON.
+        """
+        total_ms = sum(record.get('time_ms', 0) for record in self.records if record['depth'] == 0)
+        return json.dumps({'total_ms': round(total_ms, 2), 'stages': self.records}, ensure_ascii=False, indent=2)
 
-# Функция для создания графика результатов под давлением
-def create_pressure_results_chart(team_stats, team, color, height=500):
+# Состояние профилирования текущего запуска скрипта (у каждой сессии Streamlit свой поток)
+_profiling_state = threading.local()
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_users = 0
+_tracemalloc_owned = False
+
+# Функция для замера этапа текущим профилировщиком
+def profile_stage(name):
     """
-    Создает график результатов действий под давлением.
+    Контекстный менеджер для замера этапа; при выключенном профилировании ничего не делает.
     """
-    pressure_results = team_stats[team].get('pressure_results', {})
-    
-    if not pressure_results:
-        fig = go.Figure()
-        fig.update_layout(
-            title=f"Нет данных о результатах под давлением для {team}",
-            height=height
-        )
-        return fig
-    
-    # Создаем данные для графика
-    data = []
-    for pressure, results in pressure_results.items():
-        for result, count in results.items():
-            # Преобразуем названия для отображения
-            pressure_display = 'Под давлением' if pressure == 'Yes' else 'Без давления'
-            
-            data.append({
-                'Давление': pressure_display,
-                'Результат': result,
-                'Количество': count
-            })
-    
-    # Создаем DataFrame
-    df = pd.DataFrame(data)
-    
-    if df.empty:
-        return go.Figure()
-    
-    # Создаем график
-    fig = px.bar(
-        df,
-        x='Давление',
-        y='Количество',
-        color='Результат',
-        barmode='stack',
-        color_discrete_sequence=px.colors.qualitative.Set1,
-        height=height
-    )
-    
-    fig.update_layout(
-        title=f"Результаты действий под давлением - {team}",
-        xaxis_title=None,
-        yaxis_title='Количество',
-        legend_title='Результат'
-    )
-    
-    return fig
+    profiler = getattr(_profiling_state, 'profiler', None)
+    if profiler is None:
+        return nullcontext()
+    return profiler.stage(name)
 
-# Функция для создания сетевой диаграммы пасов
-def create_pass_network_chart(team_stats, team, color, height=600, min_passes=2):
+# Функция для начала профилирования запуска
+def start_profiling(enabled):
     """
-    Создает график сети пасов между игроками одной команды.
+    Создает профилировщик текущего запуска. tracemalloc общий для процесса,
+    поэтому он запускается первым профилирующим запуском и останавливается последним.
+    Если трассировку включил кто-то другой (например, python -X tracemalloc),
+    дашборд ее не выключает.
     """
-    pass_combinations = team_stats[team].get('pass_combinations', {})
-    
-    if not pass_combinations:
-        fig = go.Figure()
-        fig.update_layout(
-            title=f"Нет данных о комбинациях пасов для {team}",
-            height=height
-        )
-        return fig
-    
-    # Преобразуем данные о пасах в формат для построения сети
-    edges = []
-    for player1, targets in pass_combinations.items():
-        for player2, count in targets.items():
-            if count >= min_passes:  # Фильтруем по минимальному количеству пасов
-                edges.append((player1, player2, count))
-    
-    if not edges:
-        fig = go.Figure()
-        fig.update_layout(
-            title=f"Недостаточно данных для сети пасов команды {team}",
-            height=height
-        )
-        return fig
-    
-    # Создаем список всех игроков
-    all_players = set()
-    for edge in edges:
-        all_players.add(edge[0])
-        all_players.add(edge[1])
-    all_players = list(all_players)
-    
-    # Создаем словарь позиций игроков (распределяем по кругу)
-    player_positions = {}
-    n_players = len(all_players)
-    for i, player in enumerate(all_players):
-        angle = 2 * math.pi * i / n_players
-        r = 0.8  # радиус круга
-        player_positions[player] = (r * math.cos(angle) + 1.0, r * math.sin(angle) + 1.0)
-    
-    # Создаем граф
-    fig = go.Figure()
-    
-    # Добавляем связи (пасы)
-    for player1, player2, count in edges:
-        start_pos = player_positions[player1]
-        end_pos = player_positions[player2]
-        
-        # Ширина линии пропорциональна количеству пасов
-        width = min(10, 1 + count / 2)
-        
-        fig.add_trace(go.Scatter(
-            x=[start_pos[0], end_pos[0]],
-            y=[start_pos[1], end_pos[1]],
-            mode='lines',
-            line=dict(
-                width=width,
-                color=color
-            ),
-            opacity=0.7,
-            showlegend=False,
-            hoverinfo='text',
-            text=f"{player1} → {player2}: {count} пасов"
-        ))
-    
-    # Расчет статистики пасов для определения размера узлов
-    player_pass_counts = defaultdict(int)
-    for player1, player2, count in edges:
-        player_pass_counts[player1] += count  # Отданные пасы
-        player_pass_counts[player2] += count  # Полученные пасы
-    
-    # Добавляем узлы (игроков)
-    for player in all_players:
-        pos = player_positions[player]
-        
-        # Размер узла зависит от общего числа связанных пасов
-        size = max(15, player_pass_counts[player] / 2)
-        
-        fig.add_trace(go.Scatter(
-            x=[pos[0]],
-            y=[pos[1]],
-            mode='markers+text',
-            marker=dict(
-                size=size,
-                color=color,
-                line=dict(width=2, color='white')
-            ),
-            text=player,
-            textposition="top center",
-            hoverinfo='text',
-            hovertext=f"{player}: {player_pass_counts[player]} связанных пасов",
-            showlegend=False
-        ))
-    
-    # Настраиваем макет
-    fig.update_layout(
-        title=f"Сеть пасов команды {team}",
-        height=height,
-        showlegend=False,
-        xaxis=dict(showgrid=False, zeroline=False, showticklabels=False),
-        yaxis=dict(showgrid=False, zeroline=False, showticklabels=False),
-        plot_bgcolor='rgba(240, 240, 240, 0.8)'
-    )
-    
-    return fig
+    global _tracemalloc_users, _tracemalloc_owned
+    profiler = StageProfiler(enabled)
+    _profiling_state.profiler = profiler if enabled else None
+    if enabled:
+        with _tracemalloc_lock:
+            if _tracemalloc_users == 0 and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                _tracemalloc_owned = True
+            _tracemalloc_users += 1
+    return profiler
+
+# Функция для завершения профилирования запуска
+def stop_profiling(profiler):
+    global _tracemalloc_users, _tracemalloc_owned
+    _profiling_state.profiler = None
+    if profiler.enabled:
+        with _tracemalloc_lock:
+            _tracemalloc_users -= 1
+            if _tracemalloc_users == 0 and _tracemalloc_owned:
+                tracemalloc.stop()
+                _tracemalloc_owned = False
 
-# Функция для создания графика игроков по использованию разных ног
-def create_player_foot_usage_chart(team_stats, team, color, height=500, top_n=10):
+# Функция для отображения результатов профилирования в сайдбаре
+def display_profiling_panel(profiler):
     """
-    Создает график распределения использования ног разными игроками.
+    Показывает в сайдбаре таблицу этапов (время, пик и прирост памяти)
+    и кнопку выгрузки результатов в JSON.
     """
-    player_foot_usage = team_stats[team].get('player_foot_usage', {})
-    
-    if not player_foot_usage:
-        fig = go.Figure()
-        fig.update_layout(
-            title=f"Нет данных об использовании ног игроками команды {team}",
-            height=height
-        )
-        return fig
-    
-    # Создаем данные для графика
-    data = []
-    for player, foot_data in player_foot_usage.items():
-        total_actions = sum(foot_data.values())
-        if total_actions < 3:  # Пропускаем игроков с малым количеством действий
-            continue
-            
-        # Рассчитываем соотношение правой/левой ноги
-        right_pct = foot_data.get('Right', 0) / total_actions * 100 if total_actions > 0 else 0
-        left_pct = foot_data.get('Left', 0) / total_actions * 100 if total_actions > 0 else 0
-        
-        # Вычисляем "двуногость" - насколько игрок одинаково пользуется обеими ногами
-        if right_pct > 0 and left_pct > 0:
-            two_footedness = min(right_pct, left_pct) / max(right_pct, left_pct) * 100
-        else:
-            two_footedness = 0
-        
-        data.append({
-            'Игрок': player,
-            'Всего действий': total_actions,
-            'Правая (%)': right_pct,
-            'Левая (%)': left_pct,
-            'Двуногость (%)': two_footedness
-        })
-    
-    # Сортируем по общему количеству действий и берем топ N
-    data = sorted(data, key=lambda x: x['Всего действий'], reverse=True)[:top_n]
-    
-    if not data:
-        fig = go.Figure()
-        fig.update_layout(
-            title=f"Недостаточно данных об использовании ног игроками команды {team}",
-            height=height
-        )
-        return fig
-    
-    # Создаем DataFrame
-    df = pd.DataFrame(data)
-    
-    # Создаем график
-    fig = go.Figure()
-    
-    # Добавляем столбцы для правой ноги
-    fig.add_trace(go.Bar(
-        y=df['Игрок'],
-        x=df['Правая (%)'],
-        name='Правая нога (%)',
-        orientation='h',
-        marker=dict(color='rgba(58, 71, 80, 0.6)')
-    ))
-    
-    # Добавляем столбцы для левой ноги
-    fig.add_trace(go.Bar(
-        y=df['Игрок'],
-        x=df['Левая (%)'],
-        name='Левая нога (%)',
-        orientation='h',
-        marker=dict(color='rgba(246, 78, 139, 0.6)')
-    ))
-    
-    # Добавляем метки с процентом "двуногости"
-    for i, row in df.iterrows():
-        fig.add_annotation(
-            x=row['Правая (%)'] + row['Левая (%)'] + 5,
-            y=row['Игрок'],
-            text=f"Двуногость: {row['Двуногость (%)']:.1f}%",
-            showarrow=False,
-            font=dict(color="black", size=10),
-            align="left"
-        )
-    
-    # Настраиваем макет
-    fig.update_layout(
-        title=f"Использование правой и левой ноги игроками - {team}",
-        barmode='stack',
-        height=height,
-        xaxis=dict(title='Процент использования (%)'),
-        yaxis=dict(title=None)
+    st.sidebar.header("Профилирование")
+    if not profiler.records:
+        st.sidebar.write("Нет замеренных этапов")
+        return
+    
+    table = pd.DataFrame([{
+        'Этап': '  ' * record['depth'] + record['stage'],
+        'Время, мс': record.get('time_ms'),
+        'Пик памяти, КБ': record.get('peak_kb'),
+        'Прирост памяти, КБ': record.get('delta_kb'),
+    } for record in profiler.records])
+    total_ms = sum(record.get('time_ms', 0) for record in profiler.records if record['depth'] == 0)
+    st.sidebar.write(f"Всего: {total_ms:.0f} мс")
+    st.sidebar.dataframe(table, hide_index=True, use_container_width=True)
+    st.sidebar.download_button(
+        "Скачать профиль (JSON)",
+        data=profiler.to_json(),
+        file_name="profile.json",
+        mime="application/json"
     )
-    
-    return fig
 
-# Функция для генерации рекомендаций и аналитических выводов
-def generate_team_insights(team_stats, opponent_stats=None, detail_level="Средняя"):
+# Функция для вывода графика с замером отрисовки
+def show_chart(fig, **kwargs):
     """
-    Генерирует аналитические выводы и рекомендации для команды на основе статистики.
-    
-    Args:
-        team_stats: Статистика команды
-        opponent_stats: Статистика соперника (опционально)
-        detail_level: Уровень детализации ("Минимальная", "Средняя", "Подробная")
+    Выводит график через st.plotly_chart; при профилировании замеряет
+    сериализацию и отправку графика как отдельный этап.
     """
-    insights = {
-        'strengths': [],        # Сильные стороны
-        'weaknesses': [],       # Слабые стороны
-        'tactics': [],          # Тактические наблюдения
-        'key_players': [],      # Ключевые игроки
-        'improvement_areas': [] # Области для улучшения
-    }
-    
-    # Анализ атаки
-    if team_stats.get('shots', 0) > 0:
-        # Эффективность атаки
-        shot_accuracy = team_stats.get('shot_accuracy', 0)
-        if shot_accuracy > 60:
-            insights['strengths'].append(
-                f"Высокая точность ударов ({shot_accuracy}%). "
-                f"Команда эффективно создаёт качественные моменты."
-            )
-        elif shot_accuracy < 30:
-            insights['weaknesses'].append(
-                f"Низкая точность ударов ({shot_accuracy}%). "
-                f"Стоит поработать над качеством завершения атак."
-            )
-            insights['improvement_areas'].append("Точность ударов и выбор позиции для завершения атак")
-        
-        # Конверсия моментов
-        if team_stats.get('shots_on_target', 0) > 0:
-            goal_conversion = team_stats.get('goals', 0) / team_stats.get('shots_on_target', 0) * 100
-            if goal_conversion > 30:
-                insights['strengths'].append(
-                    f"Высокая реализация моментов ({goal_conversion:.1f}% ударов в створ превращаются в голы). "
-                    f"Команда эффективно завершает атаки."
-                )
-            elif goal_conversion < 10:
-                insights['weaknesses'].append(
-                    f"Низкая реализация моментов ({goal_conversion:.1f}% ударов в створ превращаются в голы). "
-                    f"Необходимо улучшить завершение атак."
-                )
-                insights['improvement_areas'].append("Улучшение реализации голевых моментов")
-    
-    # Анализ владения мячом и пасов
-    if team_stats.get('passes', 0) > 0:
-        pass_accuracy = team_stats.get('pass_accuracy', 0)
-        if pass_accuracy > 80:
-            insights['strengths'].append(
-                f"Высокая точность пасов ({pass_accuracy}%). "
-                f"Команда хорошо контролирует мяч."
-            )
-        elif pass_accuracy < 60:
-            insights['weaknesses'].append(
-                f"Низкая точность пасов ({pass_accuracy}%). "
-                f"Стоит поработать над контролем мяча."
-            )
-            insights['improvement_areas'].append("Улучшение точности пасов и контроля мяча")
-        
-        # Анализ пасов под давлением
-        pressure_percentage = team_stats.get('pressure_percentage', 0)
-        if pressure_percentage > 50 and pass_accuracy > 70:
-            insights['strengths'].append(
-                f"Команда хорошо справляется с прессингом соперника "
-                f"({pressure_percentage}% пасов под давлением, точность {pass_accuracy}%)."
-            )
-        elif pressure_percentage > 50 and pass_accuracy < 60:
-            insights['weaknesses'].append(
-                f"Команда испытывает сложности при прессинге соперника "
-                f"({pressure_percentage}% пасов под давлением, точность {pass_accuracy}%)."
-            )
-            insights['improvement_areas'].append("Улучшение игры под прессингом")
-            
-        # Анализ использования ног (новый)
-        foot_used = team_stats.get('foot_used', {})
-        if foot_used:
-            total_actions = sum(foot_used.values())
-            if total_actions > 0:
-                right_pct = foot_used.get('Right', 0) / total_actions * 100
-                left_pct = foot_used.get('Left', 0) / total_actions * 100
-                
-                if right_pct > 80:
-                    insights['tactics'].append(
-                        f"Команда очень сильно полагается на правую ногу ({right_pct:.1f}%). "
-                        f"Развитие игры левой ногой может добавить непредсказуемости."
-                    )
-                    insights['improvement_areas'].append("Развитие игры левой ногой")
-                elif left_pct > 80:
-                    insights['tactics'].append(
-                        f"Команда очень сильно полагается на левую ногу ({left_pct:.1f}%). "
-                        f"Развитие игры правой ногой может добавить непредсказуемости."
-                    )
-                    insights['improvement_areas'].append("Развитие игры правой ногой")
-                elif min(right_pct, left_pct) > 30:
-                    insights['strengths'].append(
-                        f"Команда хорошо использует обе ноги в игре (правая: {right_pct:.1f}%, левая: {left_pct:.1f}%), "
-                        f"что делает её атаки более разнообразными."
-                    )
-    
-    # Сравнение с соперником (если доступно)
-    if opponent_stats:
-        # Сравнение ударов
-        team_shots = team_stats.get('shots', 0)
-        opponent_shots = opponent_stats.get('shots', 0)
-        
-        if team_shots > opponent_shots * 1.5:
-            insights['strengths'].append(
-                f"Значительное преимущество по ударам ({team_shots} против {opponent_shots}). "
-                f"Команда доминировала в атаке."
-            )
-            insights['tactics'].append(
-                "Продолжать атакующий стиль игры, который приносит много моментов."
-            )
-        elif team_shots * 1.5 < opponent_shots:
-            insights['weaknesses'].append(
-                f"Значительное отставание по ударам ({team_shots} против {opponent_shots}). "
-                f"Команда уступила в атаке."
-            )
-            insights['tactics'].append(
-                "Необходимо улучшить создание атакующих моментов."
-            )
-        
-        # Сравнение по таймам
-        team_first_half_shots = team_stats['half_stats'][1].get('shots', 0)
-        team_second_half_shots = team_stats['half_stats'][2].get('shots', 0)
-        
-        if team_first_half_shots * 1.5 < team_second_half_shots:
-            insights['tactics'].append(
-                f"Команда значительно усилила атаку во втором тайме "
-                f"({team_first_half_shots} ударов в первом тайме, {team_second_half_shots} во втором)."
-            )
-        elif team_first_half_shots > team_second_half_shots * 1.5:
-            insights['tactics'].append(
-                f"Команда ослабила атаку во втором тайме "
-                f"({team_first_half_shots} ударов в первом тайме, {team_second_half_shots} во втором)."
-            )
-            insights['improvement_areas'].append("Поддержание интенсивности атаки на протяжении всего матча")
-    
-    # Анализ ключевых игроков
-    player_stats = team_stats.get('player_stats', {})
-    if player_stats:
-        # Лучшие бомбардиры
-        goal_scorers = [(player, stats.get('goals', 0)) for player, stats in player_stats.items() if stats.get('goals', 0) > 0]
-        if goal_scorers:
-            goal_scorers.sort(key=lambda x: x[1], reverse=True)
-            top_scorer, goals = goal_scorers[0]
-            insights['key_players'].append(
-                f"{top_scorer} - лучший бомбардир команды с {goals} голами."
-            )
-        
-        # Лучшие по созданию моментов
-        passers = [(player, stats.get('passes', 0), stats.get('pass_accuracy', 0)) 
-                   for player, stats in player_stats.items() if stats.get('passes', 0) > 10]
-        if passers:
-            passers.sort(key=lambda x: x[1], reverse=True)
-            top_passer, passes, accuracy = passers[0]
-            insights['key_players'].append(
-                f"{top_passer} - ключевой распасовщик с {passes} пасами (точность {accuracy}%)."
-            )
-        
-        # Лучшие по отборам
-        tacklers = [(player, stats.get('tackles', 0) + stats.get('interceptions', 0)) 
-                    for player, stats in player_stats.items() if stats.get('tackles', 0) + stats.get('interceptions', 0) > 0]
-        if tacklers:
-            tacklers.sort(key=lambda x: x[1], reverse=True)
-            top_tackler, tackles = tacklers[0]
-            insights['key_players'].append(
-                f"{top_tackler} - лучший в отборе мяча с {tackles} успешными действиями."
-            )
-            
-    # Анализ поведения под давлением (новый)
-    pressure_results = team_stats.get('pressure_results', {})
-    if pressure_results:
-        # Рассчитаем успешность действий под давлением и без него
-        under_pressure = pressure_results.get('Yes', {})
-        no_pressure = pressure_results.get('No', {})
-        
-        successful_under_pressure = sum(count for result, count in under_pressure.items() 
-                                    if result in ['Successful', 'On Target', 'Goal'])
-        total_under_pressure = sum(under_pressure.values())
-        
-        successful_no_pressure = sum(count for result, count in no_pressure.items() 
-                                  if result in ['Successful', 'On Target', 'Goal'])
-        total_no_pressure = sum(no_pressure.values())
-        
-        # Рассчитаем процент успешности
-        if total_under_pressure > 0 and total_no_pressure > 0:
-            success_rate_under_pressure = successful_under_pressure / total_under_pressure * 100
-            success_rate_no_pressure = successful_no_pressure / total_no_pressure * 100
-            
-            pressure_diff = success_rate_no_pressure - success_rate_under_pressure
-            
-            if pressure_diff > 30:
-                insights['weaknesses'].append(
-                    f"Значительное снижение успешности действий под давлением "
-                    f"({success_rate_under_pressure:.1f}% против {success_rate_no_pressure:.1f}% без давления)."
-                )
-                insights['improvement_areas'].append("Улучшение игры под прессингом")
-            elif pressure_diff < 10:
-                insights['strengths'].append(
-                    f"Команда хорошо действует под давлением "
-                    f"({success_rate_under_pressure:.1f}% против {success_rate_no_pressure:.1f}% без давления)."
-                )
-    
-    # Анализ использования вратаря (новый)
-    gk_actions = team_stats.get('gk_actions', {})
-    if gk_actions:
-        total_gk_actions = sum(gk_actions.values())
-        if total_gk_actions > 0:
-            # Анализ стиля вратаря
-            long_passes = gk_actions.get('Long Pass', 0)
-            short_passes = gk_actions.get('Short Pass', 0)
-            
-            if long_passes > short_passes * 2:
-                insights['tactics'].append(
-                    f"Вратарь предпочитает длинные передачи ({long_passes} длинных против {short_passes} коротких). "
-                    f"Команда стремится быстро переходить к атаке, минуя центр поля."
-                )
-            elif short_passes > long_passes * 2:
-                insights['tactics'].append(
-                    f"Вратарь предпочитает короткие передачи ({short_passes} коротких против {long_passes} длинных). "
-                    f"Команда стремится контролировать мяч и строить атаки через розыгрыш от вратаря."
-                )
-            
-            # Анализ сейвов
-            saves = gk_actions.get('Save', 0)
-            if saves > 5:
-                insights['key_players'].append(
-                    f"Вратарь совершил {saves} сейвов, что указывает на его важную роль в защите."
-                )
-    
-    # Фильтрация инсайтов в соответствии с уровнем детализации
-    if detail_level == "Минимальная":
-        # Для минимальной детализации оставляем только самые важные выводы
-        for category in insights:
-            insights[category] = insights[category][:1]
-    elif detail_level == "Средняя":
-        # Для средней детализации ограничиваем количество выводов
-        for category in insights:
-            insights[category] = insights[category][:2]
-    
-    return insights
+    with profile_stage(f"Отрисовка: {fig.layout.title.text or 'график'}"):
+        st.plotly_chart(fig, **kwargs)
+
+# НОВЫЕ ФУНКЦИИ ДЛЯ РАСШИРЕННОГО АНАЛИЗА
 
 # Функция для отображения аналитических выводов
 def display_team_insights(insights, detail_level):
@@ -1615,103 +562,142 @@ def display_team_insights(insights, detail_level):
             for area in insights['improvement_areas']:
                 st.write(f"• {area}")
 
-# Функция для отображения тепловой карты ударов
-def create_shot_heatmap(team_stats, team, color, height=500):
+# Функция для отображения фильтра событий
+def display_event_filter(event_index, colors, height=400):
     """
-    Создает тепловую карту ударов на футбольном поле.
+    Показывает фильтры по столбцам индекса событий и результат отбора:
+    количество событий и их распределение по игрокам.
     """
-    # Получаем данные о местоположении ударов
-    # Предположим, что у нас есть данные об ударах с координатами
-    shot_locations = team_stats[team].get('shot_locations', {})
-    total_shots = sum(shot_locations.values()) if shot_locations else 0
+    filters = {}
+    filter_columns = st.columns(3)
+    indexed = [column for column in EVENT_INDEX_COLUMNS if column in event_index.values]
+    for i, column in enumerate(indexed):
+        with filter_columns[i % 3]:
+            filters[column] = st.multiselect(
+                EVENT_INDEX_COLUMNS[column], event_index.values[column], key=f"filter_{column}"
+            )
     
-    if total_shots == 0:
-        # Если нет данных, создаем пустую фигуру
-        fig = go.Figure()
-        fig.update_layout(
-            title=f"Нет данных о расположении ударов для {team}",
-            height=height
+    st.metric("Подходящих событий", event_index.count(filters))
+    show_chart(
+        create_filtered_events_chart(event_index.counts_by('Player_Name_1', filters), colors['team1'], height),
+        use_container_width=True
+    )
+
+# Оси куба событий, доступные для разбивки (столбец рабочей таблицы -> название)
+BREAKDOWN_AXES = {
+    'Type': 'Подтип события',
+    'Results': 'Результат',
+    'Pass_Outcome': 'Результат паса',
+    'Pressure': 'Давление',
+    'Foot_Used': 'Нога',
+    'shot_type': 'Тип удара',
+    'shot_location': 'Место удара',
+    'half': 'Период',
+    'player': 'Игрок',
+    'Zone_End_3x3': 'Зона конца паса',
+}
+
+# Функция для отображения разбивки событий по осям куба
+def display_event_breakdown(cube, teams, colors, height=400):
+    """
+    Показывает количество событий команд по выбранной оси куба событий,
+    при выборе типа события - только по событиям этого типа (срез куба).
+    """
+    col1, col2 = st.columns(2)
+    with col1:
+        axis = st.selectbox(
+            "Разбивка по", list(BREAKDOWN_AXES), format_func=BREAKDOWN_AXES.get, key="breakdown_axis"
+        )
+    with col2:
+        event = st.selectbox(
+            "Тип события", [None, *cube.axes['event']],
+            format_func=lambda value: "Все события" if value is None else str(value), key="breakdown_event"
         )
-        return fig
-    
-    # Создаем фигуру с футбольным полем
-    fig = go.Figure()
-    
-    # Добавляем поле
-    # Внешние границы
-    fig.add_shape(type="rect", x0=0, y0=0, x1=100, y1=100, line=dict(color="white"), fillcolor="rgba(0,100,0,0.3)")
-    
-    # Штрафные площади
-    fig.add_shape(type="rect", x0=0, y0=30, x1=16, y1=70, line=dict(color="white"))
-    fig.add_shape(type="rect", x0=84, y0=30, x1=100, y1=70, line=dict(color="white"))
-    
-    # Ворота
-    fig.add_shape(type="rect", x0=0, y0=45, x1=1, y1=55, line=dict(color="white"))
-    fig.add_shape(type="rect", x0=99, y0=45, x1=100, y1=55, line=dict(color="white"))
-    
-    # Создаем маркеры для ударов
-    # Преобразуем данные о местоположении ударов в координаты
-    # Пример маппинга зон на координаты (упрощенно)
-    location_to_coords = {
-        "Inside Box": (90, 50),
-        "Outside Box": (75, 50),
-        "Left Wing": (80, 25),
-        "Right Wing": (80, 75),
-        "Center": (70, 50)
-    }
-    
-    for location, count in shot_locations.items():
-        if location in location_to_coords:
-            x, y = location_to_coords[location]
-            normalized_count = count / total_shots * 100
-            
-            # Добавляем маркер для удара
-            size = max(10, normalized_count)  # Минимальный размер 10
-            
-            fig.add_trace(go.Scatter(
-                x=[y],  # Swap x and y for football field orientation
-                y=[x],
-                mode="markers",
-                marker=dict(
-                    size=size,
-                    color=color,
-                    opacity=0.7,
-                    line=dict(width=1, color="white")
-                ),
-                text=f"{location}: {count} ударов ({normalized_count:.1f}%)",
-                hoverinfo="text",
-                showlegend=False
-            ))
     
-    # Настраиваем макет
-    fig.update_layout(
-        title=f"Расположение ударов - {team}",
-        height=height,
-        xaxis=dict(showgrid=False, zeroline=False, range=[0, 100], showticklabels=False),
-        yaxis=dict(showgrid=False, zeroline=False, range=[0, 100], showticklabels=False, scaleanchor="x", scaleratio=1),
-        plot_bgcolor="rgba(0,0,0,0)",
-        margin=dict(l=0, r=0, t=40, b=0)
+    selected = cube.slice(event=event) if event is not None else cube
+    st.caption("Разбивка считается по всему матчу")
+    show_chart(
+        create_event_breakdown_chart(selected.sum(['team', axis]), teams, colors, BREAKDOWN_AXES[axis], height),
+        use_container_width=True
     )
-    
-    return fig
+
+# Функция для отображения заголовка раздела с ленивым раскрытием
+def open_section(title, key, lazy):
+    """
+    Выводит заголовок раздела. В ленивом режиме раздел раскрывается переключателем,
+    и его графики строятся и отправляются в браузер только после раскрытия.
+    """
+    st.header(title)
+    if not lazy:
+        return True
+    return st.toggle("Показать раздел", value=False, key=f"section_{key}")
+
+# Функция для разбиения раздела по командам
+def team_sections(teams, key, lazy):
+    """
+    Возвращает список (индекс команды, команда, контейнер) для отрисовки раздела.
+    В обычном режиме это вкладки для всех команд, в ленивом - только выбранная команда.
+    """
+    if lazy:
+        team = st.radio("Команда", teams, horizontal=True, key=f"team_{key}")
+        return [(teams.index(team), team, st.container())]
+    tabs = st.tabs(teams)
+    return [(i, team, tabs[i]) for i, team in enumerate(teams)]
 
 # Основная функция приложения
 def main():
+    # Настройка страницы
+    st.set_page_config(layout="wide", page_title="Футбольная аналитика")
     st.title("Футбольная аналитика")
     
     # Добавляем настройки в сайдбар
     settings = add_settings_sidebar()
     
-    # Загрузка данных
-    uploaded_file = st.file_uploader("Загрузите CSV файл с данными матча", type=['csv'])
+    # Профилирование этапов (при выключенном режиме замеры не выполняются)
+    profiler = start_profiling(settings["profiling"])
+    try:
+        render_dashboard(settings)
+    finally:
+        stop_profiling(profiler)
+    if profiler.enabled:
+        display_profiling_panel(profiler)
+    
+    # Живой режим: страница перезапускается по таймеру и дочитывает новые события
+    if settings["live_mode"] and st.session_state.get("live_path"):
+        time.sleep(settings["live_interval"])
+        st.rerun()
+
+# Функция для построения дашборда по загруженным данным
+def render_dashboard(settings):
+    # Загрузка данных (в живом режиме файл читается с диска по пути)
+    live_match = None
+    if settings["live_mode"]:
+        live_path = st.text_input("Путь к CSV файлу матча", key="live_path").strip()
+        if live_path and not os.path.isfile(live_path):
+            st.info(f"Ожидание файла {live_path}")
+        elif live_path:
+            live_match = get_live_match(os.path.abspath(live_path))
+        uploaded_files = []
+    elif settings["season_mode"]:
+        uploaded_files = st.file_uploader(
+            "Загрузите CSV файлы с данными матчей сезона",
+            type=['csv', 'feather', 'arrow', 'parquet'],
+            accept_multiple_files=True
+        )
+    else:
+        uploaded_file = st.file_uploader(
+            "Загрузите CSV файл с данными матча",
+            type=['csv', 'feather', 'arrow', 'parquet']
+        )
+        uploaded_files = [uploaded_file] if uploaded_file is not None else []
     
     # Показываем подсказку, если включено
     if settings["show_help"]:
         st.info("""
-        Загрузите CSV файл с данными футбольного матча. Файл должен содержать следующие столбцы:
+        Загрузите CSV файл с данными футбольного матча (или ранее сохраненную таблицу в формате Feather/Parquet). Файл должен содержать следующие столбцы:
         - Time: Время события
-        - Match Time: Игровое время
-        - Half: Тайм (1 или 2)
+        - Match Time: Игровое время (секунды или ММ:СС)
+        - Half: Период (1 и 2 - таймы, 3 и 4 - дополнительное время)
         - Team_1: Название команды, выполняющей действие
         - Player_Name_1: Имя игрока, выполняющего действие
         - X1, Y1: Координаты начала действия
@@ -1729,19 +715,100 @@ def main():
         - Player_Name_2: Имя игрока, получающего пас
         """)
     
-    if uploaded_file is not None:
+    # Без загруженных файлов можно открыть матчи, сохраненные в базе
+    store = get_event_store() if settings["event_store"] else None
+    stored_keys = []
+    if store is not None and not uploaded_files and not settings["live_mode"]:
+        stored_keys = select_stored_matches(store, settings["season_mode"])
+    
+    if uploaded_files or stored_keys or live_match is not None:
         try:
-            # Чтение данных
-            df = pd.read_csv(uploaded_file)
-            
-            # Проверка обязательных столбцов
-            required_columns = ['Team_1', 'Player_Name_1', 'Event_Catalog']
-            if not all(col in df.columns for col in required_columns):
-                st.error("Загруженный файл не содержит необходимых столбцов для анализа")
-                return
-            
-            # Анализ данных
-            team_stats = analyze_match_data(df)
+            if live_match is not None:
+                # Читаются только строки, дописанные после прошлого обновления
+                with profile_stage("Чтение новых событий"):
+                    live_match.poll()
+                    team_stats = live_match.team_stats()
+                if live_match.n_events == 0:
+                    st.info("Ожидание событий матча")
+                    return
+                st.caption(
+                    f"Событий: {live_match.n_events}, обновлено {time.strftime('%H:%M:%S')}, "
+                    f"следующее обновление через {settings['live_interval']} с"
+                )
+                # Статистика меняется с каждым обновлением, поэтому графики не кэшируются
+                match_key = None
+                df = None
+            elif settings["season_mode"] and stored_keys:
+                # Статистика сохраненных матчей суммируется запросом к базе
+                with profile_stage("Сезонный анализ"):
+                    match_key, team_stats = get_stored_season_stats(store, stored_keys)
+                df = None
+            elif settings["season_mode"]:
+                # Сезонный режим: матчи анализируются параллельно, статистика суммируется
+                with profile_stage("Сезонный анализ"):
+                    match_key, team_stats = get_season_team_stats(
+                        [(season_file.name, season_file.getvalue()) for season_file in uploaded_files]
+                    )
+                df = None
+            else:
+                if stored_keys:
+                    # Матч из базы: события нужны только индексам по минутам и фильтру событий
+                    file_bytes = None
+                    match_key = stored_keys[0]
+                    with profile_stage("Загрузка матча из базы"):
+                        df = load_stored_match(store, match_key)
+                    columns = df.columns
+                else:
+                    uploaded_file = uploaded_files[0]
+                    
+                    # Чтение данных (повторные запуски берут разобранный файл из кэша)
+                    file_bytes = uploaded_file.getvalue()
+                    match_key = compute_content_hash(file_bytes)
+                    is_binary = uploaded_file.name.lower().endswith(BINARY_TABLE_EXTENSIONS)
+                    if settings["streaming_ingestion"] and not is_binary:
+                        # В потоковом режиме читаем только заголовок, таблица целиком не создается
+                        df = None
+                        columns = pd.read_csv(io.BytesIO(file_bytes), nrows=0).columns
+                    else:
+                        with profile_stage("Загрузка и разбор файла"):
+                            df = load_match_csv(file_bytes, match_key, uploaded_file.name)
+                        columns = df.columns
+                
+                # Проверка обязательных столбцов
+                if not all(col in columns for col in REQUIRED_COLUMNS):
+                    st.error("Загруженный файл не содержит необходимых столбцов для анализа")
+                    return
+                
+                # Сообщаем о столбцах с некорректными значениями до анализа
+                schema_problems = df.attrs.get('schema_problems', {}) if df is not None else {}
+                if schema_problems:
+                    st.warning(
+                        "Некорректные значения заменены пропусками:\n" +
+                        "\n".join(f"- {column}: {problem}" for column, problem in schema_problems.items())
+                    )
+                
+                # Матч сохраняется в базу при первой загрузке (потоковый режим таблицу не создает)
+                if store is not None and df is not None and not stored_keys:
+                    with profile_stage("Сохранение матча в базу"):
+                        store.ingest(df, match_key, uploaded_file.name)
+                
+                # Анализ данных (результат кэшируется по хэшу файла)
+                with profile_stage("Анализ матча"):
+                    team_stats = get_match_team_stats(match_key, df, file_bytes, store)
+                
+                # Отрезок матча: статистика за выбранные минуты берется из префиксных сумм
+                file_key = match_key
+                with profile_stage("Индекс по минутам"):
+                    time_index = get_match_time_index(match_key, df) if df is not None else None
+                if time_index is not None and time_index.n_minutes > 1:
+                    last_minute = time_index.n_minutes - 1
+                    start, end = st.slider(
+                        "Отрезок матча (минуты)", 0, last_minute, (0, last_minute), key="minute_window"
+                    )
+                    if (start, end) != (0, last_minute):
+                        with profile_stage("Статистика отрезка матча"):
+                            team_stats = time_index.window_stats(start, end)
+                        match_key = f"{match_key}:{start}-{end}"
             teams = list(team_stats.keys())
             
             if len(teams) == 0:
@@ -1750,6 +817,7 @@ def main():
             
             # Получаем цветовую схему
             color_scheme = get_color_scheme(settings, teams)
+            lazy = settings["lazy_rendering"]
             
             # Показываем общую информацию и счет
             st.header("Общая информация")
@@ -1761,6 +829,7 @@ def main():
                 st.write(f"Голы: {goals1}")
                 st.write(f"Удары (в створ): {team_stats[teams[0]].get('shots', 0)} ({team_stats[teams[0]].get('shots_on_target', 0)})")
                 st.write(f"Точность пасов: {team_stats[teams[0]].get('pass_accuracy', 0)}%")
+                st.write(f"Владение мячом: {team_stats[teams[0]].get('possession_percentage', 0)}% (цепочек: {team_stats[teams[0]].get('possession_chains', 0)}, в среднем {team_stats[teams[0]].get('avg_chain_length', 0)} событий)")
                 st.write(f"Угловые: {team_stats[teams[0]].get('corners', 0)}")
             
             if len(teams) > 1:
@@ -1770,6 +839,7 @@ def main():
                     st.write(f"Голы: {goals2}")
                     st.write(f"Удары (в створ): {team_stats[teams[1]].get('shots', 0)} ({team_stats[teams[1]].get('shots_on_target', 0)})")
                     st.write(f"Точность пасов: {team_stats[teams[1]].get('pass_accuracy', 0)}%")
+                    st.write(f"Владение мячом: {team_stats[teams[1]].get('possession_percentage', 0)}% (цепочек: {team_stats[teams[1]].get('possession_chains', 0)}, в среднем {team_stats[teams[1]].get('avg_chain_length', 0)} событий)")
                     st.write(f"Угловые: {team_stats[teams[1]].get('corners', 0)}")
             
             # Отображаем счет крупно
@@ -1780,18 +850,20 @@ def main():
             st.header("Визуализация данных")
             
             # График основной статистики команд
-            st.plotly_chart(create_team_stats_chart(team_stats, color_scheme, settings["chart_height"]), use_container_width=True)
+            show_chart(get_cached_figure(match_key, create_team_stats_chart, team_stats, color_scheme, settings["chart_height"]), use_container_width=True)
             
             # График статистики пасов
-            st.plotly_chart(create_pass_stats_chart(team_stats, color_scheme, settings["chart_height"]), use_container_width=True)
+            show_chart(get_cached_figure(match_key, create_pass_stats_chart, team_stats, color_scheme, settings["chart_height"]), use_container_width=True)
             
             # График сравнения статистики по таймам
-            st.plotly_chart(create_half_comparison_chart(team_stats, color_scheme, settings["chart_height"]), use_container_width=True)
+            show_chart(get_cached_figure(match_key, create_half_comparison_chart, team_stats, color_scheme, settings["chart_height"]), use_container_width=True)
+            
+            # График итогов цепочек владения
+            show_chart(get_cached_figure(match_key, create_possession_chains_chart, team_stats, color_scheme, settings["chart_height"]), use_container_width=True)
             
             # Раздел с расширенным анализом
-            if settings["show_event_categories"]:
-                st.header("Анализ категорий событий")
-                st.plotly_chart(create_events_category_chart(team_stats, color_scheme, settings["chart_height"]), use_container_width=True)
+            if settings["show_event_categories"] and open_section("Анализ категорий событий", "events", lazy):
+                show_chart(get_cached_figure(match_key, create_events_category_chart, team_stats, color_scheme, settings["chart_height"]), use_container_width=True)
                 
                 # Выбор команды и категории для анализа
                 event_team = st.selectbox("Выберите команду для анализа типов событий", teams)
@@ -1800,29 +872,27 @@ def main():
                 if event_categories:
                     event_category = st.selectbox("Выберите категорию события", event_categories)
                     
-                    st.plotly_chart(
-                        create_event_types_chart(
-                            team_stats, event_team, event_category,
+                    show_chart(
+                        get_cached_figure(
+                            match_key, create_event_types_chart, team_stats, event_team, event_category,
                             color_scheme['team1'] if event_team == teams[0] else color_scheme['team2'],
                             settings["chart_height"]
                         ),
                         use_container_width=True
                     )
             
-            if settings["show_foot_analysis"]:
-                st.header("Анализ использования ног")
-                st.plotly_chart(create_foot_usage_chart(team_stats, color_scheme, settings["chart_height"]), use_container_width=True)
+            if settings["show_foot_analysis"] and open_section("Анализ использования ног", "foot", lazy):
+                show_chart(get_cached_figure(match_key, create_foot_usage_chart, team_stats, color_scheme, settings["chart_height"]), use_container_width=True)
                 
                 if len(teams) > 0:
-                    foot_team_tabs = st.tabs(teams)
-                    for i, team in enumerate(teams):
-                        with foot_team_tabs[i]:
+                    for i, team, team_tab in team_sections(teams, "foot", lazy):
+                        with team_tab:
                             col1, col2 = st.columns(2)
                             
                             with col1:
-                                st.plotly_chart(
-                                    create_foot_by_event_chart(
-                                        team_stats, team,
+                                show_chart(
+                                    get_cached_figure(
+                                        match_key, create_foot_by_event_chart, team_stats, team,
                                         color_scheme['team1'] if i == 0 else color_scheme['team2'],
                                         settings["chart_height"]
                                     ),
@@ -1830,44 +900,40 @@ def main():
                                 )
                             
                             with col2:
-                                st.plotly_chart(
-                                    create_player_foot_usage_chart(
-                                        team_stats, team,
+                                show_chart(
+                                    get_cached_figure(
+                                        match_key, create_player_foot_usage_chart, team_stats, team,
                                         color_scheme['team1'] if i == 0 else color_scheme['team2'],
                                         settings["chart_height"]
                                     ),
                                     use_container_width=True
                                 )
             
-            if settings["show_pressure_analysis"]:
-                st.header("Анализ действий под давлением")
+            if settings["show_pressure_analysis"] and open_section("Анализ действий под давлением", "pressure", lazy):
                 
                 if len(teams) > 0:
-                    pressure_team_tabs = st.tabs(teams)
-                    for i, team in enumerate(teams):
-                        with pressure_team_tabs[i]:
-                            st.plotly_chart(
-                                create_pressure_results_chart(
-                                    team_stats, team,
+                    for i, team, team_tab in team_sections(teams, "pressure", lazy):
+                        with team_tab:
+                            show_chart(
+                                get_cached_figure(
+                                    match_key, create_pressure_results_chart, team_stats, team,
                                     color_scheme['team1'] if i == 0 else color_scheme['team2'],
                                     settings["chart_height"]
                                 ),
                                 use_container_width=True
                             )
             
-            if settings["show_goalkeeper_analysis"]:
-                st.header("Анализ действий вратарей")
+            if settings["show_goalkeeper_analysis"] and open_section("Анализ действий вратарей", "goalkeeper", lazy):
                 
                 if len(teams) > 0:
-                    gk_team_tabs = st.tabs(teams)
-                    for i, team in enumerate(teams):
-                        with gk_team_tabs[i]:
+                    for i, team, team_tab in team_sections(teams, "goalkeeper", lazy):
+                        with team_tab:
                             col1, col2 = st.columns(2)
                             
                             with col1:
-                                st.plotly_chart(
-                                    create_goalkeeper_actions_chart(
-                                        team_stats, team,
+                                show_chart(
+                                    get_cached_figure(
+                                        match_key, create_goalkeeper_actions_chart, team_stats, team,
                                         color_scheme['team1'] if i == 0 else color_scheme['team2'],
                                         settings["chart_height"]
                                     ),
@@ -1875,140 +941,167 @@ def main():
                                 )
                             
                             with col2:
-                                st.plotly_chart(
-                                    create_save_types_chart(
-                                        team_stats, team,
+                                show_chart(
+                                    get_cached_figure(
+                                        match_key, create_save_types_chart, team_stats, team,
                                         color_scheme['team1'] if i == 0 else color_scheme['team2'],
                                         settings["chart_height"]
                                     ),
                                     use_container_width=True
                                 )
             
-            if settings["show_pass_network"]:
-                st.header("Сеть передач между игроками")
+            if settings["show_pass_network"] and open_section("Сеть передач между игроками", "network", lazy):
                 
                 if len(teams) > 0:
-                    network_team_tabs = st.tabs(teams)
-                    for i, team in enumerate(teams):
-                        with network_team_tabs[i]:
+                    for i, team, team_tab in team_sections(teams, "network", lazy):
+                        with team_tab:
                             min_passes = st.slider(
                                 "Минимальное количество пасов для отображения связи", 
                                 1, 10, 2, 
                                 key=f"min_passes_{team}"
                             )
                             
-                            st.plotly_chart(
-                                create_pass_network_chart(
-                                    team_stats, team,
+                            show_chart(
+                                get_cached_figure(
+                                    match_key, create_pass_network_chart, team_stats, team,
                                     color_scheme['team1'] if i == 0 else color_scheme['team2'],
                                     settings["chart_height"] + 100,
                                     min_passes
                                 ),
                                 use_container_width=True
                             )
+                            
+                            # Центральность игроков в той же сети
+                            network_metrics = PassNetwork.from_team_stats(team_stats[team], min_passes).metrics()
+                            if not network_metrics.empty:
+                                st.dataframe(
+                                    network_metrics.sort_values('pagerank', ascending=False)
+                                    .rename(columns=PASS_NETWORK_COLUMN_NAMES)
+                                    .round({'Средний X': 1, 'Средний Y': 1, 'PageRank': 3, 'Посредничество': 3}),
+                                    hide_index=True,
+                                    use_container_width=True
+                                )
             
-            # Детальная статистика для каждой команды в отдельных вкладках
-            st.header("Детальная статистика команд")
+            # Фильтр событий по инвертированному индексу (нужна таблица событий матча)
+            if df is not None and open_section("Фильтр событий", "event_filter", lazy):
+                with profile_stage("Индекс событий"):
+                    event_index = get_match_event_index(file_key, df)
+                display_event_filter(event_index, color_scheme, settings["chart_height"])
             
-            team_tabs = st.tabs(teams)
-            for i, team in enumerate(teams):
-                with team_tabs[i]:
-                    col1, col2 = st.columns(2)
-                    
-                    with col1:
-                        st.plotly_chart(
-                            create_shot_types_chart(
-                                team_stats, team, 
-                                color_scheme['team1'] if i == 0 else color_scheme['team2'],
-                                settings["chart_height"]
-                            ),
-                            use_container_width=True
-                        )
-                    
-                    with col2:
-                        st.plotly_chart(
-                            create_shot_outcomes_chart(
-                                team_stats, team, 
+            # Разбивка событий - срезы куба событий матча (нужна таблица событий матча)
+            if df is not None and open_section("Разбивка событий", "breakdown", lazy):
+                with profile_stage("Куб событий"):
+                    cube = get_match_cube(file_key, df)
+                display_event_breakdown(cube, teams, color_scheme, settings["chart_height"])
+            
+            # Детальная статистика для каждой команды в отдельных вкладках
+            if open_section("Детальная статистика команд", "details", lazy):
+                
+                for i, team, team_tab in team_sections(teams, "details", lazy):
+                    with team_tab:
+                        col1, col2 = st.columns(2)
+                        
+                        with col1:
+                            show_chart(
+                                get_cached_figure(
+                                    match_key, create_shot_types_chart, team_stats, team, 
+                                    color_scheme['team1'] if i == 0 else color_scheme['team2'],
+                                    settings["chart_height"]
+                                ),
+                                use_container_width=True
+                            )
+                        
+                        with col2:
+                            show_chart(
+                                get_cached_figure(
+                                    match_key, create_shot_outcomes_chart, team_stats, team, 
+                                    color_scheme['team1'] if i == 0 else color_scheme['team2'],
+                                    settings["chart_height"]
+                                ),
+                                use_container_width=True
+                            )
+                        
+                        # Тепловые карты
+                        col1, col2 = st.columns(2)
+                        
+                        with col1:
+                            show_chart(
+                                get_cached_figure(
+                                    match_key, create_pass_heatmap, team_stats, team, 
+                                    color_scheme['team1'] if i == 0 else color_scheme['team2'],
+                                    settings["chart_height"],
+                                    settings["heatmap_resolution"],
+                                    settings["heatmap_smoothing"]
+                                ),
+                                use_container_width=True
+                            )
+                        
+                        with col2:
+                            show_chart(
+                                get_cached_figure(
+                                    match_key, create_shot_heatmap, team_stats, team, 
+                                    color_scheme['team1'] if i == 0 else color_scheme['team2'],
+                                    settings["chart_height"]
+                                ),
+                                use_container_width=True
+                            )
+                        
+                        # Пасы по зонам выбранной схемы
+                        show_chart(
+                            get_cached_figure(
+                                match_key, create_pass_zones_chart, team_stats, team,
                                 color_scheme['team1'] if i == 0 else color_scheme['team2'],
-                                settings["chart_height"]
+                                settings["chart_height"],
+                                settings["zone_layout"]
                             ),
                             use_container_width=True
                         )
                     
-                    # Тепловые карты
-                    col1, col2 = st.columns(2)
-                    
-                    with col1:
-                        st.plotly_chart(
-                            create_pass_heatmap(
-                                team_stats, team, 
-                                color_scheme['team1'] if i == 0 else color_scheme['team2'],
-                                settings["chart_height"]
-                            ),
-                            use_container_width=True
+                        # Статистика игроков
+                        st.subheader("Статистика игроков")
+                        
+                        stat_category = st.selectbox(
+                            "Выберите показатель для анализа игроков",
+                            ["goals", "shots", "passes", "pass_accuracy", "tackles", "interceptions", "goal_conversion"],
+                            format_func=lambda x: {
+                                "goals": "Голы",
+                                "shots": "Удары",
+                                "passes": "Пасы",
+                                "pass_accuracy": "Точность пасов (%)",
+                                "tackles": "Отборы",
+                                "interceptions": "Перехваты",
+                                "goal_conversion": "Конверсия ударов в голы (%)"
+                            }.get(x, x),
+                            key=f"stat_select_{team}"
                         )
-                    
-                    with col2:
-                        st.plotly_chart(
-                            create_shot_heatmap(
-                                team_stats, team, 
+                        
+                        show_chart(
+                            get_cached_figure(
+                                match_key, create_player_stats_chart, team_stats, team, 
+                                stat_category,
                                 color_scheme['team1'] if i == 0 else color_scheme['team2'],
                                 settings["chart_height"]
                             ),
                             use_container_width=True
                         )
-                    
-                    # Статистика игроков
-                    st.subheader("Статистика игроков")
-                    
-                    stat_category = st.selectbox(
-                        "Выберите показатель для анализа игроков",
-                        ["goals", "shots", "passes", "pass_accuracy", "tackles", "interceptions", "goal_conversion"],
-                        format_func=lambda x: {
-                            "goals": "Голы",
-                            "shots": "Удары",
-                            "passes": "Пасы",
-                            "pass_accuracy": "Точность пасов (%)",
-                            "tackles": "Отборы",
-                            "interceptions": "Перехваты",
-                            "goal_conversion": "Конверсия ударов в голы (%)"
-                        }.get(x, x),
-                        key=f"stat_select_{team}"
-                    )
-                    
-                    st.plotly_chart(
-                        create_player_stats_chart(
-                            team_stats, team, 
-                            stat_category,
-                            color_scheme['team1'] if i == 0 else color_scheme['team2'],
-                            settings["chart_height"]
-                        ),
-                        use_container_width=True
-                    )
             
             # Аналитические выводы
-            st.header("Аналитические выводы")
+            if open_section("Аналитические выводы", "insights", lazy):
+                
+                # Выводы всех команд за один проход по таблице правил
+                match_insights = get_match_insights(match_key, team_stats, settings["analysis_detail"])
+                
+                for i, team, team_tab in team_sections(teams, "insights", lazy):
+                    with team_tab:
+                        display_team_insights(match_insights[team], settings["analysis_detail"])
             
-            team_insight_tabs = st.tabs(teams)
-            for i, team in enumerate(teams):
-                with team_insight_tabs[i]:
-                    # Генерируем выводы
-                    opponent = teams[1-i] if len(teams) > 1 and i < len(teams) - 1 else None
-                    opponent_stats = team_stats[opponent] if opponent else None
-                    
-                    insights = generate_team_insights(
-                        team_stats[team], 
-                        opponent_stats, 
-                        settings["analysis_detail"]
-                    )
-                    
-                    # Отображаем выводы
-                    display_team_insights(insights, settings["analysis_detail"])
-        
         except Exception as e:
             st.error(f"Произошла ошибка при анализе данных: {str(e)}")
             st.exception(e)
 
-# Запуск приложения
+# Запуск приложения (python football.py report|ingest ... - пакетный режим без интерфейса,
+# см. football_cli.py, который запускается и без streamlit)
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] in CLI_COMMANDS:
+        sys.exit(run_cli(sys.argv[1:]))
     main()
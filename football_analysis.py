@@ -0,0 +1,2840 @@
+"""
+Ядро анализа футбольных матчей без интерфейса: чтение таблиц событий,
+агрегация статистики команд, цепочки владения, зоны поля, индексы
+по минутам и событиям, аналитические выводы.
+
+Модуль импортирует только pandas и NumPy (pyarrow - по требованию),
+поэтому его можно быстро загружать в процессах пула, тестах и других сервисах.
+"""
+import pandas as pd
+import numpy as np
+from collections import defaultdict, OrderedDict
+import io
+import os
+import sys
+import json
+import hashlib
+import threading
+import bisect
+import pickle
+import zlib
+import math
+import heapq
+import string
+import sqlite3
+
+# Каталог бинарного (Feather) кэша разобранных матчей
+MATCH_STORE_DIR = os.environ.get(
+    "FOOTBALL_MATCH_STORE", os.path.join(os.path.expanduser("~"), ".cache", "football_matches")
+)
+
+# Расширения бинарных файлов с уже разобранной таблицей событий
+BINARY_TABLE_EXTENSIONS = ('.feather', '.arrow', '.parquet')
+
+# Количество строк в одной части при потоковом чтении CSV
+STREAM_CHUNK_ROWS = 50_000
+
+# Столбцы, без которых анализ невозможен
+REQUIRED_COLUMNS = ['Team_1', 'Player_Name_1', 'Event_Catalog']
+
+# Схема столбцов CSV, используемых анализом: столбец -> тип данных.
+# Остальные столбцы при загрузке отбрасываются; None - тип определяет pandas.
+EVENT_SCHEMA = {
+    'Time': None,
+    'Match Time': None,
+    'Half': 'Int8',
+    'Team_1': 'category',
+    'Player_Name_1': 'category',
+    'Player_Name_2': 'category',
+    'X1': 'float32',
+    'Y1': 'float32',
+    'X2': 'float32',
+    'Y2': 'float32',
+    'Event_Catalog': 'category',
+    'Type': 'category',
+    'Type_Shots': 'category',
+    'Shot_Location': 'category',
+    'Results': 'category',
+    'Pass_Outcome': 'category',
+    'Pressure': 'category',
+    'Foot_Used': 'category',
+    'GK_Action': 'category',
+    'Save_Type': 'category',
+}
+
+# LRU-кэш с вытеснением по размеру записей
+class LRUCache:
+    """
+    Потокобезопасный LRU-кэш. Каждая запись хранится вместе с оценкой ее размера;
+    при превышении max_size вытесняются давно не использованные записи.
+    """
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.total_size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    def __contains__(self, key):
+        return key in self._entries
+    
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._entries:
+                return default
+            self._entries.move_to_end(key)
+            return self._entries[key][0]
+    
+    def put(self, key, value, size):
+        with self._lock:
+            if key in self._entries:
+                self.total_size -= self._entries.pop(key)[1]
+            # Запись больше всего кэша не сохраняем, чтобы не вытеснить все остальное
+            if size > self.max_size:
+                return
+            self._entries[key] = (value, size)
+            self.total_size += size
+            while self.total_size > self.max_size:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.total_size -= evicted_size
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.total_size = 0
+
+# Функция для оценки размера объекта в памяти
+def estimate_size(obj):
+    """
+    Приблизительно оценивает размер объекта в байтах (DataFrame, вложенные словари, списки).
+    """
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        return int(obj.memory_usage(deep=True).sum())
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(estimate_size(k) + estimate_size(v) for k, v in obj.items())
+    if isinstance(obj, (list, tuple, set)):
+        return sys.getsizeof(obj) + sum(estimate_size(item) for item in obj)
+    return sys.getsizeof(obj)
+
+# Функция для вычисления хэша содержимого файла
+def compute_content_hash(file_bytes):
+    """
+    Возвращает хэш содержимого загруженного файла, используемый как ключ кэша.
+    """
+    return hashlib.blake2b(file_bytes, digest_size=16).hexdigest()
+
+# Функция для чтения CSV матча по схеме
+def read_match_csv(source, chunksize=None):
+    """
+    Читает CSV с событиями, загружая только столбцы из EVENT_SCHEMA.
+    Текстовые столбцы читаются как категории, координаты - как float32, тайм - как Int8.
+    Найденные проблемы со значениями сохраняются в df.attrs['schema_problems'].
+    
+    Args:
+        source: Путь к файлу или файловый объект с CSV
+        chunksize: Если задан, возвращается итератор по частям таблицы
+    """
+    reader = pd.read_csv(
+        source,
+        usecols=lambda column: column in EVENT_SCHEMA,
+        dtype={column: dtype for column, dtype in EVENT_SCHEMA.items() if dtype == 'category'},
+        chunksize=chunksize
+    )
+    if chunksize is None:
+        return apply_event_schema(reader)
+    return (apply_event_schema(chunk) for chunk in reader)
+
+# Функция для приведения числовых столбцов к типам схемы
+def apply_event_schema(df):
+    """
+    Приводит числовые столбцы к типам EVENT_SCHEMA и добавляет столбцы зон поля.
+    Значения, которые не удалось преобразовать, заменяются пропусками
+    и перечисляются в df.attrs['schema_problems'].
+    """
+    problems = {}
+    for column, dtype in EVENT_SCHEMA.items():
+        if column not in df.columns or dtype in (None, 'category'):
+            continue
+        values = pd.to_numeric(df[column], errors='coerce')
+        invalid = values.isna() & df[column].notna()
+        if dtype == 'Int8':
+            fractional = values.notna() & (values % 1 != 0)
+            invalid |= fractional
+            values = values.mask(fractional)
+        if invalid.any():
+            problems[column] = f"{int(invalid.sum())} некорректных значений (например, {df.loc[invalid, column].iloc[0]!r})"
+        df[column] = values.astype(dtype)
+    df.attrs['schema_problems'] = problems
+    
+    # Зоны поля рассчитываются один раз при загрузке
+    return add_zone_columns(df)
+
+# Функция для приведения загруженной бинарной таблицы к схеме
+def prepare_event_table(df):
+    """
+    Отбрасывает лишние столбцы и приводит типы таблицы событий, прочитанной
+    не из CSV (Feather/Parquet), к EVENT_SCHEMA.
+    """
+    df = df[[column for column in df.columns if column in EVENT_SCHEMA]].copy()
+    for column in df.columns:
+        if EVENT_SCHEMA[column] == 'category' and not isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = df[column].astype('category')
+    return apply_event_schema(df)
+
+# Функция для отложенного импорта pyarrow
+def _import_pyarrow():
+    """
+    Возвращает модули (pyarrow, pyarrow.feather) или (None, None), если pyarrow не установлен.
+    Импорт выполняется при первом обращении, чтобы не замедлять загрузку модуля.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.feather as feather
+    except ImportError:  # Без pyarrow бинарный кэш матчей отключается
+        return None, None
+    return pa, feather
+
+# Функция для чтения бинарной таблицы событий
+def read_match_table(source, file_name):
+    """
+    Читает таблицу событий из Feather/Arrow или Parquet файла.
+    """
+    if file_name.lower().endswith('.parquet'):
+        return prepare_event_table(pd.read_parquet(source))
+    pa, feather = _import_pyarrow()
+    if feather is None:
+        raise ValueError("Для чтения файлов Feather/Arrow требуется pyarrow")
+    return prepare_event_table(feather.read_table(source).to_pandas())
+
+# Функция для получения пути к бинарной копии матча
+def get_match_store_path(match_key):
+    return os.path.join(MATCH_STORE_DIR, f"{match_key}.feather")
+
+# Функция для сохранения разобранного матча в бинарный кэш
+def save_match_table(df, match_key):
+    """
+    Сохраняет типизированную таблицу событий в Feather-файл, ключ - хэш исходного файла.
+    Запись идет во временный файл с последующим переименованием, чтобы параллельные
+    сессии не прочитали недописанный файл.
+    """
+    pa, feather = _import_pyarrow()
+    if pa is None:
+        return
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[b'schema_problems'] = json.dumps(df.attrs.get('schema_problems', {})).encode('utf-8')
+    table = table.replace_schema_metadata(metadata)
+    
+    os.makedirs(MATCH_STORE_DIR, exist_ok=True)
+    path = get_match_store_path(match_key)
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    feather.write_feather(table, temp_path)
+    os.replace(temp_path, path)
+
+# Функция для чтения матча из бинарного кэша
+def load_match_table(match_key):
+    """
+    Читает ранее сохраненную таблицу матча через отображение файла в память.
+    Возвращает None, если копии нет или pyarrow недоступен.
+    """
+    path = get_match_store_path(match_key)
+    if not os.path.exists(path):
+        return None
+    pa, feather = _import_pyarrow()
+    if pa is None:
+        return None
+    table = feather.read_table(path, memory_map=True)
+    df = table.to_pandas()
+    problems = (table.schema.metadata or {}).get(b'schema_problems')
+    df.attrs['schema_problems'] = json.loads(problems) if problems else {}
+    return df
+
+# Функция для анализа одного файла матча в отдельном процессе
+def analyze_match_file(file_name, file_bytes):
+    """
+    Читает и анализирует один файл матча. Возвращает MatchStats со счетчиками
+    без процентов, пригодный для передачи между процессами.
+    """
+    if file_name.lower().endswith(BINARY_TABLE_EXTENSIONS):
+        df = read_match_table(io.BytesIO(file_bytes), file_name)
+    else:
+        df = read_match_csv(io.BytesIO(file_bytes))
+    missing = [column for column in REQUIRED_COLUMNS if column not in df.columns]
+    if missing:
+        raise ValueError(f"Файл {file_name} не содержит столбцов: {', '.join(missing)}")
+    return MatchStats.from_events(df)
+
+# Функция для создания пустой статистики периода матча
+def new_half_stats():
+    """
+    Возвращает нулевые счетчики одного периода (тайма или дополнительного времени).
+    """
+    return {
+        'shots': 0,
+        'goals': 0,
+        'passes': 0,
+        'successful_passes': 0,
+        'possession_time': 0
+    }
+
+# Функция для создания пустых сумм координат игрока
+def new_player_position():
+    """
+    Возвращает нулевые суммы координат X1/Y1 и число событий с координатами.
+    Средняя позиция игрока - x_sum / events, y_sum / events.
+    """
+    return {'x_sum': 0.0, 'y_sum': 0.0, 'events': 0}
+
+# Функция для создания пустой структуры статистики команд
+def init_team_stats(teams):
+    """
+    Создает словарь статистики с нулевыми счетчиками для каждой команды.
+    """
+    # Инициализируем словарь для статистики
+    team_stats = {team: {} for team in teams}
+    
+    # Основные счетчики для общей статистики
+    for team in teams:
+        team_stats[team]['shots'] = 0
+        team_stats[team]['shots_on_target'] = 0
+        team_stats[team]['shots_off_target'] = 0
+        team_stats[team]['blocked_shots'] = 0
+        team_stats[team]['goals'] = 0
+        team_stats[team]['passes'] = 0
+        team_stats[team]['successful_passes'] = 0
+        team_stats[team]['crosses'] = 0
+        team_stats[team]['successful_crosses'] = 0
+        team_stats[team]['tackles'] = 0
+        team_stats[team]['successful_tackles'] = 0
+        team_stats[team]['interceptions'] = 0
+        team_stats[team]['fouls'] = 0
+        team_stats[team]['corners'] = 0
+        team_stats[team]['offsides'] = 0
+        team_stats[team]['possession_time'] = 0
+        team_stats[team]['possession_chains'] = 0
+        team_stats[team]['chain_events'] = 0
+        team_stats[team]['chain_outcomes'] = defaultdict(int)
+        team_stats[team]['player_stats'] = {}
+        team_stats[team]['player_positions'] = defaultdict(new_player_position)
+        team_stats[team]['pass_zones'] = defaultdict(int)
+        team_stats[team]['pass_end_bins'] = defaultdict(int)
+        team_stats[team]['layout_pass_zones'] = defaultdict(lambda: defaultdict(int))
+        team_stats[team]['shot_points'] = {'x': [], 'y': [], 'result': [], 'player': []}
+        team_stats[team]['shot_locations'] = defaultdict(int)
+        team_stats[team]['shot_types'] = defaultdict(int)
+        team_stats[team]['pressure_stats'] = {'under_pressure': 0, 'no_pressure': 0}
+        # Периоды 3 и далее (дополнительное время) добавляются по мере появления
+        team_stats[team]['half_stats'] = defaultdict(new_half_stats)
+        
+        # Добавляем новые счетчики для расширенного анализа
+        team_stats[team]['event_categories'] = defaultdict(int)
+        team_stats[team]['event_types'] = defaultdict(lambda: defaultdict(int))
+        team_stats[team]['foot_used'] = defaultdict(int)
+        team_stats[team]['foot_by_event'] = defaultdict(lambda: defaultdict(int))
+        team_stats[team]['player_foot_usage'] = defaultdict(lambda: defaultdict(int))
+        team_stats[team]['gk_actions'] = defaultdict(int)
+        team_stats[team]['save_types'] = defaultdict(int)
+        team_stats[team]['pass_combinations'] = defaultdict(lambda: defaultdict(int))
+        team_stats[team]['pressure_results'] = defaultdict(lambda: defaultdict(int))
+        
+        # Инициализируем статистику по таймам
+        for half in [1, 2]:
+            team_stats[team]['half_stats'][half] = new_half_stats()
+    
+    return team_stats
+
+# Функция для расчета процентов и соотношений
+def finalize_team_stats(team_stats):
+    """
+    Рассчитывает производные показатели (точность, конверсию) по накопленным счетчикам.
+    """
+    teams = list(team_stats.keys())
+    
+    for team in teams:
+        # Точность ударов
+        if team_stats[team]['shots'] > 0:
+            team_stats[team]['shot_accuracy'] = round(
+                team_stats[team]['shots_on_target'] / team_stats[team]['shots'] * 100, 1
+            )
+        else:
+            team_stats[team]['shot_accuracy'] = 0
+        
+        # Точность пасов
+        if team_stats[team]['passes'] > 0:
+            team_stats[team]['pass_accuracy'] = round(
+                team_stats[team]['successful_passes'] / team_stats[team]['passes'] * 100, 1
+            )
+        else:
+            team_stats[team]['pass_accuracy'] = 0
+        
+        # Точность кроссов
+        if team_stats[team]['crosses'] > 0:
+            team_stats[team]['cross_accuracy'] = round(
+                team_stats[team]['successful_crosses'] / team_stats[team]['crosses'] * 100, 1
+            )
+        else:
+            team_stats[team]['cross_accuracy'] = 0
+        
+        # Точность отборов
+        if team_stats[team]['tackles'] > 0:
+            team_stats[team]['tackle_success'] = round(
+                team_stats[team]['successful_tackles'] / team_stats[team]['tackles'] * 100, 1
+            )
+        else:
+            team_stats[team]['tackle_success'] = 0
+        
+        # Статистика под давлением
+        total_pressure_events = (team_stats[team]['pressure_stats']['under_pressure'] + 
+                               team_stats[team]['pressure_stats']['no_pressure'])
+        if total_pressure_events > 0:
+            team_stats[team]['pressure_percentage'] = round(
+                team_stats[team]['pressure_stats']['under_pressure'] / total_pressure_events * 100, 1
+            )
+        else:
+            team_stats[team]['pressure_percentage'] = 0
+        
+        # Средняя длина цепочки владения (в событиях)
+        if team_stats[team]['possession_chains'] > 0:
+            team_stats[team]['avg_chain_length'] = round(
+                team_stats[team]['chain_events'] / team_stats[team]['possession_chains'], 1
+            )
+        else:
+            team_stats[team]['avg_chain_length'] = 0
+            
+        # Расчет статистики для игроков
+        for player in team_stats[team]['player_stats']:
+            player_stats = team_stats[team]['player_stats'][player]
+            
+            # Точность пасов игроков
+            if player_stats['passes'] > 0:
+                player_stats['pass_accuracy'] = round(
+                    player_stats['successful_passes'] / player_stats['passes'] * 100, 1
+                )
+            else:
+                player_stats['pass_accuracy'] = 0
+                
+            # Эффективность ударов игроков
+            if player_stats['shots'] > 0:
+                player_stats['goal_conversion'] = round(
+                    player_stats['goals'] / player_stats['shots'] * 100, 1
+                )
+            else:
+                player_stats['goal_conversion'] = 0
+    
+    # Доля владения мячом среди всех команд
+    total_possession = sum(team_stats[team]['possession_time'] for team in teams)
+    for team in teams:
+        if total_possession > 0:
+            team_stats[team]['possession_percentage'] = round(
+                team_stats[team]['possession_time'] / total_possession * 100, 1
+            )
+        else:
+            team_stats[team]['possession_percentage'] = 0
+    
+    return team_stats
+
+# Производные показатели: не суммируются при объединении, а пересчитываются
+DERIVED_STATS = {
+    'shot_accuracy', 'pass_accuracy', 'cross_accuracy', 'tackle_success',
+    'pressure_percentage', 'goal_conversion', 'avg_chain_length', 'possession_percentage'
+}
+
+# Функция для объединения статистики нескольких матчей
+def merge_team_stats(target, source):
+    """
+    Добавляет счетчики source в target. Производные проценты не суммируются:
+    после объединения их нужно пересчитать через finalize_team_stats.
+    """
+    for team, stats in source.items():
+        if team not in target:
+            target.update(init_team_stats([team]))
+        _merge_counters(target[team], stats)
+    return target
+
+# Вспомогательная функция: рекурсивное сложение вложенных счетчиков
+def _merge_counters(target, source):
+    for key, value in source.items():
+        if key in DERIVED_STATS:
+            continue
+        if isinstance(value, dict):
+            # defaultdict сам создаст вложенный счетчик нужного типа
+            nested = target[key] if isinstance(target, defaultdict) else target.setdefault(key, {})
+            _merge_counters(nested, value)
+        elif isinstance(value, list):
+            # Списки (координаты ударов) объединяются конкатенацией
+            target[key] = target.get(key, []) + value
+        else:
+            target[key] = target.get(key, 0) + value
+
+# Функция для преобразования статистики в обычные словари
+def to_plain_stats(stats):
+    """
+    Рекурсивно заменяет defaultdict на dict, чтобы статистику можно было
+    передать между процессами (pickle не поддерживает lambda-фабрики).
+    """
+    if isinstance(stats, dict):
+        return {key: to_plain_stats(value) for key, value in stats.items()}
+    if isinstance(stats, list):
+        return list(stats)
+    return stats
+
+# Объединяемая статистика матчей (моноид: пустой объект + ассоциативное объединение)
+class MatchStats:
+    """
+    Накопленные счетчики team_stats без производных процентов, хранящиеся
+    в обычных словарях. Объекты можно объединять (merge), передавать между
+    процессами и сохранять в компактном бинарном виде; проценты рассчитываются
+    отдельно при вызове finalize.
+    """
+    __slots__ = ('counts',)
+    
+    def __init__(self, counts=None):
+        self.counts = counts if counts is not None else {}
+    
+    @classmethod
+    def from_events(cls, df):
+        """
+        Строит счетчики по таблице событий (векторным движком).
+        """
+        return cls(to_plain_stats(accumulate_match_data({}, df)))
+    
+    @classmethod
+    def from_team_stats(cls, team_stats):
+        """
+        Извлекает счетчики из уже рассчитанной team_stats (проценты отбрасываются).
+        """
+        return cls().merge(cls(team_stats))
+    
+    def merge(self, other):
+        """
+        Возвращает новый объект с суммой счетчиков; исходные объекты не изменяются.
+        """
+        counts = to_plain_stats(self.counts)
+        _merge_counters(counts, other.counts)
+        return MatchStats(counts)
+    
+    def update(self, other):
+        """
+        Добавляет счетчики other к текущему объекту на месте.
+        """
+        _merge_counters(self.counts, other.counts)
+        return self
+    
+    def finalize(self):
+        """
+        Возвращает team_stats в формате analyze_match_data с рассчитанными процентами.
+        """
+        return finalize_team_stats(merge_team_stats({}, self.counts))
+    
+    def to_bytes(self):
+        """
+        Сериализует счетчики в сжатый бинарный вид (pickle + zlib).
+        Предназначено для локальных кэшей: не загружайте данные из недоверенных источников.
+        """
+        return zlib.compress(pickle.dumps(self.counts, protocol=pickle.HIGHEST_PROTOCOL))
+    
+    @classmethod
+    def from_bytes(cls, data):
+        return cls(pickle.loads(zlib.decompress(data)))
+    
+    def __eq__(self, other):
+        return isinstance(other, MatchStats) and self.counts == other.counts
+    
+    def __repr__(self):
+        return f"MatchStats(teams={list(self.counts)})"
+
+# Функция для анализа данных футбольного матча
+def analyze_match_data(df, engine="vectorized", cube=None):
+    """
+    Анализирует данные футбольного матча из CSV и возвращает статистику для обеих команд.
+    
+    Args:
+        df: DataFrame с событиями матча
+        engine: Движок агрегации ("vectorized" - векторный, "loop" - эталонный построчный)
+        cube: Готовый EventCube матча для векторного движка (например, из кэша)
+    """
+    if engine == "loop":
+        return analyze_match_data_loop(df)
+    if engine == "vectorized":
+        return analyze_match_data_vectorized(df, cube)
+    raise ValueError(f"Неизвестный движок анализа: {engine}")
+
+# Эталонный построчный анализ (исходная реализация через iterrows)
+def analyze_match_data_loop(df):
+    """
+    Анализирует данные матча, обходя события по одной строке.
+    Используется как эталон для проверки векторного движка.
+    """
+    # Определяем команды
+    teams = list(df['Team_1'].unique())
+    
+    # Инициализируем словарь для статистики
+    team_stats = init_team_stats(teams)
+    
+    # Пустые необязательные ячейки считаем пустой строкой, как векторный движок
+    df = df.assign(**{
+        column: _text_column(df, column) for column in OPTIONAL_TEXT_COLUMNS if column in df.columns
+    })
+    
+    # Анализируем каждое событие
+    for _, row in df.iterrows():
+        team = row['Team_1']
+        event = row['Event_Catalog']
+        event_type = row.get('Type', '')
+        match_half = row.get('Half', 1)  # По умолчанию первый тайм, если нет данных
+        
+        # Статистика периода; события с неизвестным периодом в ней не учитываются
+        if pd.notna(match_half):
+            half_stats = team_stats[team]['half_stats'][int(match_half)]
+        else:
+            half_stats = new_half_stats()
+        
+        # Обновляем счетчик категорий событий
+        team_stats[team]['event_categories'][event] += 1
+        if event_type:
+            team_stats[team]['event_types'][event][event_type] += 1
+        
+        # Обновляем статистику по игрокам
+        player_name = row['Player_Name_1']
+        if player_name not in team_stats[team]['player_stats']:
+            team_stats[team]['player_stats'][player_name] = {
+                'shots': 0,
+                'goals': 0,
+                'passes': 0,
+                'successful_passes': 0,
+                'tackles': 0,
+                'interceptions': 0
+            }
+        
+        # Суммы координат для средней позиции игрока
+        x1, y1 = row.get('X1', np.nan), row.get('Y1', np.nan)
+        if pd.notna(x1) and pd.notna(y1):
+            player_position = team_stats[team]['player_positions'][player_name]
+            player_position['x_sum'] += float(x1)
+            player_position['y_sum'] += float(y1)
+            player_position['events'] += 1
+        
+        # Анализ использования ноги
+        foot_used = row.get('Foot_Used', '')
+        if foot_used:
+            team_stats[team]['foot_used'][foot_used] += 1
+            team_stats[team]['foot_by_event'][event][foot_used] += 1
+            team_stats[team]['player_foot_usage'][player_name][foot_used] += 1
+        
+        # Анализ событий
+        if event == 'Shot':
+            team_stats[team]['shots'] += 1
+            half_stats['shots'] += 1
+            team_stats[team]['player_stats'][player_name]['shots'] += 1
+            
+            # Типы ударов
+            shot_type = row.get('Type_Shots', 'Unknown')
+            if shot_type:
+                team_stats[team]['shot_types'][shot_type] += 1
+            
+            # Местоположение удара
+            shot_location = row.get('Shot_Location', 'Unknown')
+            if shot_location:
+                team_stats[team]['shot_locations'][shot_location] += 1
+            
+            # Результат удара
+            result = row.get('Results', '')
+            if result == 'Goal':
+                team_stats[team]['goals'] += 1
+                half_stats['goals'] += 1
+                team_stats[team]['player_stats'][player_name]['goals'] += 1
+                team_stats[team]['shots_on_target'] += 1
+            elif result == 'On Target':
+                team_stats[team]['shots_on_target'] += 1
+            elif result == 'Off Target':
+                team_stats[team]['shots_off_target'] += 1
+            elif result == 'Blocked':
+                team_stats[team]['blocked_shots'] += 1
+            
+            # Анализ под давлением для ударов
+            pressure = row.get('Pressure', '')
+            if pressure:
+                team_stats[team]['pressure_results'][pressure][result] += 1
+            
+            # Координаты удара для карты ударов
+            x1, y1 = row.get('X1', np.nan), row.get('Y1', np.nan)
+            if pd.notna(x1) and pd.notna(y1):
+                shot_points = team_stats[team]['shot_points']
+                shot_points['x'].append(float(x1))
+                shot_points['y'].append(float(y1))
+                shot_points['result'].append(result)
+                shot_points['player'].append(player_name)
+        
+        elif event == 'Pass':
+            team_stats[team]['passes'] += 1
+            half_stats['passes'] += 1
+            team_stats[team]['player_stats'][player_name]['passes'] += 1
+            
+            # Зона паса (используем координаты X2, Y2)
+            x2, y2 = row.get('X2', 0), row.get('Y2', 0)
+            zone = get_field_zone(x2, y2)
+            team_stats[team]['pass_zones'][zone] += 1
+            
+            # Зоны паса по всем схемам разбиения поля
+            for layout in PITCH_LAYOUTS:
+                team_stats[team]['layout_pass_zones'][layout][get_pitch_zone(x2, y2, layout)] += 1
+            
+            # Ячейка мелкой координатной сетки для тепловой карты
+            pass_bin = get_pass_bin(x2, y2)
+            if pass_bin is not None:
+                team_stats[team]['pass_end_bins'][pass_bin] += 1
+            
+            # Тип паса
+            pass_type = row.get('Type', 'Normal')
+            
+            # Успешные пасы
+            pass_outcome = row.get('Pass_Outcome', '')
+            if pass_outcome == 'Successful':
+                team_stats[team]['successful_passes'] += 1
+                half_stats['successful_passes'] += 1
+                team_stats[team]['player_stats'][player_name]['successful_passes'] += 1
+                
+                # Учитываем комбинации пасов между игроками
+                if 'Player_Name_2' in row and pd.notna(row['Player_Name_2']):
+                    receiving_player = row['Player_Name_2']
+                    team_stats[team]['pass_combinations'][player_name][receiving_player] += 1
+            
+            # Кросс
+            if pass_type == 'Cross':
+                team_stats[team]['crosses'] += 1
+                if pass_outcome == 'Successful':
+                    team_stats[team]['successful_crosses'] += 1
+            
+            # Статистика под давлением
+            pressure = row.get('Pressure', '')
+            if pressure == 'Yes':
+                team_stats[team]['pressure_stats']['under_pressure'] += 1
+                # Анализируем результаты пасов под давлением
+                team_stats[team]['pressure_results']['Yes'][pass_outcome] += 1
+            elif pressure == 'No':
+                team_stats[team]['pressure_stats']['no_pressure'] += 1
+                team_stats[team]['pressure_results']['No'][pass_outcome] += 1
+        
+        elif event == 'Tackle':
+            team_stats[team]['tackles'] += 1
+            team_stats[team]['player_stats'][player_name]['tackles'] += 1
+            
+            # Успешные отборы
+            result = row.get('Results', '')
+            if result == 'Successful':
+                team_stats[team]['successful_tackles'] += 1
+        
+        elif event == 'Interception':
+            team_stats[team]['interceptions'] += 1
+            team_stats[team]['player_stats'][player_name]['interceptions'] += 1
+        
+        elif event == 'Foul':
+            team_stats[team]['fouls'] += 1
+        
+        elif event == 'Corner':
+            team_stats[team]['corners'] += 1
+        
+        elif event == 'Offside':
+            team_stats[team]['offsides'] += 1
+            
+        elif event == 'Goalkeeper Action':
+            # Анализ действий вратаря
+            gk_action = row.get('GK_Action', '')
+            if gk_action:
+                team_stats[team]['gk_actions'][gk_action] += 1
+            
+            # Тип сейва
+            save_type = row.get('Save_Type', '')
+            if save_type:
+                team_stats[team]['save_types'][save_type] += 1
+    
+    # Цепочки владения
+    accumulate_possession(team_stats, df)
+    
+    # Расчет процентов и соотношений
+    return finalize_team_stats(team_stats)
+
+# Текстовые столбцы, пустые значения (NaN) в которых векторный движок считает пустой строкой
+OPTIONAL_TEXT_COLUMNS = [
+    'Type', 'Type_Shots', 'Shot_Location', 'Results', 'Pass_Outcome',
+    'Pressure', 'Foot_Used', 'GK_Action', 'Save_Type'
+]
+
+# Вспомогательная функция: текстовый столбец без пропусков
+def _text_column(df, column, default=''):
+    """
+    Возвращает текстовый столбец, где пропуски заменены пустой строкой.
+    Если столбца нет, возвращает серию со значением по умолчанию.
+    """
+    if column not in df.columns:
+        return pd.Series(default, index=df.index, dtype=object)
+    values = df[column]
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        # Категории сохраняем, пустую строку добавляем как отдельную категорию
+        if '' not in values.cat.categories:
+            values = values.cat.add_categories([''])
+        return values.fillna('')
+    values = values.astype(object)
+    return values.where(values.notna(), '')
+
+# Вспомогательная функция: добавление количества строк по ключам в счетчик
+def _add_group_counts(counter, frame, keys):
+    """
+    Добавляет в счетчик (defaultdict) количество строк frame для каждого значения keys.
+    Для пары ключей счетчик должен быть вложенным: counter[внешний][внутренний].
+    """
+    if frame.empty:
+        return
+    sizes = frame.groupby(keys, sort=False, dropna=False, observed=True).size()
+    for key, count in sizes.items():
+        if isinstance(keys, list):
+            outer, inner = key
+            counter[outer][inner] += int(count)
+        else:
+            counter[key] += int(count)
+
+# События, после которых цепочка владения завершается
+TERMINATING_EVENTS = ('Shot', 'Foul', 'Offside')
+
+# Функция для перевода игрового времени в секунды
+def parse_match_time(values):
+    """
+    Переводит игровое время в секунды: числа считаются секундами,
+    строки вида "ММ:СС" или "ЧЧ:ММ:СС" разбираются по двоеточиям.
+    Нераспознанные значения становятся NaN.
+    """
+    seconds = pd.to_numeric(values, errors='coerce').astype(float)
+    if pd.api.types.is_numeric_dtype(values.dtype) or not seconds.isna().any():
+        return seconds.to_numpy()
+    
+    # Разбираем строки с двоеточиями: "ММ:СС" дополняем до "0:ММ:СС",
+    # затем каждая следующая часть умножает предыдущие на 60
+    text = values.astype('string').str.strip()
+    text = text.where(text.str.count(':') != 1, '0:' + text)
+    parts = text.str.split(':', expand=True)
+    clock = pd.Series(0.0, index=values.index)
+    for column in parts.columns:
+        clock = clock * 60 + pd.to_numeric(parts[column], errors='coerce')
+    return seconds.fillna(clock).to_numpy()
+
+# Функция для разбиения событий на цепочки владения
+def segment_possession_chains(df):
+    """
+    Разбивает последовательность событий на цепочки владения мячом.
+    Новая цепочка начинается при смене команды (Team_1), смене тайма или после
+    завершающего события (удар, фол, офсайд). События должны идти в порядке матча.
+    Возвращает DataFrame по одной строке на цепочку: team, half, start, length,
+    duration (секунды) и outcome (Goal, Shot, Foul, Offside, Turnover, Period End).
+    Время работы линейно по числу событий.
+    """
+    n = len(df)
+    if n == 0:
+        return pd.DataFrame(columns=['team', 'half', 'start', 'length', 'duration', 'outcome'])
+    
+    team_codes, teams = pd.factorize(df['Team_1'], use_na_sentinel=False)
+    if 'Half' in df.columns:
+        halves = pd.to_numeric(df['Half'], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+    else:
+        halves = np.ones(n)
+    event = df['Event_Catalog'].astype(object).to_numpy()
+    terminating = np.isin(event, TERMINATING_EVENTS)
+    
+    # Границы цепочек: сравнение с предыдущим событием (shift) и накопленная сумма
+    new_chain = np.ones(n, dtype=bool)
+    new_chain[1:] = (
+        (team_codes[1:] != team_codes[:-1])
+        | ~(halves[1:] == halves[:-1])
+        | terminating[:-1]
+    )
+    starts = np.flatnonzero(new_chain)
+    ends = np.append(starts[1:], n) - 1
+    chain_halves = halves[starts]
+    
+    # Следующая цепочка в том же тайме: иначе цепочка закрывает период
+    continues = np.zeros(len(starts), dtype=bool)
+    continues[:-1] = chain_halves[1:] == chain_halves[:-1]
+    
+    # Длительность: до начала следующей цепочки того же тайма, иначе до последнего события
+    if 'Match Time' in df.columns:
+        seconds = parse_match_time(df['Match Time'])
+        start_time = seconds[starts]
+        next_start = np.append(start_time[1:], np.nan)
+        end_time = np.where(continues, next_start, seconds[ends])
+        duration = np.nan_to_num(np.clip(end_time - start_time, 0, None))
+    else:
+        duration = np.zeros(len(starts))
+    
+    # Итог цепочки по последнему событию
+    last_event = event[ends]
+    if 'Results' in df.columns:
+        last_result = df['Results'].astype(object).to_numpy()[ends]
+    else:
+        last_result = np.full(len(starts), None, dtype=object)
+    outcome = np.where(continues, 'Turnover', 'Period End').astype(object)
+    outcome[np.isin(last_event, ('Foul', 'Offside'))] = last_event[np.isin(last_event, ('Foul', 'Offside'))]
+    is_shot = last_event == 'Shot'
+    outcome[is_shot] = np.where(last_result[is_shot] == 'Goal', 'Goal', 'Shot')
+    
+    return pd.DataFrame({
+        'team': teams.take(team_codes[starts]),
+        'half': chain_halves,
+        'start': starts,
+        'length': np.diff(np.append(starts, n)),
+        'duration': duration,
+        'outcome': outcome,
+    })
+
+# Функция для добавления цепочек владения в накопленную статистику
+def accumulate_possession(team_stats, df, final=True):
+    """
+    Добавляет в team_stats время владения, число и длину цепочек и их итоги.
+    
+    Args:
+        team_stats: Накопленная статистика (команды из df уже должны быть в ней)
+        df: События в порядке матча
+        final: Если False, последняя цепочка считается незавершенной: она не
+            учитывается, а ее строки возвращаются, чтобы добавить их
+            в начало следующей части данных
+    """
+    chains = segment_possession_chains(df)
+    tail = df.iloc[len(df):]
+    if not final and not chains.empty:
+        tail = df.iloc[int(chains['start'].iloc[-1]):]
+        chains = chains.iloc[:-1]
+    
+    for team, group in chains.groupby('team', sort=False, dropna=False, observed=True):
+        stats = team_stats[team]
+        stats['possession_time'] += float(group['duration'].sum())
+        stats['possession_chains'] += len(group)
+        stats['chain_events'] += int(group['length'].sum())
+        _add_group_counts(stats['chain_outcomes'], group, 'outcome')
+        
+        # Время владения по периодам
+        for half, duration in group.groupby('half', sort=False)['duration'].sum().items():
+            stats['half_stats'][int(half)]['possession_time'] += float(duration)
+    
+    return tail
+
+# Векторный анализ данных матча
+def analyze_match_data_vectorized(df, cube=None):
+    """
+    Анализирует данные матча через куб событий без обхода строк.
+    Возвращает ту же структуру team_stats, что и analyze_match_data_loop.
+    Пропуски в необязательных текстовых столбцах считаются пустой строкой.
+    Если передан куб событий этого матча (cube), он не строится заново.
+    """
+    team_stats = accumulate_match_data({}, df, cube=cube)
+    
+    # Расчет процентов и соотношений
+    return finalize_team_stats(team_stats)
+
+# Функция для добавления событий в накопленную статистику
+def accumulate_match_data(team_stats, df, possession=True, cube=None):
+    """
+    Добавляет счетчики по событиям df в team_stats (без расчета процентов).
+    Новые команды добавляются с нулевой статистикой, поэтому функцию можно
+    применять последовательно к частям одного матча.
+    
+    Args:
+        team_stats: Накопленная статистика
+        df: DataFrame с событиями
+        possession: Считать ли цепочки владения; при обработке частей одного матча
+            передайте False и вызывайте accumulate_possession с final=False
+        cube: Готовый EventCube по тем же событиям df (иначе строится по df)
+    """
+    # Определяем команды
+    new_teams = [team for team in df['Team_1'].unique() if team not in team_stats]
+    
+    # Инициализируем статистику для новых команд
+    team_stats.update(init_team_stats(new_teams))
+    
+    if df.empty:
+        return team_stats
+    
+    # Рабочая таблица с нормализованными столбцами и масками событий. С готовым
+    # кубом она нужна только для координат ударов, поэтому строится по ударам.
+    if cube is None:
+        events = _event_frame(df)
+        cube = EventCube.from_frame(events)
+    else:
+        events = _event_frame(df[(df['Event_Catalog'] == 'Shot').to_numpy()])
+    
+    # Все счетчики - срезы куба событий
+    _add_paths(team_stats, *cube.team_stats_paths())
+    
+    # Координаты ударов в порядке матча
+    located = events[events['shot'] & events['x1'].notna() & events['y1'].notna()]
+    for team, shots in located.groupby('team', sort=False, dropna=False, observed=True):
+        shot_points = team_stats[team]['shot_points']
+        shot_points['x'].extend(shots['x1'].astype(float).tolist())
+        shot_points['y'].extend(shots['y1'].astype(float).tolist())
+        shot_points['result'].extend(shots['Results'].tolist())
+        shot_points['player'].extend(shots['player'].tolist())
+    
+    # Цепочки владения
+    if possession:
+        accumulate_possession(team_stats, df)
+    
+    return team_stats
+
+# Счетчики игроков: столбец маски в рабочей таблице -> ключ в player_stats
+PLAYER_STAT_COLUMNS = ['shot', 'goal', 'pass', 'successful_pass', 'tackle', 'interception']
+PLAYER_STAT_KEYS = ['shots', 'goals', 'passes', 'successful_passes', 'tackles', 'interceptions']
+
+# Столбцы рабочей таблицы с координатами X1/Y1 (0 без координат) и маской их наличия
+PLAYER_POSITION_COLUMNS = ['x_located', 'y_located', 'located']
+
+# Вспомогательная функция: номер тайма целым числом (как int(match_half) в построчном движке)
+def _half_column(df):
+    """
+    Возвращает столбец Half как Int64: пустые ячейки остаются <NA> и не
+    попадают в half_stats, вещественные 3.0/4.0 становятся ключами 3/4.
+    Без столбца Half все события относятся к первому тайму.
+    """
+    if 'Half' not in df.columns:
+        return pd.Series(1, index=df.index, dtype='Int64')
+    halves = pd.to_numeric(df['Half'], errors='coerce')
+    return np.trunc(halves.astype(float)).astype('Int64')
+
+# Вспомогательная функция: рабочая таблица событий для векторной агрегации
+def _event_frame(df):
+    """
+    Собирает из df таблицу с нормализованными текстовыми столбцами,
+    булевыми масками событий, зонами и ячейками конца действия.
+    """
+    # Собираем рабочую таблицу с нормализованными столбцами
+    events = pd.DataFrame({
+        'team': df['Team_1'],
+        'player': df['Player_Name_1'],
+        'event': df['Event_Catalog'],
+        'half': _half_column(df),
+    }, index=df.index)
+    for column in OPTIONAL_TEXT_COLUMNS:
+        events[column] = _text_column(df, column)
+    events['pass_type'] = _text_column(df, 'Type', 'Normal')
+    events['shot_type'] = _text_column(df, 'Type_Shots', 'Unknown')
+    events['shot_location'] = _text_column(df, 'Shot_Location', 'Unknown')
+    events['receiver'] = df['Player_Name_2'] if 'Player_Name_2' in df.columns else np.nan
+    events['x1'] = df['X1'] if 'X1' in df.columns else np.nan
+    events['y1'] = df['Y1'] if 'Y1' in df.columns else np.nan
+    located = events['x1'].notna() & events['y1'].notna()
+    events['located'] = located
+    events['x_located'] = events['x1'].where(located, 0).astype(float)
+    events['y_located'] = events['y1'].where(located, 0).astype(float)
+    
+    # Зоны по координатам конца действия (используются для пасов).
+    # Если столбцы зон уже добавлены при загрузке, они используются повторно.
+    x2 = df['X2'] if 'X2' in df.columns else pd.Series(0, index=df.index)
+    y2 = df['Y2'] if 'Y2' in df.columns else pd.Series(0, index=df.index)
+    for layout in PITCH_LAYOUTS:
+        column = f'Zone_End_{layout}'
+        if column in df.columns:
+            events[column] = df[column]
+        else:
+            events[column] = assign_pitch_zones(x2.to_numpy(dtype=float), y2.to_numpy(dtype=float), layout)
+    events['pass_bin'] = get_pass_bins(x2.to_numpy(dtype=float), y2.to_numpy(dtype=float))
+    
+    # Булевы маски событий для счетчиков игроков (см. EVENT_PREDICATES)
+    for column in PLAYER_STAT_COLUMNS:
+        events[column] = event_predicate_mask(events, column)
+    
+    return events
+
+# Вспомогательная функция: перенос незавершенной цепочки в начало следующей части
+def _prepend_carry(carry, chunk):
+    """
+    Возвращает chunk с перенесенными строками carry в начале.
+    Столбцы, целиком пустые в одной из таблиц, приводятся к типу другой,
+    чтобы pd.concat не выводил тип по пустым значениям.
+    """
+    if carry is None or carry.empty:
+        return chunk
+    carry_types, chunk_types = {}, {}
+    for column in carry.columns.intersection(chunk.columns):
+        if carry[column].dtype == chunk[column].dtype:
+            continue
+        if carry[column].isna().all():
+            carry_types[column] = chunk[column].dtype
+        elif chunk[column].isna().all():
+            chunk_types[column] = carry[column].dtype
+    return pd.concat([carry.astype(carry_types), chunk.astype(chunk_types)])
+
+# Функция для потокового анализа большого CSV по частям
+def analyze_match_csv_streaming(source, chunksize=STREAM_CHUNK_ROWS):
+    """
+    Читает CSV частями по chunksize строк и добавляет каждую часть в статистику,
+    после чего часть освобождается. Потребление памяти не зависит от размера файла.
+    
+    Args:
+        source: Путь к файлу или файловый объект с CSV
+        chunksize: Количество строк в одной части
+    """
+    team_stats = {}
+    # Незавершенная цепочка владения переносится в начало следующей части
+    carry = None
+    for chunk in read_match_csv(source, chunksize=chunksize):
+        accumulate_match_data(team_stats, chunk, possession=False)
+        chunk = _prepend_carry(carry, chunk)
+        carry = accumulate_possession(team_stats, chunk, final=False)
+    if carry is not None:
+        accumulate_possession(team_stats, carry)
+    
+    # Расчет процентов и соотношений
+    return finalize_team_stats(team_stats)
+
+# Инкрементальный анализ CSV, который дописывается во время матча
+class LiveMatchTail:
+    """
+    Следит за CSV-файлом матча, в который оператор дописывает события.
+    poll() читает только байты, добавленные после прошлого чтения, и добавляет
+    новые строки в накопленные счетчики; незавершенная цепочка владения
+    переносится между чтениями, как в analyze_match_csv_streaming. Время
+    обновления зависит от числа новых строк, а не от длины матча.
+    Недописанная последняя строка остается в файле до следующего чтения.
+    Если файл стал короче (перезаписан), анализ начинается заново.
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.reset()
+    
+    def reset(self):
+        self.offset = 0
+        self.header = None
+        self.counts = {}
+        self.carry = None
+        self.n_events = 0
+        self.schema_problems = {}
+    
+    def poll(self):
+        """
+        Добавляет в статистику строки, дописанные с прошлого вызова.
+        Возвращает количество новых событий.
+        """
+        with self._lock:
+            size = os.path.getsize(self.path)
+            if size < self.offset:
+                self.reset()
+            if size == self.offset:
+                return 0
+            with open(self.path, 'rb') as match_file:
+                match_file.seek(self.offset)
+                data = match_file.read(size - self.offset)
+            
+            # Читаются только целые строки
+            end = data.rfind(b'\n') + 1
+            if end == 0:
+                return 0
+            data = data[:end]
+            if self.header is None:
+                header_end = data.index(b'\n') + 1
+                columns = pd.read_csv(io.BytesIO(data[:header_end]), nrows=0).columns
+                missing = [column for column in REQUIRED_COLUMNS if column not in columns]
+                if missing:
+                    raise ValueError(f"Файл {self.path} не содержит столбцов: {', '.join(missing)}")
+                self.header, data = data[:header_end], data[header_end:]
+            self.offset += end
+            if not data.strip():
+                return 0
+            
+            chunk = read_match_csv(io.BytesIO(self.header + data))
+            self.schema_problems.update(chunk.attrs.get('schema_problems', {}))
+            accumulate_match_data(self.counts, chunk, possession=False)
+            n_new = len(chunk)
+            self.n_events += n_new
+            chunk = _prepend_carry(self.carry, chunk)
+            self.carry = accumulate_possession(self.counts, chunk, final=False)
+            return n_new
+    
+    def team_stats(self):
+        """
+        Возвращает team_stats (с процентами) по прочитанным событиям. Текущая
+        незавершенная цепочка владения учитывается в копии счетчиков.
+        """
+        with self._lock:
+            team_stats = merge_team_stats({}, self.counts)
+            if self.carry is not None and not self.carry.empty:
+                accumulate_possession(team_stats, self.carry)
+        return finalize_team_stats(team_stats)
+
+# Функция для определения зоны поля на основе координат
+def get_field_zone(x, y):
+    """
+    Определяет зону поля на основе координат.
+    Предполагаем, что координаты нормализованы от 0 до 100.
+    """
+    # Упрощенная модель с 9 зонами (3x3)
+    if x < 33:
+        if y < 33:
+            return "Defensive Left"
+        elif y < 66:
+            return "Defensive Center"
+        else:
+            return "Defensive Right"
+    elif x < 66:
+        if y < 33:
+            return "Middle Left"
+        elif y < 66:
+            return "Middle Center"
+        else:
+            return "Middle Right"
+    else:
+        if y < 33:
+            return "Attacking Left"
+        elif y < 66:
+            return "Attacking Center"
+        else:
+            return "Attacking Right"
+
+# Схемы разбиения поля на зоны: границы по длине (X) и ширине (Y) поля.
+# Координаты нормализованы от 0 до 100; граница относится к следующей зоне.
+PITCH_LAYOUTS = {
+    '3x3': {
+        'name': '3×3 (трети и фланги)',
+        'x_edges': [33, 66],
+        'y_edges': [33, 66],
+        'x_labels': ['Defensive', 'Middle', 'Attacking'],
+        'y_labels': ['Left', 'Center', 'Right'],
+    },
+    '18': {
+        'name': '18 зон (6×3)',
+        'x_edges': [100 / 6, 100 / 3, 50, 200 / 3, 500 / 6],
+        'y_edges': [100 / 3, 200 / 3],
+    },
+    '5x3': {
+        'name': '5 коридоров × 3 трети',
+        'x_edges': [100 / 3, 200 / 3],
+        'y_edges': [20, 40, 60, 80],
+        'x_labels': ['Defensive', 'Middle', 'Attacking'],
+        'y_labels': ['Left Wing', 'Left Half-Space', 'Center', 'Right Half-Space', 'Right Wing'],
+    },
+}
+
+# Функция для получения названий зон схемы
+def get_zone_labels(layout):
+    """
+    Возвращает названия зон схемы в порядке номера зоны (ix * число_коридоров + iy).
+    """
+    spec = PITCH_LAYOUTS[layout]
+    nx, ny = len(spec['x_edges']) + 1, len(spec['y_edges']) + 1
+    if 'x_labels' in spec:
+        return [f"{spec['x_labels'][ix]} {spec['y_labels'][iy]}" for ix in range(nx) for iy in range(ny)]
+    return [f"Zone {number + 1}" for number in range(nx * ny)]
+
+# Функция для определения зон для массивов координат
+def assign_pitch_zones(x, y, layout='3x3'):
+    """
+    Определяет зоны поля сразу для массивов координат через searchsorted.
+    Возвращает pd.Categorical, категории - все зоны схемы.
+    Пропуски координат попадают в последнюю зону, как в get_field_zone.
+    """
+    spec = PITCH_LAYOUTS[layout]
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    ix = np.searchsorted(spec['x_edges'], x, side='right')
+    iy = np.searchsorted(spec['y_edges'], y, side='right')
+    codes = ix * (len(spec['y_edges']) + 1) + iy
+    return pd.Categorical.from_codes(codes, categories=get_zone_labels(layout))
+
+# Функция для определения зоны по схеме для одной точки
+def get_pitch_zone(x, y, layout='3x3'):
+    """
+    Скалярная версия assign_pitch_zones (используется эталонным построчным анализом).
+    """
+    spec = PITCH_LAYOUTS[layout]
+    ix = len(spec['x_edges']) if pd.isna(x) else bisect.bisect_right(spec['x_edges'], x)
+    iy = len(spec['y_edges']) if pd.isna(y) else bisect.bisect_right(spec['y_edges'], y)
+    return get_zone_labels(layout)[ix * (len(spec['y_edges']) + 1) + iy]
+
+# Векторная версия get_field_zone для массивов координат
+def get_field_zones(x, y):
+    """
+    Определяет зоны поля 3×3 сразу для массивов координат (аналог get_field_zone).
+    """
+    return assign_pitch_zones(x, y, '3x3')
+
+# Функция для добавления столбцов зон в таблицу событий
+def add_zone_columns(df):
+    """
+    Добавляет для каждой схемы из PITCH_LAYOUTS столбец Zone_End_<схема> - зону
+    точки окончания действия (X2, Y2). Вызывается один раз при загрузке, дальше
+    агрегаты по зонам берут готовые столбцы.
+    """
+    if 'X2' not in df.columns or 'Y2' not in df.columns:
+        return df
+    x2 = df['X2'].to_numpy(dtype=float)
+    y2 = df['Y2'].to_numpy(dtype=float)
+    for layout in PITCH_LAYOUTS:
+        df[f'Zone_End_{layout}'] = assign_pitch_zones(x2, y2, layout)
+    return df
+
+# Базовая сетка для тепловой карты пасов (ячеек по длине и ширине поля).
+# Любое разрешение тепловой карты должно делить базовую сетку нацело.
+PASS_GRID_BASE = (48, 32)
+
+# Доступные разрешения тепловой карты пасов
+PASS_HEATMAP_RESOLUTIONS = [(6, 4), (12, 8), (24, 16), (48, 32)]
+
+# Функция для определения ячейки базовой сетки по координатам
+def get_pass_bin(x, y):
+    """
+    Возвращает номер ячейки базовой сетки PASS_GRID_BASE для точки (x, y)
+    или None, если координаты отсутствуют.
+    """
+    if pd.isna(x) or pd.isna(y):
+        return None
+    nx, ny = PASS_GRID_BASE
+    ix = min(max(int(math.floor(x / 100 * nx)), 0), nx - 1)
+    iy = min(max(int(math.floor(y / 100 * ny)), 0), ny - 1)
+    return ix * ny + iy
+
+# Векторная версия get_pass_bin для массивов координат
+def get_pass_bins(x, y):
+    """
+    Возвращает номера ячеек базовой сетки для массивов координат (-1 для пропусков).
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    nx, ny = PASS_GRID_BASE
+    valid = ~(np.isnan(x) | np.isnan(y))
+    ix = np.clip(np.floor(np.where(valid, x, 0) / 100 * nx), 0, nx - 1).astype(np.int64)
+    iy = np.clip(np.floor(np.where(valid, y, 0) / 100 * ny), 0, ny - 1).astype(np.int64)
+    return np.where(valid, ix * ny + iy, -1)
+
+# Функция для получения сетки пасов заданного разрешения
+def get_pass_end_grid(pass_end_bins, resolution):
+    """
+    Собирает плотную сетку количества пасов (строки - ширина поля, столбцы - длина)
+    из счетчика ячеек базовой сетки, суммируя блоки до нужного разрешения.
+    """
+    nx, ny = resolution
+    base_nx, base_ny = PASS_GRID_BASE
+    if base_nx % nx or base_ny % ny:
+        raise ValueError(f"Разрешение {nx}×{ny} не делит базовую сетку {base_nx}×{base_ny}")
+    
+    base = np.zeros(base_nx * base_ny)
+    if pass_end_bins:
+        cells = np.fromiter(pass_end_bins.keys(), dtype=np.int64, count=len(pass_end_bins))
+        counts = np.fromiter(pass_end_bins.values(), dtype=float, count=len(pass_end_bins))
+        np.add.at(base, cells, counts)
+    
+    grid = base.reshape(nx, base_nx // nx, ny, base_ny // ny).sum(axis=(1, 3))
+    return grid.T
+
+# Функция для сглаживания сетки гауссовым ядром
+def smooth_grid(grid, sigma):
+    """
+    Сглаживает сетку разделимым гауссовым ядром (sigma - в ячейках сетки).
+    """
+    if sigma <= 0:
+        return grid
+    radius = max(1, int(math.ceil(3 * sigma)))
+    offsets = np.arange(-radius, radius + 1)
+    kernel = np.exp(-offsets ** 2 / (2 * sigma ** 2))
+    kernel /= kernel.sum()
+    
+    # Свертка по каждой оси с отражением на границах поля
+    padded = np.pad(grid, ((radius, radius), (0, 0)), mode='reflect')
+    grid = np.apply_along_axis(lambda column: np.convolve(column, kernel, mode='valid'), 0, padded)
+    padded = np.pad(grid, ((0, 0), (radius, radius)), mode='reflect')
+    return np.apply_along_axis(lambda row: np.convolve(row, kernel, mode='valid'), 1, padded)
+
+# Проверка значений столбца: функция для pandas/NumPy и то же условие в SQL
+class ValueTest:
+    """
+    Условие на значения столбца вне простого равенства. function принимает
+    массив значений и возвращает булев массив; sql - шаблон выражения
+    с подстановкой {column}.
+    """
+    
+    def __init__(self, function, sql):
+        self.function = function
+        self.sql = sql
+    
+    def __call__(self, values):
+        return np.asarray(self.function(values), dtype=bool)
+
+NOT_EMPTY = ValueTest(lambda values: ~pd.Series(values).isin(['']).to_numpy(), "{column} != ''")
+NOT_NULL = ValueTest(pd.notna, "{column} IS NOT NULL")
+NON_NEGATIVE = ValueTest(lambda values: np.asarray(values) >= 0, "{column} >= 0")
+
+# Маски событий: имя -> условия на столбцы рабочей таблицы (_event_frame).
+# Условие - значение (равенство), кортеж значений (любое из них) или ValueTest.
+# По этой таблице строятся маски рабочей таблицы, условия куба событий и SQL базы.
+EVENT_PREDICATES = {
+    'shot': {'event': 'Shot'},
+    'goal': {'event': 'Shot', 'Results': 'Goal'},
+    'pass': {'event': 'Pass'},
+    'successful_pass': {'event': 'Pass', 'Pass_Outcome': 'Successful'},
+    'tackle': {'event': 'Tackle'},
+    'interception': {'event': 'Interception'},
+    'shot_on_target': {'event': 'Shot', 'Results': ('Goal', 'On Target')},
+    'shot_off_target': {'event': 'Shot', 'Results': 'Off Target'},
+    'blocked_shot': {'event': 'Shot', 'Results': 'Blocked'},
+    'cross': {'event': 'Pass', 'Type': 'Cross'},
+    'successful_cross': {'event': 'Pass', 'Type': 'Cross', 'Pass_Outcome': 'Successful'},
+    'successful_tackle': {'event': 'Tackle', 'Results': 'Successful'},
+    'foul': {'event': 'Foul'},
+    'corner': {'event': 'Corner'},
+    'offside': {'event': 'Offside'},
+    'pass_under_pressure': {'event': 'Pass', 'Pressure': 'Yes'},
+    'pass_no_pressure': {'event': 'Pass', 'Pressure': 'No'},
+    'pressured_pass': {'event': 'Pass', 'Pressure': ('Yes', 'No')},
+    'pressured_shot': {'event': 'Shot', 'Pressure': NOT_EMPTY},
+    'with_type': {'Type': NOT_EMPTY},
+    'with_foot': {'Foot_Used': NOT_EMPTY},
+    'with_half': {'half': NOT_NULL},
+    'typed_shot': {'event': 'Shot', 'shot_type': NOT_EMPTY},
+    'located_shot': {'event': 'Shot', 'shot_location': NOT_EMPTY},
+    'binned_pass': {'event': 'Pass', 'pass_bin': NON_NEGATIVE},
+    'combination': {'event': 'Pass', 'Pass_Outcome': 'Successful', 'receiver': NOT_NULL},
+    'gk_action': {'event': 'Goalkeeper Action', 'GK_Action': NOT_EMPTY},
+    'gk_save': {'event': 'Goalkeeper Action', 'Save_Type': NOT_EMPTY},
+}
+
+# Вспомогательная функция: булев массив для условия EVENT_PREDICATES
+def _condition_mask(values, condition):
+    """
+    Проверяет массив значений на условие: функцию (ValueTest), набор значений
+    (tuple, list, set) или одно значение.
+    """
+    if callable(condition):
+        return np.asarray(condition(values), dtype=bool)
+    allowed = list(condition) if isinstance(condition, (tuple, list, set)) else [condition]
+    return pd.Series(values).isin(allowed).to_numpy()
+
+# Функция для вычисления маски событий рабочей таблицы
+def event_predicate_mask(events, name):
+    """
+    Возвращает булев массив строк events, удовлетворяющих маске EVENT_PREDICATES[name].
+    """
+    selected = np.ones(len(events), dtype=bool)
+    for column, condition in EVENT_PREDICATES[name].items():
+        selected &= _condition_mask(events[column], condition)
+    return selected
+
+# Вспомогательная функция: значение условия в виде литерала SQL
+def _sql_literal(value):
+    if isinstance(value, str):
+        return "'" + value.replace("'", "''") + "'"
+    return str(value)
+
+# Функция для перевода маски событий в условие SQL
+def predicate_sql(name):
+    """
+    Возвращает условие WHERE для маски EVENT_PREDICATES[name] по столбцам базы событий.
+    """
+    conditions = []
+    for column, condition in EVENT_PREDICATES[name].items():
+        quoted = f'"{column}"'
+        if isinstance(condition, ValueTest):
+            conditions.append(condition.sql.format(column=quoted))
+        elif isinstance(condition, tuple):
+            conditions.append(f"{quoted} IN ({', '.join(map(_sql_literal, condition))})")
+        else:
+            conditions.append(f"{quoted} = {_sql_literal(condition)}")
+    return ' AND '.join(conditions)
+
+# Семейства счетчиков team_stats (куб событий, индекс по минутам, база SQLite):
+# (путь до столбцов, столбцы-ключи, путь после столбцов, имена масок EVENT_PREDICATES).
+# Путь None после столбцов только создает запись (игрока или период) с нулевыми счетчиками.
+TIME_INDEX_FAMILIES = [
+    (('shots',), [], (), ['shot']),
+    (('shots_on_target',), [], (), ['shot_on_target']),
+    (('shots_off_target',), [], (), ['shot_off_target']),
+    (('blocked_shots',), [], (), ['blocked_shot']),
+    (('goals',), [], (), ['goal']),
+    (('passes',), [], (), ['pass']),
+    (('successful_passes',), [], (), ['successful_pass']),
+    (('crosses',), [], (), ['cross']),
+    (('successful_crosses',), [], (), ['successful_cross']),
+    (('tackles',), [], (), ['tackle']),
+    (('successful_tackles',), [], (), ['successful_tackle']),
+    (('interceptions',), [], (), ['interception']),
+    (('fouls',), [], (), ['foul']),
+    (('corners',), [], (), ['corner']),
+    (('offsides',), [], (), ['offside']),
+    (('pressure_stats',), [], ('under_pressure',), ['pass_under_pressure']),
+    (('pressure_stats',), [], ('no_pressure',), ['pass_no_pressure']),
+    (('event_categories',), ['event'], (), []),
+    (('event_types',), ['event', 'Type'], (), ['with_type']),
+    (('player_stats',), ['player'], None, []),
+    *[(('player_stats',), ['player'], (key,), [column])
+      for column, key in zip(PLAYER_STAT_COLUMNS, PLAYER_STAT_KEYS)],
+    (('foot_used',), ['Foot_Used'], (), ['with_foot']),
+    (('foot_by_event',), ['event', 'Foot_Used'], (), ['with_foot']),
+    (('player_foot_usage',), ['player', 'Foot_Used'], (), ['with_foot']),
+    (('half_stats',), ['half'], None, ['with_half']),
+    (('half_stats',), ['half'], ('shots',), ['with_half', 'shot']),
+    (('half_stats',), ['half'], ('goals',), ['with_half', 'goal']),
+    (('half_stats',), ['half'], ('passes',), ['with_half', 'pass']),
+    (('half_stats',), ['half'], ('successful_passes',), ['with_half', 'successful_pass']),
+    (('shot_types',), ['shot_type'], (), ['typed_shot']),
+    (('shot_locations',), ['shot_location'], (), ['located_shot']),
+    (('pressure_results',), ['Pressure', 'Results'], (), ['pressured_shot']),
+    (('pressure_results',), ['Pressure', 'Pass_Outcome'], (), ['pressured_pass']),
+    (('pass_zones',), ['Zone_End_3x3'], (), ['pass']),
+    *[(('layout_pass_zones', layout), [f'Zone_End_{layout}'], (), ['pass'])
+      for layout in PITCH_LAYOUTS],
+    (('pass_end_bins',), ['pass_bin'], (), ['binned_pass']),
+    (('pass_combinations',), ['player', 'receiver'], (), ['combination']),
+    (('gk_actions',), ['GK_Action'], (), ['gk_action']),
+    (('save_types',), ['Save_Type'], (), ['gk_save']),
+]
+
+# Счетчики с дробными значениями (остальные при выборке отрезка округляются до целых)
+FLOAT_STATS = {'possession_time', 'x_sum', 'y_sum'}
+
+# Оси куба событий: столбцы рабочей таблицы (_event_frame), по которым считаются
+# счетчики team_stats. Тип события (Type), результат (Results, Pass_Outcome),
+# тайм, давление и нога - срезы одного куба.
+CUBE_AXES = [
+    'team', 'player', 'receiver', 'event', 'Type', 'shot_type', 'shot_location',
+    'Results', 'Pass_Outcome', 'half', 'Pressure', 'Foot_Used', 'GK_Action', 'Save_Type',
+]
+
+# Оси куба концов пасов. Зоны и ячейка сетки конца паса почти у каждого паса свои,
+# в основном кубе они сделали бы ячейки почти уникальными, поэтому считаются
+# отдельным кубом только по пасам.
+PASS_END_AXES = ['team', 'event', *[f'Zone_End_{layout}' for layout in PITCH_LAYOUTS], 'pass_bin']
+
+# Меры ячеек куба помимо количества событий: суммы координат X1/Y1 и число событий с ними
+CUBE_MEASURES = PLAYER_POSITION_COLUMNS
+
+# Суммы мер куба в team_stats: (prefix, оси, suffix, мера)
+CUBE_MEASURE_FAMILIES = [
+    (('player_positions',), ['player'], ('x_sum',), 'x_located'),
+    (('player_positions',), ['player'], ('y_sum',), 'y_located'),
+    (('player_positions',), ['player'], ('events',), 'located'),
+]
+
+# Вспомогательная функция: ячейки куба по столбцам рабочей таблицы
+def _cube_cells(events, axis_names):
+    """
+    Кодирует столбцы axis_names словарями меток и нумерует уникальные сочетания
+    кодов в порядке первого появления. Возвращает словарь меток осей, матрицу
+    кодов ячеек [ячейка, ось] и номер ячейки для каждой строки events.
+    """
+    axes = {}
+    codes = []
+    for axis in axis_names:
+        axis_codes, labels = pd.factorize(events[axis], use_na_sentinel=False)
+        codes.append(axis_codes)
+        axes[axis] = np.asarray(labels, dtype=object)
+    sizes = [max(len(axes[axis]), 1) for axis in axis_names]
+    
+    # Сочетание кодов - одно число в смешанной системе счисления, если оно помещается в int64
+    if math.prod(sizes) < 2 ** 63:
+        cell_ids, keys = pd.factorize(np.ravel_multi_index(codes, sizes))
+        cell_codes = np.column_stack(np.unravel_index(keys, sizes)) if len(keys) else np.empty((0, len(sizes)), dtype=np.intp)
+    else:
+        cell_ids = pd.DataFrame(dict(enumerate(codes))).groupby(list(range(len(codes))), sort=False).ngroup().to_numpy()
+        first_rows = np.unique(cell_ids, return_index=True)[1]
+        cell_codes = np.column_stack(codes)[first_rows]
+    return axes, np.asfortranarray(cell_codes, dtype=np.int32), cell_ids
+
+# Разреженный куб количества событий
+class EventCube:
+    """
+    Количество событий по всем сочетаниям осей CUBE_AXES, встречающимся в матче.
+    Метки каждой оси хранятся один раз (словарное кодирование), ячейки куба -
+    матрица кодов [ячейка, ось] с количеством событий и суммами мер. Ячейки идут
+    в порядке первого появления, поэтому группы в срезах сохраняют порядок матча.
+    Зоны и ячейки конца паса считаются в отдельном кубе pass_ends (оси PASS_END_AXES).
+    Метки оси half - целые номера таймов (3 и 4 для дополнительного времени)
+    при любом типе столбца Half, пустой тайм - <NA>.
+    Любая разбивка статистики - срез (slice) и суммирование (sum) по ячейкам,
+    без повторного обхода событий.
+    """
+    
+    def __init__(self, axes, codes, counts, measures, pass_ends=None):
+        self.axes = axes
+        self.codes = codes
+        self.counts = counts
+        self.measures = measures
+        self.pass_ends = pass_ends
+        self._positions = {axis: i for i, axis in enumerate(axes)}
+        self._predicate_masks = {}
+    
+    @classmethod
+    def from_events(cls, df):
+        """
+        Строит куб по таблице событий матча.
+        """
+        return cls.from_frame(_event_frame(df))
+    
+    @classmethod
+    def from_frame(cls, events):
+        """
+        Строит куб по рабочей таблице событий (_event_frame).
+        """
+        axes, codes, cell_ids = _cube_cells(events, CUBE_AXES)
+        n_cells = len(codes)
+        measures = {
+            measure: np.bincount(cell_ids, weights=events[measure].to_numpy(dtype=float), minlength=n_cells)
+            for measure in CUBE_MEASURES
+        }
+        
+        # Концы пасов - отдельный куб по строкам пасов
+        passes = events[events['pass']]
+        pass_axes, pass_codes, pass_cell_ids = _cube_cells(passes, PASS_END_AXES)
+        pass_ends = cls(pass_axes, pass_codes, np.bincount(pass_cell_ids, minlength=len(pass_codes)), {})
+        return cls(axes, codes, np.bincount(cell_ids, minlength=n_cells), measures, pass_ends)
+    
+    def covers(self, axes):
+        """
+        Проверяет, что все оси axes есть в кубе.
+        """
+        return all(axis in self.axes for axis in axes)
+    
+    def _cube_for(self, axes):
+        # Куб, в котором есть все оси: основной или куб концов пасов
+        if self.covers(axes) or self.pass_ends is None:
+            return self
+        return self.pass_ends
+    
+    def mask(self, **conditions):
+        """
+        Возвращает булеву маску ячеек, удовлетворяющих условиям на оси: значение,
+        набор значений (tuple, list, set) или функция от массива меток оси.
+        Условие проверяется по словарю меток, а не по ячейкам.
+        """
+        selected = np.ones(len(self.counts), dtype=bool)
+        for axis, condition in conditions.items():
+            allowed = _condition_mask(pd.Series(self.axes[axis], dtype=object), condition)
+            selected &= allowed[self.codes[:, self._positions[axis]]]
+        return selected
+    
+    def predicate_mask(self, name):
+        """
+        Возвращает маску ячеек для EVENT_PREDICATES[name]; для каждого куба
+        маска считается один раз.
+        """
+        if name not in self._predicate_masks:
+            self._predicate_masks[name] = self.mask(**EVENT_PREDICATES[name])
+        return self._predicate_masks[name]
+    
+    def slice(self, **conditions):
+        """
+        Возвращает куб из ячеек, удовлетворяющих условиям (см. mask).
+        Куб концов пасов срезается теми же условиями, если в нем есть все их оси.
+        Пример: cube.slice(event='Shot', Results=('Goal', 'On Target')).
+        """
+        selected = self.mask(**conditions)
+        pass_ends = None
+        if self.pass_ends is not None and self.pass_ends.covers(conditions):
+            pass_ends = self.pass_ends.slice(**conditions)
+        return EventCube(
+            self.axes, np.asfortranarray(self.codes[selected]), self.counts[selected],
+            {measure: values[selected] for measure, values in self.measures.items()}, pass_ends
+        )
+    
+    def totals(self, by, measure=None, where=None):
+        """
+        Суммирует количество событий (или меру measure) по осям by, при заданной
+        маске where - только по выбранным ячейкам. Возвращает список ключей
+        (кортежей меток) в порядке первого появления и массив сумм.
+        """
+        values = self.counts if measure is None else self.measures[measure]
+        codes = [self.codes[:, self._positions[axis]] for axis in by]
+        if where is not None:
+            values = values[where]
+            codes = [axis_codes[where] for axis_codes in codes]
+        if not len(values):
+            return [], values
+        sizes = [len(self.axes[axis]) for axis in by]
+        group_codes, groups = pd.factorize(np.ravel_multi_index(codes, sizes))
+        sums = np.bincount(group_codes, weights=values, minlength=len(groups))
+        labels = [self.axes[axis][index] for axis, index in zip(by, np.unravel_index(groups, sizes))]
+        return list(zip(*labels)), sums
+    
+    def sum(self, by, measure=None):
+        """
+        Возвращает Series с суммами по осям by (индекс - метки осей). Разбивки
+        по зонам и ячейкам конца паса берутся из куба концов пасов.
+        Пример: cube.slice(event='Pass').sum(['team', 'Pressure', 'Pass_Outcome']).
+        """
+        keys, sums = self._cube_for(by).totals(by, measure)
+        index = pd.MultiIndex.from_tuples(keys, names=by) if len(by) > 1 else pd.Index([key[0] for key in keys], name=by[0])
+        return pd.Series(sums if measure is not None else sums.astype(np.int64), index=index, name=measure or 'count')
+    
+    def team_stats_paths(self):
+        """
+        Возвращает пути счетчиков team_stats (как в MatchTimeIndex) и их значения:
+        каждое семейство TIME_INDEX_FAMILIES - сумма по осям в ячейках, выбранных
+        масками EVENT_PREDICATES (семейства зон и ячеек конца паса - по кубу концов пасов).
+        """
+        paths = []
+        values = []
+        for prefix, columns, suffix, family_masks in TIME_INDEX_FAMILIES:
+            cube = self._cube_for(columns)
+            where = None
+            for mask in family_masks:
+                where = cube.predicate_mask(mask) if where is None else where & cube.predicate_mask(mask)
+            keys, sums = cube.totals(['team', *columns], where=where)
+            paths.extend((key[0], *prefix, *key[1:], *suffix) if suffix is not None else (key[0], *prefix, *key[1:], None)
+                         for key in keys)
+            values.extend(sums)
+        for prefix, columns, suffix, measure in CUBE_MEASURE_FAMILIES:
+            keys, sums = self.totals(['team', *columns], measure)
+            paths.extend((key[0], *prefix, *key[1:], *suffix) for key in keys)
+            values.extend(sums)
+        return paths, values
+    
+    def __len__(self):
+        return len(self.counts)
+    
+    def __sizeof__(self):
+        return (self.codes.nbytes + self.counts.nbytes + sum(values.nbytes for values in self.measures.values())
+                + estimate_size(self.axes) + (sys.getsizeof(self.pass_ends) if self.pass_ends is not None else 0))
+
+# Вспомогательная функция: матрица количества событий по ключам и минутам
+def _minute_counts(frame, n_minutes, columns, weight=None):
+    """
+    Группирует frame по команде, столбцам columns и минуте ('minute').
+    Возвращает список ключей (кортежей) и матрицу [ключ, минута] с количеством
+    строк или суммой столбца weight.
+    """
+    grouped = frame.groupby(['team', *columns, 'minute'], sort=False, observed=True, dropna=False)
+    totals = grouped[weight].sum() if weight else grouped.size()
+    codes, keys = pd.factorize(totals.index.droplevel('minute'))
+    matrix = np.zeros((len(keys), n_minutes))
+    np.add.at(matrix, (codes, totals.index.get_level_values('minute').to_numpy(dtype=int)), totals.to_numpy(dtype=float))
+    return [key if isinstance(key, tuple) else (key,) for key in keys], matrix
+
+# Индекс статистики матча по минутам (префиксные суммы)
+class MatchTimeIndex:
+    """
+    Накопленные по минутам суммы всех счетчиков team_stats. Статистика за любой
+    отрезок матча получается разностью двух столбцов без повторного обхода событий.
+    События без распознанного игрового времени в индекс не попадают.
+    Ключи half_stats - целые номера таймов, как в analyze_match_data.
+    """
+    
+    def __init__(self, teams, paths, cumulative, shots):
+        self.teams = teams
+        self.paths = paths
+        self.cumulative = cumulative
+        self.shots = shots
+    
+    @property
+    def n_minutes(self):
+        return self.cumulative.shape[1] - 1
+    
+    @classmethod
+    def from_events(cls, df):
+        """
+        Строит индекс по таблице событий. Возвращает None, если в данных
+        нет столбца Match Time или ни одно значение времени не распознано.
+        """
+        if 'Match Time' not in df.columns or df.empty:
+            return None
+        minutes = parse_match_time(df['Match Time']) // 60
+        timed = ~np.isnan(minutes) & (minutes >= 0)
+        if not timed.any():
+            return None
+        n_minutes = int(minutes[timed].max()) + 1
+        teams = list(df['Team_1'].unique())
+        
+        # Маски событий в дополнение к рабочей таблице векторного движка
+        events = _event_frame(df)
+        events['minute'] = minutes
+        for name in EVENT_PREDICATES:
+            if name not in events.columns:
+                events[name] = event_predicate_mask(events, name)
+        events = events[timed]
+        
+        paths = []
+        blocks = []
+        for prefix, columns, suffix, masks in TIME_INDEX_FAMILIES:
+            selected = events
+            for mask in masks:
+                selected = selected[selected[mask]]
+            keys, matrix = _minute_counts(selected, n_minutes, columns)
+            paths.extend((key[0], *prefix, *key[1:], *suffix) if suffix is not None else (key[0], *prefix, *key[1:], None)
+                         for key in keys)
+            blocks.append(matrix)
+        
+        # Цепочки владения относятся к минуте своего первого события
+        chains = segment_possession_chains(df)
+        chains['minute'] = minutes[chains['start'].to_numpy(dtype=int)]
+        chains = chains[~np.isnan(chains['minute']) & (chains['minute'] >= 0)]
+        # Суммы координат игроков - взвешенные семейства, как время владения
+        positioned = events[events['located']]
+        weighted_families = [
+            ((), [], ('possession_time',), 'duration', chains),
+            ((), [], ('possession_chains',), None, chains),
+            ((), [], ('chain_events',), 'length', chains),
+            (('player_positions',), ['player'], ('x_sum',), 'x_located', positioned),
+            (('player_positions',), ['player'], ('y_sum',), 'y_located', positioned),
+            (('player_positions',), ['player'], ('events',), None, positioned),
+        ]
+        for prefix, columns, suffix, weight, frame in weighted_families:
+            keys, matrix = _minute_counts(frame, n_minutes, columns, weight)
+            paths.extend((key[0], *prefix, *key[1:], *suffix) for key in keys)
+            blocks.append(matrix)
+        keys, matrix = _minute_counts(chains, n_minutes, ['outcome'])
+        paths.extend((key[0], 'chain_outcomes', key[1]) for key in keys)
+        blocks.append(matrix)
+        keys, matrix = _minute_counts(chains[~np.isnan(chains['half'])], n_minutes, ['half'], 'duration')
+        paths.extend((key[0], 'half_stats', int(key[1]), 'possession_time') for key in keys)
+        blocks.append(matrix)
+        
+        # Префиксные суммы: cumulative[:, m] - сумма за минуты [0, m)
+        counts = np.vstack(blocks) if blocks else np.zeros((0, n_minutes))
+        cumulative = np.zeros((len(counts), n_minutes + 1))
+        np.cumsum(counts, axis=1, out=cumulative[:, 1:])
+        
+        # Координаты ударов по командам, упорядоченные по минуте
+        shots = {}
+        located = events[events['shot'] & events['x1'].notna() & events['y1'].notna()]
+        for team, group in located.groupby('team', sort=False, observed=True):
+            group = group.sort_values('minute', kind='stable')
+            shots[team] = {
+                'minute': group['minute'].to_numpy(),
+                'x': group['x1'].astype(float).tolist(),
+                'y': group['y1'].astype(float).tolist(),
+                'result': group['Results'].tolist(),
+                'player': group['player'].tolist(),
+            }
+        
+        return cls(teams, paths, cumulative, shots)
+    
+    def window_stats(self, start, end):
+        """
+        Возвращает team_stats (с процентами) за минуты матча с start по end включительно.
+        Время работы зависит только от числа счетчиков, но не от числа событий.
+        """
+        start = max(int(start), 0)
+        end = min(int(end), self.n_minutes - 1)
+        values = self.cumulative[:, end + 1] - self.cumulative[:, start]
+        team_stats = _stats_from_paths(self.teams, self.paths, values)
+        
+        # Удары отрезка находятся бинарным поиском по отсортированным минутам
+        for team, shots in self.shots.items():
+            first, last = np.searchsorted(shots['minute'], [start, end + 1])
+            for key in ('x', 'y', 'result', 'player'):
+                team_stats[team]['shot_points'][key].extend(shots[key][first:last])
+        
+        return finalize_team_stats(team_stats)
+    
+    def __sizeof__(self):
+        return self.cumulative.nbytes + estimate_size(self.paths) + estimate_size(self.shots)
+
+# Вспомогательная функция: team_stats (без процентов) по путям счетчиков и их значениям
+def _stats_from_paths(teams, paths, values):
+    """
+    Собирает team_stats из пар (путь, значение), см. _add_paths.
+    """
+    team_stats = init_team_stats(teams)
+    _add_paths(team_stats, paths, values)
+    return team_stats
+
+# Вспомогательная функция: добавление значений счетчиков по путям в team_stats
+def _add_paths(team_stats, paths, values):
+    """
+    Добавляет пары (путь, значение) в накопленную team_stats. Путь - кортеж ключей
+    от команды до счетчика; путь с None в конце только создает запись (например,
+    игрока), если значение больше нуля. Нулевые значения пропускаются.
+    """
+    for path, value in zip(paths, values):
+        if path[-1] is None:
+            # Запись создается, только если были события
+            if value > 0:
+                _path_node(team_stats, path[:-1])
+            continue
+        if value == 0:
+            continue
+        node = _path_node(team_stats, path[:-1])
+        node[path[-1]] = node.get(path[-1], 0) + (float(value) if path[-1] in FLOAT_STATS else int(round(value)))
+    
+    # Игроки получают полный набор счетчиков в порядке PLAYER_STAT_KEYS
+    for stats in team_stats.values():
+        player_stats = stats['player_stats']
+        for player, counters in player_stats.items():
+            player_stats[player] = {key: counters.get(key, 0) for key in PLAYER_STAT_KEYS}
+
+# Вспомогательная функция: вложенный счетчик по пути ключей (создается при отсутствии)
+def _path_node(stats, path):
+    node = stats
+    for part in path:
+        node = node[part] if isinstance(node, defaultdict) else node.setdefault(part, {})
+    return node
+
+# Файл базы SQLite с событиями сохраненных матчей
+EVENT_STORE_PATH = os.environ.get("FOOTBALL_EVENT_DB", os.path.join(MATCH_STORE_DIR, "events.sqlite"))
+
+# Столбцы рабочей таблицы событий (_event_frame), сохраняемые в базе
+STORE_TEXT_COLUMNS = [
+    'team', 'player', 'receiver', 'event', 'Type', 'pass_type', 'shot_type', 'shot_location',
+    'Results', 'Pass_Outcome', 'Pressure', 'Foot_Used', 'GK_Action', 'Save_Type',
+    *[f'Zone_End_{layout}' for layout in PITCH_LAYOUTS],
+]
+
+# Исходные столбцы CSV -> столбцы базы (для восстановления таблицы событий матча)
+STORE_SOURCE_COLUMNS = {
+    'Time': 'time',
+    'Match Time': 'match_time',
+    'Half': 'half',
+    'Team_1': 'team',
+    'Player_Name_1': 'player',
+    'Player_Name_2': 'receiver',
+    'X1': 'x1',
+    'Y1': 'y1',
+    'X2': 'x2',
+    'Y2': 'y2',
+    'Event_Catalog': 'event',
+    'Type': 'Type',
+    'Type_Shots': 'shot_type',
+    'Shot_Location': 'shot_location',
+    'Results': 'Results',
+    'Pass_Outcome': 'Pass_Outcome',
+    'Pressure': 'Pressure',
+    'Foot_Used': 'Foot_Used',
+    'GK_Action': 'GK_Action',
+    'Save_Type': 'Save_Type',
+}
+
+# Схема базы: матчи, события (кластеризованы по матчу и порядку), цепочки владения
+# и счетчики team_stats, посчитанные запросами SQL при загрузке матча
+EVENT_STORE_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS matches (
+    match_id INTEGER PRIMARY KEY,
+    match_key TEXT NOT NULL UNIQUE,
+    name TEXT,
+    n_events INTEGER NOT NULL,
+    columns TEXT NOT NULL,
+    schema_problems TEXT NOT NULL,
+    ingested_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS events (
+    match_id INTEGER NOT NULL,
+    seq INTEGER NOT NULL,
+    {', '.join(f'"{column}" TEXT' for column in STORE_TEXT_COLUMNS)},
+    half INTEGER,
+    pass_bin INTEGER,
+    x1 REAL,
+    y1 REAL,
+    x2 REAL,
+    y2 REAL,
+    time,
+    match_time,
+    PRIMARY KEY (match_id, seq)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS events_match_team_player_event_half ON events (match_id, team, player, event, half);
+CREATE INDEX IF NOT EXISTS events_match_event ON events (match_id, event);
+CREATE INDEX IF NOT EXISTS events_team_event ON events (team, event);
+CREATE TABLE IF NOT EXISTS chains (
+    match_id INTEGER NOT NULL,
+    start INTEGER NOT NULL,
+    team TEXT,
+    half INTEGER,
+    length INTEGER NOT NULL,
+    duration REAL NOT NULL,
+    outcome TEXT NOT NULL,
+    PRIMARY KEY (match_id, start)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS counters (
+    match_id INTEGER NOT NULL,
+    path TEXT NOT NULL,
+    value,
+    first_seq INTEGER NOT NULL,
+    PRIMARY KEY (match_id, path)
+) WITHOUT ROWID;
+"""
+
+# Вспомогательная функция: запросы счетчиков, сгруппированные по столбцам GROUP BY
+def _store_count_queries():
+    """
+    Переводит TIME_INDEX_FAMILIES (и суммы координат игроков) в список пар
+    (столбцы группировки, [(prefix, suffix, выражение SQL)]): все счетчики
+    с одинаковой группировкой считаются одним запросом.
+    """
+    queries = {}
+    for prefix, columns, suffix, masks in TIME_INDEX_FAMILIES:
+        condition = ' AND '.join(f'({predicate_sql(mask)})' for mask in masks)
+        value = f"SUM({condition})" if masks else "COUNT(*)"
+        queries.setdefault(tuple(columns), []).append((prefix, suffix, value))
+    located = "x1 IS NOT NULL AND y1 IS NOT NULL"
+    queries[('player',)] += [
+        (('player_positions',), ('x_sum',), f"TOTAL(CASE WHEN {located} THEN x1 END)"),
+        (('player_positions',), ('y_sum',), f"TOTAL(CASE WHEN {located} THEN y1 END)"),
+        (('player_positions',), ('events',), f"SUM({located})"),
+    ]
+    return list(queries.items())
+
+STORE_COUNT_QUERIES = _store_count_queries()
+
+# Вспомогательная функция: значения столбца для записи в SQLite (пропуски -> NULL)
+def _sql_values(values):
+    values = pd.Series(values).astype(object)
+    return [None if pd.isna(value) else (value.item() if isinstance(value, np.generic) else value)
+            for value in values]
+
+# Локальное хранилище событий матчей в SQLite
+class EventStore:
+    """
+    База SQLite с событиями сохраненных матчей. Матч загружается один раз
+    (ключ - хэш исходного файла); при загрузке счетчики team_stats считаются
+    запросами GROUP BY по событиям и сохраняются в таблицу counters. Статистика
+    одного или нескольких матчей - сумма счетчиков по индексу, без чтения
+    и обхода таблицы событий в pandas.
+    У каждого потока свое соединение; база работает в режиме WAL, поэтому
+    чтение не блокируется записью новых матчей.
+    """
+    
+    def __init__(self, path=EVENT_STORE_PATH):
+        self.path = path
+        self._local = threading.local()
+    
+    def _connect(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            if self.path != ':memory:':
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(EVENT_STORE_SCHEMA)
+            self._local.connection = connection
+        return connection
+    
+    def _match_ids(self, match_keys):
+        """
+        Возвращает match_id для ключей матчей (в порядке ключей).
+        Отсутствующий в базе матч - ошибка KeyError.
+        """
+        placeholders = ', '.join('?' * len(match_keys))
+        rows = dict(self._connect().execute(
+            f"SELECT match_key, match_id FROM matches WHERE match_key IN ({placeholders})", list(match_keys)
+        ).fetchall())
+        missing = [key for key in match_keys if key not in rows]
+        if missing:
+            raise KeyError(f"Матчи отсутствуют в базе: {', '.join(missing)}")
+        return [rows[key] for key in match_keys]
+    
+    def has_match(self, match_key):
+        return self._connect().execute(
+            "SELECT 1 FROM matches WHERE match_key = ?", (match_key,)
+        ).fetchone() is not None
+    
+    def ingest(self, df, match_key, name=''):
+        """
+        Сохраняет таблицу событий матча, его цепочки владения и счетчики.
+        Если матч с таким ключом уже есть в базе, повторная запись не выполняется.
+        Возвращает True, если матч был добавлен.
+        """
+        if self.has_match(match_key):
+            return False
+        events = _event_frame(df)
+        values = {column: _sql_values(events[column]) for column in STORE_TEXT_COLUMNS}
+        values['half'] = _sql_values(events['half'])
+        values['pass_bin'] = events['pass_bin'].tolist()
+        values['x1'] = _sql_values(events['x1'])
+        values['y1'] = _sql_values(events['y1'])
+        for source, column in (('X2', 'x2'), ('Y2', 'y2'), ('Time', 'time'), ('Match Time', 'match_time')):
+            values[column] = _sql_values(df[source]) if source in df.columns else [None] * len(df)
+        chains = segment_possession_chains(df)
+        columns = [column for column in df.columns if column in STORE_SOURCE_COLUMNS]
+        
+        connection = self._connect()
+        with connection:
+            cursor = connection.execute(
+                "INSERT OR IGNORE INTO matches (match_key, name, n_events, columns, schema_problems) VALUES (?, ?, ?, ?, ?)",
+                (match_key, name, len(df), json.dumps(columns), json.dumps(df.attrs.get('schema_problems', {})))
+            )
+            if cursor.rowcount == 0:
+                return False
+            match_id = cursor.lastrowid
+            names = ', '.join(f'"{column}"' for column in values)
+            connection.executemany(
+                f"INSERT INTO events (match_id, seq, {names}) VALUES ({', '.join('?' * (len(values) + 2))})",
+                zip([match_id] * len(df), range(len(df)), *values.values())
+            )
+            connection.executemany(
+                "INSERT INTO chains (match_id, start, team, half, length, duration, outcome) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                zip([match_id] * len(chains), chains['start'].tolist(), _sql_values(chains['team']),
+                    _sql_values(chains['half']), chains['length'].tolist(), chains['duration'].tolist(),
+                    chains['outcome'].tolist())
+            )
+            connection.executemany(
+                "INSERT INTO counters (match_id, path, value, first_seq) VALUES (?, ?, ?, ?)",
+                self._aggregate_counters(connection, match_id)
+            )
+        return True
+    
+    def list_matches(self):
+        """
+        Возвращает DataFrame сохраненных матчей: match_key, name, n_events, ingested_at.
+        """
+        return pd.read_sql_query(
+            "SELECT match_key, name, n_events, ingested_at FROM matches ORDER BY match_id", self._connect()
+        )
+    
+    def _aggregate_counters(self, connection, match_id):
+        """
+        Считает счетчики team_stats матча агрегирующими запросами по таблицам
+        events и chains. Возвращает строки (match_id, путь в JSON, значение,
+        позиция первого события группы) для таблицы counters; одинаковые пути
+        разных групп счетчиков складываются.
+        """
+        totals = {}
+        
+        # Вспомогательная функция: добавление значения к счетчику пути
+        def add(path, value, first):
+            key = json.dumps(path)
+            total, earliest = totals.get(key, (0, first))
+            totals[key] = (total + (value or 0), min(earliest, first))
+        
+        for columns, counters in STORE_COUNT_QUERIES:
+            keys = ', '.join(['team', *(f'"{column}"' for column in columns)])
+            width = len(columns) + 1
+            for row in connection.execute(
+                    f"SELECT {keys}, MIN(seq), {', '.join(value for _, _, value in counters)} FROM events "
+                    f"WHERE match_id = ? GROUP BY {keys}", (match_id,)):
+                key, first = row[:width], row[width]
+                for (prefix, suffix, _), value in zip(counters, row[width + 1:]):
+                    add((key[0], *prefix, *key[1:], *(suffix if suffix is not None else (None,))), value, first)
+        
+        # Счетчики цепочек владения относятся к первому событию цепочки
+        chain_queries = [
+            ("team", "TOTAL(duration), COUNT(*), SUM(length)", "",
+             lambda key: [(key[0], 'possession_time'), (key[0], 'possession_chains'), (key[0], 'chain_events')]),
+            ("team, outcome", "COUNT(*)", "", lambda key: [(key[0], 'chain_outcomes', key[1])]),
+            ("team, half", "TOTAL(duration)", "AND half IS NOT NULL",
+             lambda key: [(key[0], 'half_stats', int(key[1]), 'possession_time')]),
+        ]
+        for keys, aggregates, condition, to_paths in chain_queries:
+            width = keys.count(',') + 1
+            for row in connection.execute(
+                    f"SELECT {keys}, MIN(start), {aggregates} FROM chains WHERE match_id = ? {condition} "
+                    f"GROUP BY {keys}", (match_id,)):
+                for path, value in zip(to_paths(row[:width]), row[width + 1:]):
+                    add(path, value, row[width])
+        return [(match_id, path, value, first) for path, (value, first) in totals.items()]
+    
+    def team_stats(self, match_keys):
+        """
+        Возвращает team_stats (с процентами) по одному или нескольким матчам:
+        один запрос GROUP BY по счетчикам, посчитанным при загрузке матчей,
+        и выборка координат ударов по индексу.
+        """
+        if isinstance(match_keys, str):
+            match_keys = [match_keys]
+        match_ids = self._match_ids(match_keys)
+        where = f"match_id IN ({', '.join('?' * len(match_ids))})"
+        connection = self._connect()
+        
+        # Порядок путей (и команд) - порядок первого появления в матчах
+        rows = connection.execute(
+            f"SELECT path, SUM(value) FROM counters WHERE {where} "
+            f"GROUP BY path ORDER BY MIN(match_id * 4294967296 + first_seq)", match_ids
+        ).fetchall()
+        paths = [tuple(json.loads(path)) for path, _ in rows]
+        teams = list(dict.fromkeys(path[0] for path in paths))
+        team_stats = _stats_from_paths(teams, paths, [value for _, value in rows])
+        
+        # Координаты ударов в порядке матча
+        for team, x, y, result, player in connection.execute(
+                f"SELECT team, x1, y1, Results, player FROM events WHERE {where} AND event = 'Shot' "
+                f"AND x1 IS NOT NULL AND y1 IS NOT NULL ORDER BY match_id, seq", match_ids):
+            shot_points = team_stats[team]['shot_points']
+            shot_points['x'].append(x)
+            shot_points['y'].append(y)
+            shot_points['result'].append(result)
+            shot_points['player'].append(player)
+        
+        return finalize_team_stats(team_stats)
+    
+    def load_events(self, match_key):
+        """
+        Восстанавливает таблицу событий матча в формате read_match_csv
+        (столбцы исходного файла, типы EVENT_SCHEMA, зоны поля).
+        """
+        match_id, = self._match_ids([match_key])
+        connection = self._connect()
+        columns, problems = connection.execute(
+            "SELECT columns, schema_problems FROM matches WHERE match_id = ?", (match_id,)
+        ).fetchone()
+        columns = json.loads(columns)
+        
+        # Пустая строка в текстовых столбцах рабочей таблицы - пропуск в исходном файле
+        selected = []
+        for column in columns:
+            stored = f'"{STORE_SOURCE_COLUMNS[column]}"'
+            if STORE_SOURCE_COLUMNS[column] in STORE_TEXT_COLUMNS:
+                stored = f"NULLIF({stored}, '')"
+            selected.append(f'{stored} AS "{column}"')
+        df = pd.read_sql_query(
+            f"SELECT {', '.join(selected)} FROM events WHERE match_id = ? ORDER BY seq", connection, params=(match_id,)
+        )
+        df = prepare_event_table(df)
+        df.attrs['schema_problems'] = json.loads(problems)
+        return df
+    
+    def event_counts(self, by, match_keys=None, **filters):
+        """
+        Количество событий по столбцам by (например, ['team', 'player']) по всем
+        или выбранным матчам. filters - равенство столбцу или список значений:
+        event_counts(['player'], event='Shot', Results=['Goal', 'On Target']).
+        """
+        allowed = set(STORE_TEXT_COLUMNS) | {'half', 'match_key'}
+        unknown = [column for column in [*by, *filters] if column not in allowed]
+        if unknown:
+            raise ValueError(f"Неизвестные столбцы: {', '.join(unknown)}")
+        
+        conditions = []
+        params = []
+        if match_keys is not None:
+            match_ids = self._match_ids(list(match_keys))
+            conditions.append(f"events.match_id IN ({', '.join('?' * len(match_ids))})")
+            params += match_ids
+        for column, selected in filters.items():
+            selected = list(selected) if isinstance(selected, (list, tuple, set)) else [selected]
+            conditions.append(f'"{column}" IN ({", ".join("?" * len(selected))})')
+            params += selected
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        keys = ', '.join(f'"{column}"' for column in by)
+        return pd.read_sql_query(
+            f"SELECT {keys}, COUNT(*) AS count FROM events JOIN matches USING (match_id) {where} "
+            f"GROUP BY {keys} ORDER BY count DESC", self._connect(), params=params
+        )
+
+# Столбцы, по которым строится инвертированный индекс событий: столбец -> подпись
+EVENT_INDEX_COLUMNS = {
+    'Team_1': 'Команда',
+    'Player_Name_1': 'Игрок',
+    'Event_Catalog': 'Событие',
+    'Type': 'Тип',
+    'Half': 'Период',
+    'Results': 'Результат',
+    'Pressure': 'Давление',
+    'Foot_Used': 'Нога',
+    'Zone_End_3x3': 'Зона',
+}
+
+# Количество единичных битов для каждого значения байта
+POPCOUNT_TABLE = np.array([bin(value).count('1') for value in range(256)], dtype=np.uint8)
+
+# Инвертированный индекс событий с битовыми масками
+class EventIndex:
+    """
+    Инвертированный индекс по категориальным столбцам событий. Каждый столбец
+    хранится как целочисленные коды, а для каждого значения заранее построена
+    упакованная битовая маска (1 бит на событие). Любая комбинация фильтров
+    вычисляется побитовыми AND/OR без повторной агрегации событий.
+    """
+    
+    def __init__(self, n_events, codes, values, bitmaps):
+        self.n_events = n_events
+        self.codes = codes
+        self.values = values
+        self.bitmaps = bitmaps
+    
+    @classmethod
+    def from_events(cls, df):
+        """
+        Строит индекс по столбцам EVENT_INDEX_COLUMNS, присутствующим в df.
+        """
+        codes = {}
+        values = {}
+        bitmaps = {}
+        for column in EVENT_INDEX_COLUMNS:
+            if column not in df.columns:
+                continue
+            column_codes, column_values = pd.factorize(df[column], sort=True)
+            codes[column] = column_codes.astype(np.int32)
+            values[column] = list(column_values)
+            
+            # Маски строятся за один проход: события группируются по коду сортировкой
+            order = np.argsort(column_codes, kind='stable')
+            bounds = np.searchsorted(column_codes[order], np.arange(len(column_values) + 1))
+            masks = []
+            for code in range(len(column_values)):
+                mask = np.zeros(len(df), dtype=bool)
+                mask[order[bounds[code]:bounds[code + 1]]] = True
+                masks.append(np.packbits(mask))
+            bitmaps[column] = masks
+        return cls(len(df), codes, values, bitmaps)
+    
+    def mask(self, filters):
+        """
+        Возвращает упакованную битовую маску событий, подходящих под фильтры.
+        
+        Args:
+            filters: Словарь столбец -> значение или список значений. Значения
+                одного столбца объединяются через OR, разные столбцы - через AND.
+                Пустой список означает отсутствие фильтра по столбцу.
+        """
+        result = None
+        for column, selected in filters.items():
+            if isinstance(selected, (list, tuple, set)):
+                if not selected:
+                    continue
+            else:
+                selected = [selected]
+            lookup = {value: code for code, value in enumerate(self.values.get(column, []))}
+            column_mask = np.zeros((self.n_events + 7) // 8, dtype=np.uint8)
+            for value in selected:
+                if value in lookup:
+                    column_mask |= self.bitmaps[column][lookup[value]]
+            result = column_mask if result is None else result & column_mask
+        if result is None:
+            # Без фильтров подходят все события (лишние биты в конце обнуляются)
+            result = np.packbits(np.ones(self.n_events, dtype=bool))
+        return result
+    
+    def count(self, filters):
+        """
+        Возвращает количество событий, подходящих под фильтры.
+        """
+        return int(POPCOUNT_TABLE[self.mask(filters)].sum(dtype=np.int64))
+    
+    def counts_by(self, column, filters):
+        """
+        Возвращает Series с количеством подходящих событий по значениям столбца column
+        (по убыванию, без нулевых значений).
+        """
+        selected = np.unpackbits(self.mask(filters), count=self.n_events).view(bool)
+        column_codes = self.codes[column][selected]
+        counts = np.bincount(column_codes[column_codes >= 0], minlength=len(self.values[column]))
+        series = pd.Series(counts, index=self.values[column])
+        return series[series > 0].sort_values(ascending=False, kind='stable')
+    
+    def __sizeof__(self):
+        return (sum(codes.nbytes for codes in self.codes.values())
+                + sum(mask.nbytes for masks in self.bitmaps.values() for mask in masks)
+                + estimate_size(self.values))
+
+# Сеть передач команды: разреженная матрица смежности по целым ID игроков
+class PassNetwork:
+    """
+    Сеть успешных пасов одной команды. Игроки пронумерованы целыми ID (в порядке
+    первого появления), связи хранятся в разреженном виде CSR: для игрока i его
+    получатели - indices[indptr[i]:indptr[i + 1]], количество пасов - weights
+    в тех же позициях. Узлы располагаются в средних позициях игроков по X1/Y1.
+    """
+    __slots__ = ('players', 'x', 'y', 'indptr', 'indices', 'weights')
+    
+    def __init__(self, players, x, y, indptr, indices, weights):
+        self.players = players
+        self.x = x
+        self.y = y
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = weights
+    
+    @property
+    def n_players(self):
+        return len(self.players)
+    
+    @property
+    def sources(self):
+        """
+        ID отдающего игрока для каждой связи (в порядке indices).
+        """
+        return np.repeat(np.arange(self.n_players), np.diff(self.indptr))
+    
+    @classmethod
+    def from_team_stats(cls, stats, min_passes=1):
+        """
+        Строит сеть по pass_combinations и player_positions статистики одной команды.
+        Учитываются связи не менее чем из min_passes пасов; в сеть входят только
+        игроки с такими связями. Игроки без координат получают позицию NaN.
+        """
+        pairs = [(player, receiver, count)
+                 for player, targets in stats.get('pass_combinations', {}).items()
+                 for receiver, count in targets.items() if count >= min_passes]
+        if not pairs:
+            empty = np.zeros(0)
+            return cls([], empty, empty, np.zeros(1, dtype=np.int64), np.zeros(0, dtype=np.int64), empty)
+        
+        # Целые ID игроков: общая нумерация отдающих и получающих пас
+        passers, receivers, counts = zip(*pairs)
+        codes, players = pd.factorize(pd.Series(passers + receivers, dtype=object), sort=False)
+        sources, targets = codes[:len(pairs)], codes[len(pairs):]
+        order = np.lexsort((targets, sources))
+        n_players = len(players)
+        indptr = np.zeros(n_players + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=n_players), out=indptr[1:])
+        
+        # Средние позиции игроков
+        positions = stats.get('player_positions', {})
+        x = np.full(n_players, np.nan)
+        y = np.full(n_players, np.nan)
+        for player_id, player in enumerate(players):
+            position = positions.get(player)
+            if position and position['events']:
+                x[player_id] = position['x_sum'] / position['events']
+                y[player_id] = position['y_sum'] / position['events']
+        
+        return cls(list(players), x, y, indptr, targets[order].astype(np.int64),
+                   np.asarray(counts, dtype=float)[order])
+    
+    def edges(self):
+        """
+        Возвращает список связей (игрок, получатель, количество пасов).
+        """
+        return [(self.players[source], self.players[target], int(weight))
+                for source, target, weight in zip(self.sources, self.indices, self.weights)]
+    
+    def passes_out(self):
+        return np.bincount(self.sources, weights=self.weights, minlength=self.n_players)
+    
+    def passes_in(self):
+        return np.bincount(self.indices, weights=self.weights, minlength=self.n_players)
+    
+    def degree(self):
+        """
+        Количество партнеров каждого игрока (связь в любую сторону считается один раз).
+        """
+        sources = self.sources
+        external = sources != self.indices
+        low = np.minimum(sources, self.indices)[external]
+        high = np.maximum(sources, self.indices)[external]
+        pairs = np.unique(low * self.n_players + high)
+        return np.bincount(np.concatenate([pairs // self.n_players, pairs % self.n_players]),
+                           minlength=self.n_players)
+    
+    def pagerank(self, damping=0.85, tolerance=1e-10, max_iterations=100):
+        """
+        Взвешенный PageRank: мяч переходит к партнеру с вероятностью, пропорциональной
+        числу пасов ему. Игроки без отданных пасов передают вес всем равномерно.
+        """
+        n_players = self.n_players
+        if n_players == 0:
+            return np.zeros(0)
+        sources = self.sources
+        out_weight = self.passes_out()
+        transition = self.weights / out_weight[sources]
+        dangling = out_weight == 0
+        rank = np.full(n_players, 1 / n_players)
+        for _ in range(max_iterations):
+            spread = np.bincount(self.indices, weights=rank[sources] * transition, minlength=n_players)
+            updated = (1 - damping) / n_players + damping * (spread + rank[dangling].sum() / n_players)
+            converged = np.abs(updated - rank).sum() < tolerance
+            rank = updated
+            if converged:
+                break
+        return rank
+    
+    def betweenness(self):
+        """
+        Взвешенная центральность по посредничеству (алгоритм Брандеса): доля
+        кратчайших путей между другими игроками, проходящих через игрока.
+        Длина связи - 1 / количество пасов, частые связи считаются короче.
+        Значения нормированы на (n - 1)(n - 2).
+        """
+        n_players = self.n_players
+        centrality = np.zeros(n_players)
+        if n_players < 3:
+            return centrality
+        indptr = self.indptr.tolist()
+        indices = self.indices.tolist()
+        lengths = (1 / self.weights).tolist()
+        
+        for source in range(n_players):
+            distance = [math.inf] * n_players
+            paths = [0.0] * n_players
+            predecessors = [[] for _ in range(n_players)]
+            distance[source] = 0.0
+            paths[source] = 1.0
+            settled = []
+            heap = [(0.0, source)]
+            done = [False] * n_players
+            while heap:
+                current, player = heapq.heappop(heap)
+                if done[player]:
+                    continue
+                done[player] = True
+                settled.append(player)
+                for position in range(indptr[player], indptr[player + 1]):
+                    target = indices[position]
+                    if done[target]:
+                        continue
+                    candidate = current + lengths[position]
+                    if candidate < distance[target] - 1e-12:
+                        distance[target] = candidate
+                        paths[target] = paths[player]
+                        predecessors[target] = [player]
+                        heapq.heappush(heap, (candidate, target))
+                    elif abs(candidate - distance[target]) <= 1e-12:
+                        paths[target] += paths[player]
+                        predecessors[target].append(player)
+            
+            # Накопление зависимостей в порядке убывания расстояния
+            dependency = [0.0] * n_players
+            for player in reversed(settled):
+                for predecessor in predecessors[player]:
+                    dependency[predecessor] += paths[predecessor] / paths[player] * (1 + dependency[player])
+                if player != source:
+                    centrality[player] += dependency[player]
+        
+        return centrality / ((n_players - 1) * (n_players - 2))
+    
+    def metrics(self):
+        """
+        Возвращает таблицу игроков: средняя позиция, отданные и полученные пасы,
+        число партнеров, PageRank и центральность по посредничеству.
+        """
+        return pd.DataFrame({
+            'player': self.players,
+            'x': self.x,
+            'y': self.y,
+            'passes_out': self.passes_out().astype(int),
+            'passes_in': self.passes_in().astype(int),
+            'degree': self.degree(),
+            'pagerank': self.pagerank(),
+            'betweenness': self.betweenness(),
+        })
+    
+    def __sizeof__(self):
+        return (self.x.nbytes + self.y.nbytes + self.indptr.nbytes + self.indices.nbytes
+                + self.weights.nbytes + estimate_size(self.players))
+
+# Функция для расчета метрик сетей передач всех команд
+def pass_network_table(team_stats, min_passes=1):
+    """
+    Возвращает общую таблицу PassNetwork.metrics по всем командам (столбец team)
+    для сравнения игроков разных команд, например за сезон.
+    """
+    tables = []
+    for team, stats in team_stats.items():
+        table = PassNetwork.from_team_stats(stats, min_passes).metrics()
+        table.insert(0, 'team', team)
+        tables.append(table)
+    if not tables:
+        return pd.DataFrame(columns=['team', 'player', 'x', 'y', 'passes_out', 'passes_in',
+                                     'degree', 'pagerank', 'betweenness'])
+    return pd.concat(tables, ignore_index=True)
+
+# Категории аналитических выводов (в порядке отображения)
+INSIGHT_CATEGORIES = ['strengths', 'weaknesses', 'tactics', 'key_players', 'improvement_areas']
+
+# Количество выводов в каждой категории по уровню детализации (без ограничения - все выводы)
+INSIGHT_DETAIL_LIMITS = {"Минимальная": 1, "Средняя": 2}
+
+# Таблица правил аналитических выводов: (категория, условие, шаблон текста).
+# Условие - выражение DataFrame.eval над столбцами insight_features, шаблон
+# заполняется значениями той же строки. Внутри категории выводы идут в порядке правил.
+INSIGHT_RULES = [
+    # Эффективность атаки
+    ('strengths', "shots > 0 and shot_accuracy > 60",
+     "Высокая точность ударов ({shot_accuracy}%). Команда эффективно создаёт качественные моменты."),
+    ('weaknesses', "shots > 0 and shot_accuracy < 30",
+     "Низкая точность ударов ({shot_accuracy}%). Стоит поработать над качеством завершения атак."),
+    ('improvement_areas', "shots > 0 and shot_accuracy < 30",
+     "Точность ударов и выбор позиции для завершения атак"),
+    
+    # Конверсия моментов
+    ('strengths', "shots > 0 and shots_on_target > 0 and goal_conversion > 30",
+     "Высокая реализация моментов ({goal_conversion:.1f}% ударов в створ превращаются в голы). "
+     "Команда эффективно завершает атаки."),
+    ('weaknesses', "shots > 0 and shots_on_target > 0 and goal_conversion < 10",
+     "Низкая реализация моментов ({goal_conversion:.1f}% ударов в створ превращаются в голы). "
+     "Необходимо улучшить завершение атак."),
+    ('improvement_areas', "shots > 0 and shots_on_target > 0 and goal_conversion < 10",
+     "Улучшение реализации голевых моментов"),
+    
+    # Точность пасов
+    ('strengths', "passes > 0 and pass_accuracy > 80",
+     "Высокая точность пасов ({pass_accuracy}%). Команда хорошо контролирует мяч."),
+    ('weaknesses', "passes > 0 and pass_accuracy < 60",
+     "Низкая точность пасов ({pass_accuracy}%). Стоит поработать над контролем мяча."),
+    ('improvement_areas', "passes > 0 and pass_accuracy < 60",
+     "Улучшение точности пасов и контроля мяча"),
+    
+    # Пасы под давлением
+    ('strengths', "passes > 0 and pressure_percentage > 50 and pass_accuracy > 70",
+     "Команда хорошо справляется с прессингом соперника "
+     "({pressure_percentage}% пасов под давлением, точность {pass_accuracy}%)."),
+    ('weaknesses', "passes > 0 and pressure_percentage > 50 and pass_accuracy < 60",
+     "Команда испытывает сложности при прессинге соперника "
+     "({pressure_percentage}% пасов под давлением, точность {pass_accuracy}%)."),
+    ('improvement_areas', "passes > 0 and pressure_percentage > 50 and pass_accuracy < 60",
+     "Улучшение игры под прессингом"),
+    
+    # Использование ног
+    ('tactics', "passes > 0 and foot_actions > 0 and right_foot_pct > 80",
+     "Команда очень сильно полагается на правую ногу ({right_foot_pct:.1f}%). "
+     "Развитие игры левой ногой может добавить непредсказуемости."),
+    ('improvement_areas', "passes > 0 and foot_actions > 0 and right_foot_pct > 80",
+     "Развитие игры левой ногой"),
+    ('tactics', "passes > 0 and foot_actions > 0 and left_foot_pct > 80",
+     "Команда очень сильно полагается на левую ногу ({left_foot_pct:.1f}%). "
+     "Развитие игры правой ногой может добавить непредсказуемости."),
+    ('improvement_areas', "passes > 0 and foot_actions > 0 and left_foot_pct > 80",
+     "Развитие игры правой ногой"),
+    ('strengths', "passes > 0 and foot_actions > 0 and right_foot_pct > 30 and left_foot_pct > 30",
+     "Команда хорошо использует обе ноги в игре (правая: {right_foot_pct:.1f}%, левая: {left_foot_pct:.1f}%), "
+     "что делает её атаки более разнообразными."),
+    
+    # Сравнение ударов с соперником
+    ('strengths', "has_opponent and shots > opponent_shots * 1.5",
+     "Значительное преимущество по ударам ({shots} против {opponent_shots}). Команда доминировала в атаке."),
+    ('tactics', "has_opponent and shots > opponent_shots * 1.5",
+     "Продолжать атакующий стиль игры, который приносит много моментов."),
+    ('weaknesses', "has_opponent and shots * 1.5 < opponent_shots",
+     "Значительное отставание по ударам ({shots} против {opponent_shots}). Команда уступила в атаке."),
+    ('tactics', "has_opponent and shots * 1.5 < opponent_shots",
+     "Необходимо улучшить создание атакующих моментов."),
+    
+    # Сравнение по таймам
+    ('tactics', "has_opponent and first_half_shots * 1.5 < second_half_shots",
+     "Команда значительно усилила атаку во втором тайме "
+     "({first_half_shots} ударов в первом тайме, {second_half_shots} во втором)."),
+    ('tactics', "has_opponent and first_half_shots > second_half_shots * 1.5",
+     "Команда ослабила атаку во втором тайме "
+     "({first_half_shots} ударов в первом тайме, {second_half_shots} во втором)."),
+    ('improvement_areas', "has_opponent and first_half_shots > second_half_shots * 1.5",
+     "Поддержание интенсивности атаки на протяжении всего матча"),
+    
+    # Ключевые игроки
+    ('key_players', "top_scorer_goals > 0",
+     "{top_scorer} - лучший бомбардир команды с {top_scorer_goals} голами."),
+    ('key_players', "top_passer_passes > 0",
+     "{top_passer} - ключевой распасовщик с {top_passer_passes} пасами (точность {top_passer_accuracy}%)."),
+    ('key_players', "top_defender_actions > 0",
+     "{top_defender} - лучший в отборе мяча с {top_defender_actions} успешными действиями."),
+    
+    # Действия под давлением
+    ('weaknesses', "pressured_actions > 0 and unpressured_actions > 0 and pressure_success_drop > 30",
+     "Значительное снижение успешности действий под давлением "
+     "({pressure_success_rate:.1f}% против {no_pressure_success_rate:.1f}% без давления)."),
+    ('improvement_areas', "pressured_actions > 0 and unpressured_actions > 0 and pressure_success_drop > 30",
+     "Улучшение игры под прессингом"),
+    ('strengths', "pressured_actions > 0 and unpressured_actions > 0 and pressure_success_drop < 10",
+     "Команда хорошо действует под давлением "
+     "({pressure_success_rate:.1f}% против {no_pressure_success_rate:.1f}% без давления)."),
+    
+    # Игра вратаря
+    ('tactics', "gk_actions > 0 and gk_long_passes > gk_short_passes * 2",
+     "Вратарь предпочитает длинные передачи ({gk_long_passes} длинных против {gk_short_passes} коротких). "
+     "Команда стремится быстро переходить к атаке, минуя центр поля."),
+    ('tactics', "gk_actions > 0 and gk_short_passes > gk_long_passes * 2",
+     "Вратарь предпочитает короткие передачи ({gk_short_passes} коротких против {gk_long_passes} длинных). "
+     "Команда стремится контролировать мяч и строить атаки через розыгрыш от вратаря."),
+    ('key_players', "gk_actions > 0 and gk_saves > 5",
+     "Вратарь совершил {gk_saves} сейвов, что указывает на его важную роль в защите."),
+]
+
+# Результаты действий, которые считаются успешными при анализе давления
+SUCCESSFUL_RESULTS = ('Successful', 'On Target', 'Goal')
+
+# Ключевые игроки: (столбцы признаков, показатель, порог отбора, дополнительный столбец игрока)
+KEY_PLAYER_FEATURES = [
+    (('top_scorer', 'top_scorer_goals'), 'goals', 0, None),
+    (('top_passer', 'top_passer_passes'), 'passes', 10, ('top_passer_accuracy', 'pass_accuracy')),
+    (('top_defender', 'top_defender_actions'), 'defensive_actions', 0, None),
+]
+
+# Вспомогательная функция: признаки одной команды для таблицы правил
+def _team_insight_features(stats, opponent_stats):
+    """
+    Возвращает словарь показателей команды и список строк по ее игрокам.
+    """
+    shots_on_target = stats.get('shots_on_target', 0)
+    foot_used = stats.get('foot_used', {})
+    foot_actions = sum(foot_used.values())
+    half_stats = stats.get('half_stats', {})
+    pressure_results = stats.get('pressure_results', {})
+    under_pressure = pressure_results.get('Yes', {})
+    no_pressure = pressure_results.get('No', {})
+    pressured_actions = sum(under_pressure.values())
+    unpressured_actions = sum(no_pressure.values())
+    gk_actions = stats.get('gk_actions', {})
+    
+    features = {
+        'shots': stats.get('shots', 0),
+        'shot_accuracy': stats.get('shot_accuracy', 0),
+        'shots_on_target': shots_on_target,
+        'goal_conversion': stats.get('goals', 0) / shots_on_target * 100 if shots_on_target else 0.0,
+        'passes': stats.get('passes', 0),
+        'pass_accuracy': stats.get('pass_accuracy', 0),
+        'pressure_percentage': stats.get('pressure_percentage', 0),
+        'foot_actions': foot_actions,
+        'right_foot_pct': foot_used.get('Right', 0) / foot_actions * 100 if foot_actions else 0.0,
+        'left_foot_pct': foot_used.get('Left', 0) / foot_actions * 100 if foot_actions else 0.0,
+        'has_opponent': bool(opponent_stats),
+        'opponent_shots': opponent_stats.get('shots', 0) if opponent_stats else 0,
+        'first_half_shots': half_stats.get(1, {}).get('shots', 0),
+        'second_half_shots': half_stats.get(2, {}).get('shots', 0),
+        'pressured_actions': pressured_actions,
+        'unpressured_actions': unpressured_actions,
+        'pressure_success_rate': (
+            sum(under_pressure.get(result, 0) for result in SUCCESSFUL_RESULTS) / pressured_actions * 100
+            if pressured_actions else 0.0
+        ),
+        'no_pressure_success_rate': (
+            sum(no_pressure.get(result, 0) for result in SUCCESSFUL_RESULTS) / unpressured_actions * 100
+            if unpressured_actions else 0.0
+        ),
+        'gk_actions': sum(gk_actions.values()),
+        'gk_long_passes': gk_actions.get('Long Pass', 0),
+        'gk_short_passes': gk_actions.get('Short Pass', 0),
+        'gk_saves': gk_actions.get('Save', 0),
+    }
+    features['pressure_success_drop'] = features['no_pressure_success_rate'] - features['pressure_success_rate']
+    
+    players = [
+        (player, player_stats.get('goals', 0), player_stats.get('passes', 0), player_stats.get('pass_accuracy', 0),
+         player_stats.get('tackles', 0) + player_stats.get('interceptions', 0))
+        for player, player_stats in stats.get('player_stats', {}).items()
+    ]
+    return features, players
+
+# Функция для построения таблицы признаков команд по нескольким матчам
+def insight_features(matches):
+    """
+    Собирает показатели всех команд всех матчей в один DataFrame с индексом
+    (match, team) - входные данные для таблицы правил INSIGHT_RULES.
+    Соперник команды - другая команда матча, если в матче ровно две команды.
+    
+    Args:
+        matches: Словарь ключ матча -> team_stats (с рассчитанными процентами)
+    """
+    entries = []
+    for match, team_stats in matches.items():
+        teams = list(team_stats.keys())
+        for i, team in enumerate(teams):
+            opponent_stats = team_stats[teams[1 - i]] if len(teams) == 2 else None
+            entries.append((match, team, team_stats[team], opponent_stats))
+    return _build_insight_features(entries)
+
+# Вспомогательная функция: таблица признаков по списку (матч, команда, статистика, соперник)
+def _build_insight_features(entries):
+    rows = []
+    player_rows = []
+    for position, (match, team, stats, opponent_stats) in enumerate(entries):
+        features, players = _team_insight_features(stats, opponent_stats)
+        rows.append(features)
+        player_rows.extend((position, *player) for player in players)
+    index = pd.MultiIndex.from_tuples([(match, team) for match, team, _, _ in entries], names=['match', 'team'])
+    features = pd.DataFrame(rows, index=index) if rows else pd.DataFrame(index=index)
+    
+    # Лучшие игроки команд: первый игрок с максимальным показателем (один groupby на показатель)
+    players = pd.DataFrame(player_rows, columns=['row', 'player', 'goals', 'passes', 'pass_accuracy',
+                                                 'defensive_actions'])
+    for (name_column, value_column), metric, threshold, extra in KEY_PLAYER_FEATURES:
+        candidates = players[players[metric] > threshold]
+        best = candidates.loc[candidates.groupby('row', sort=False)[metric].idxmax()]
+        names = np.full(len(entries), '', dtype=object)
+        values = np.zeros(len(entries), dtype=np.int64)
+        rows_with_best = best['row'].to_numpy(dtype=int)
+        names[rows_with_best] = best['player'].to_numpy()
+        values[rows_with_best] = best[metric].to_numpy()
+        features[name_column] = names
+        features[value_column] = values
+        if extra:
+            extra_values = np.zeros(len(entries), dtype=object)
+            extra_values[rows_with_best] = best[extra[1]].to_numpy()
+            features[extra[0]] = extra_values
+    return features
+
+# Функция для применения таблицы правил ко всем командам сразу
+def evaluate_insight_rules(features, detail_level="Средняя", rules=INSIGHT_RULES):
+    """
+    Проверяет каждое правило одним векторным выражением по всем строкам features.
+    Возвращает DataFrame со столбцами match, team, category, text: выводы
+    каждой команды в порядке правил, с ограничением по уровню детализации.
+    """
+    # Столбцы передаются в выражения как массивы NumPy; одинаковые условия проверяются один раз
+    columns = {column: features[column].to_numpy() for column in features.columns}
+    conditions = {}
+    positions = []
+    orders = []
+    categories = []
+    texts = []
+    for order, (category, condition, template) in enumerate(rules):
+        if condition not in conditions:
+            selected = pd.eval(condition, engine='python', local_dict=columns) if len(features) else []
+            conditions[condition] = np.flatnonzero(selected)
+        matched = conditions[condition]
+        if not len(matched):
+            continue
+        positions.append(matched)
+        orders.append(np.full(len(matched), order))
+        categories.extend([category] * len(matched))
+        
+        # Шаблон заполняется только используемыми в нем столбцами
+        fields = [field for _, field, _, _ in string.Formatter().parse(template) if field]
+        values = zip(*(columns[field][matched] for field in fields)) if fields else [()] * len(matched)
+        texts.extend(template.format(**dict(zip(fields, row))) for row in values)
+    
+    table = pd.DataFrame({
+        'row': np.concatenate(positions) if positions else np.zeros(0, dtype=int),
+        'order': np.concatenate(orders) if orders else np.zeros(0, dtype=int),
+        'category': categories,
+        'text': texts,
+    }).sort_values(['row', 'order'], kind='stable')
+    
+    # Ограничение количества выводов в категории
+    limit = INSIGHT_DETAIL_LIMITS.get(detail_level)
+    if limit is not None:
+        table = table[table.groupby(['row', 'category'], sort=False).cumcount() < limit]
+    
+    keys = features.index[table['row'].to_numpy(dtype=int)]
+    return pd.DataFrame({
+        'match': keys.get_level_values('match'),
+        'team': keys.get_level_values('team'),
+        'category': table['category'].to_numpy(),
+        'text': table['text'].to_numpy(),
+    })
+
+# Функция для генерации выводов по всем командам нескольких матчей
+def generate_league_insights(matches, detail_level="Средняя"):
+    """
+    Возвращает выводы всех команд всех матчей (таблица evaluate_insight_rules).
+    
+    Args:
+        matches: Словарь ключ матча -> team_stats
+        detail_level: Уровень детализации ("Минимальная", "Средняя", "Подробная")
+    """
+    return evaluate_insight_rules(insight_features(matches), detail_level)
+
+# Вспомогательная функция: выводы из таблицы в словари по категориям
+def _group_insights(table):
+    insights = {}
+    for team, category, text in zip(table['team'], table['category'], table['text']):
+        team_insights = insights.setdefault(team, {category: [] for category in INSIGHT_CATEGORIES})
+        team_insights[category].append(text)
+    return insights
+
+# Функция для генерации выводов по всем командам матча
+def generate_match_insights(team_stats, detail_level="Средняя"):
+    """
+    Возвращает словарь команда -> выводы (формат generate_team_insights)
+    для всех команд матча за один проход по таблице правил.
+    """
+    insights = _group_insights(generate_league_insights({0: team_stats}, detail_level))
+    return {team: insights.get(team, {category: [] for category in INSIGHT_CATEGORIES}) for team in team_stats}
+
+# Функция для генерации рекомендаций и аналитических выводов
+def generate_team_insights(team_stats, opponent_stats=None, detail_level="Средняя"):
+    """
+    Генерирует аналитические выводы и рекомендации для команды на основе статистики.
+    
+    Args:
+        team_stats: Статистика команды
+        opponent_stats: Статистика соперника (опционально)
+        detail_level: Уровень детализации ("Минимальная", "Средняя", "Подробная")
+    """
+    features = _build_insight_features([(0, 0, team_stats, opponent_stats)])
+    insights = _group_insights(evaluate_insight_rules(features, detail_level))
+    return insights.get(0, {category: [] for category in INSIGHT_CATEGORIES})
+
+# Функция для подготовки статистики к записи в JSON
+def to_json_stats(stats):
+    """
+    Рекурсивно приводит ключи словарей к строкам, а числа numpy - к числам Python.
+    """
+    if isinstance(stats, dict):
+        return {str(key): to_json_stats(value) for key, value in stats.items()}
+    if isinstance(stats, (list, tuple)):
+        return [to_json_stats(item) for item in stats]
+    if isinstance(stats, np.generic):
+        return stats.item()
+    return stats
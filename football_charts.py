@@ -0,0 +1,1358 @@
+"""
+Графики plotly для дашборда и пакетных отчетов: функции create_* строят фигуры
+по team_stats и не обращаются к streamlit.
+
+Модуль импортирует plotly, pandas и NumPy, но не интерфейс, поэтому процессы
+пакетных отчетов не загружают streamlit.
+"""
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import numpy as np
+import math  # Для расчетов в сетевой диаграмме
+
+from football_analysis import (
+    PITCH_LAYOUTS, get_zone_labels, get_pass_end_grid, smooth_grid, PassNetwork,
+)
+
+# Получаем цветовую схему на основе настроек
+def get_color_scheme(settings, teams=None):
+    if settings["color_scheme"] == "Командные цвета" and teams and len(teams) >= 2:
+        # Можно настроить цвета команд (пример с Шахтером - оранжево-черный)
+        team_colors = {
+            "Shakhtar": "#ff6600",  # Оранжевый для Шахтера
+            "Kozak": "#1e88e5"  # Синий для Козака (предположим)
+        }
+        
+        return {
+            "team1": team_colors.get(teams[0], "#ff6600"),
+            "team2": team_colors.get(teams[1], "#1e88e5")
+        }
+    elif settings["color_scheme"] == "Зеленый-Оранжевый":
+        return {"team1": "#15803d", "team2": "#c2410c"}
+    elif settings["color_scheme"] == "Пастельная":
+        return {"team1": "#0ea5e9", "team2": "#f472b6"}
+    else:  # Стандартная
+        return {"team1": "#0088FE", "team2": "#FF8042"}
+
+# Функция для создания графика статистики команд
+def create_team_stats_chart(team_stats, colors, height=400):
+    """
+    Создает график сравнения основной статистики команд.
+    """
+    teams = list(team_stats.keys())
+    
+    # Создаем данные для графика
+    data = []
+    for team in teams:
+        data.append({
+            'Команда': team,
+            'Показатель': 'Удары',
+            'Значение': team_stats[team].get('shots', 0)
+        })
+        data.append({
+            'Команда': team,
+            'Показатель': 'Удары в створ',
+            'Значение': team_stats[team].get('shots_on_target', 0)
+        })
+        data.append({
+            'Команда': team,
+            'Показатель': 'Голы',
+            'Значение': team_stats[team].get('goals', 0)
+        })
+        data.append({
+            'Команда': team,
+            'Показатель': 'Угловые',
+            'Значение': team_stats[team].get('corners', 0)
+        })
+        data.append({
+            'Команда': team,
+            'Показатель': 'Офсайды',
+            'Значение': team_stats[team].get('offsides', 0)
+        })
+        data.append({
+            'Команда': team,
+            'Показатель': 'Фолы',
+            'Значение': team_stats[team].get('fouls', 0)
+        })
+    
+    df = pd.DataFrame(data)
+    
+    # Создаем график
+    fig = px.bar(
+        df, 
+        x='Показатель', 
+        y='Значение', 
+        color='Команда',
+        barmode='group',
+        color_discrete_map={teams[0]: colors['team1'], teams[1]: colors['team2']} if len(teams) > 1 else None,
+        height=height
+    )
+    
+    fig.update_layout(
+        title='Основная статистика команд',
+        xaxis_title=None,
+        yaxis_title='Количество',
+        legend_title='Команда'
+    )
+    
+    return fig
+
+# Функция для создания графика пасов
+def create_pass_stats_chart(team_stats, colors, height=400):
+    """
+    Создает график статистики пасов команд.
+    """
+    teams = list(team_stats.keys())
+    
+    # Создаем данные для графика
+    data = []
+    for team in teams:
+        data.append({
+            'Команда': team,
+            'Показатель': 'Всего пасов',
+            'Значение': team_stats[team].get('passes', 0)
+        })
+        data.append({
+            'Команда': team,
+            'Показатель': 'Точность пасов (%)',
+            'Значение': team_stats[team].get('pass_accuracy', 0)
+        })
+        data.append({
+            'Команда': team,
+            'Показатель': 'Кроссы',
+            'Значение': team_stats[team].get('crosses', 0)
+        })
+        data.append({
+            'Команда': team,
+            'Показатель': 'Точность кроссов (%)',
+            'Значение': team_stats[team].get('cross_accuracy', 0)
+        })
+        data.append({
+            'Команда': team,
+            'Показатель': 'Пасы под давлением (%)',
+            'Значение': team_stats[team].get('pressure_percentage', 0)
+        })
+    
+    df = pd.DataFrame(data)
+    
+    # Создаем график
+    fig = px.bar(
+        df, 
+        x='Показатель', 
+        y='Значение', 
+        color='Команда',
+        barmode='group',
+        color_discrete_map={teams[0]: colors['team1'], teams[1]: colors['team2']} if len(teams) > 1 else None,
+        height=height
+    )
+    
+    fig.update_layout(
+        title='Статистика пасов',
+        xaxis_title=None,
+        yaxis_title='Значение',
+        legend_title='Команда'
+    )
+    
+    return fig
+
+# Функция для создания тепловой карты пасов
+def create_pass_heatmap(team_stats, team, color, height=500, resolution=(12, 8), smoothing=0):
+    """
+    Создает тепловую карту пасов на футбольном поле по координатам окончания пасов.
+    
+    Args:
+        resolution: Количество ячеек по длине и ширине поля (из PASS_HEATMAP_RESOLUTIONS)
+        smoothing: Сила гауссова сглаживания в ячейках (0 - без сглаживания)
+    """
+    # Получаем предрассчитанные ячейки базовой сетки
+    pass_end_bins = team_stats[team].get('pass_end_bins', {})
+    total_passes = sum(pass_end_bins.values()) if pass_end_bins else 0
+    
+    if total_passes == 0:
+        fig = go.Figure()
+        fig.update_layout(
+            title=f"Нет данных о координатах пасов для {team}",
+            height=height
+        )
+        return fig
+    
+    # Создаем фигуру
+    fig = go.Figure()
+    
+    # Сетка процентов пасов в каждой ячейке
+    nx, ny = resolution
+    z = smooth_grid(get_pass_end_grid(pass_end_bins, resolution), smoothing) / total_passes * 100
+    x = (np.arange(nx) + 0.5) * 100 / nx
+    y = (np.arange(ny) + 0.5) * 100 / ny
+    
+    # Добавляем тепловую карту
+    fig.add_trace(go.Heatmap(
+        z=z,
+        x=x,
+        y=y,
+        colorscale=[[0, 'rgba(255,255,255,0)'], [1, color]],
+        showscale=True,
+        colorbar=dict(title="% пасов"),
+        hovertemplate="X: %{x:.0f}, Y: %{y:.0f}<br>%{z:.1f}% пасов<extra></extra>"
+    ))
+    
+    # Добавляем контуры футбольного поля
+    # Внешние границы поля
+    fig.add_shape(type="rect", x0=0, y0=0, x1=100, y1=100, line=dict(color="white"), fillcolor="rgba(0,100,0,0.3)")
+    
+    # Центральный круг
+    fig.add_shape(type="circle", x0=40, y0=40, x1=60, y1=60, line=dict(color="white"))
+    
+    # Центральная линия
+    fig.add_shape(type="line", x0=0, y0=50, x1=100, y1=50, line=dict(color="white"))
+    
+    # Штрафные площади
+    fig.add_shape(type="rect", x0=0, y0=30, x1=16, y1=70, line=dict(color="white"))
+    fig.add_shape(type="rect", x0=84, y0=30, x1=100, y1=70, line=dict(color="white"))
+    
+    # Настраиваем макет
+    fig.update_layout(
+        title=f"Тепловая карта пасов - {team}",
+        height=height,
+        xaxis=dict(showgrid=False, zeroline=False, range=[0, 100], scaleanchor="y", scaleratio=1),
+        yaxis=dict(showgrid=False, zeroline=False, range=[0, 100]),
+        margin=dict(l=0, r=0, t=40, b=0)
+    )
+    
+    return fig
+
+# Функция для создания карты пасов по зонам поля
+def create_pass_zones_chart(team_stats, team, color, height=500, layout='3x3'):
+    """
+    Создает карту распределения пасов по зонам поля для выбранной схемы разбиения.
+    Использует счетчики зон, рассчитанные при анализе, без повторного прохода по событиям.
+    """
+    zone_counts = team_stats[team].get('layout_pass_zones', {}).get(layout, {})
+    total_passes = sum(zone_counts.values()) if zone_counts else 0
+    
+    if total_passes == 0:
+        fig = go.Figure()
+        fig.update_layout(
+            title=f"Нет данных о зонах пасов для {team}",
+            height=height
+        )
+        return fig
+    
+    # Сетка зон: строки - коридоры по ширине поля, столбцы - участки по длине
+    spec = PITCH_LAYOUTS[layout]
+    x_edges = [0] + list(spec['x_edges']) + [100]
+    y_edges = [0] + list(spec['y_edges']) + [100]
+    nx, ny = len(x_edges) - 1, len(y_edges) - 1
+    labels = np.array(get_zone_labels(layout)).reshape(nx, ny).T
+    z = np.array([[zone_counts.get(label, 0) for label in row] for row in labels]) / total_passes * 100
+    
+    fig = go.Figure(go.Heatmap(
+        z=z,
+        x=x_edges,
+        y=y_edges,
+        text=labels,
+        texttemplate="%{z:.1f}%",
+        colorscale=[[0, 'rgba(255,255,255,0)'], [1, color]],
+        showscale=True,
+        colorbar=dict(title="% пасов"),
+        hovertemplate="%{text}: %{z:.1f}% пасов<extra></extra>"
+    ))
+    
+    # Внешние границы поля и штрафные площади
+    fig.add_shape(type="rect", x0=0, y0=0, x1=100, y1=100, line=dict(color="white"), fillcolor="rgba(0,100,0,0.3)", layer="below")
+    fig.add_shape(type="rect", x0=0, y0=30, x1=16, y1=70, line=dict(color="white"))
+    fig.add_shape(type="rect", x0=84, y0=30, x1=100, y1=70, line=dict(color="white"))
+    
+    fig.update_layout(
+        title=f"Пасы по зонам поля ({spec['name']}) - {team}",
+        height=height,
+        xaxis=dict(showgrid=False, zeroline=False, range=[0, 100], scaleanchor="y", scaleratio=1),
+        yaxis=dict(showgrid=False, zeroline=False, range=[0, 100]),
+        margin=dict(l=0, r=0, t=40, b=0)
+    )
+    
+    return fig
+
+# Функция для создания диаграммы типов ударов
+def create_shot_types_chart(team_stats, team, color, height=400):
+    """
+    Создает диаграмму типов ударов команды.
+    """
+    shot_types = team_stats[team].get('shot_types', {})
+    
+    if not shot_types:
+        fig = go.Figure()
+        fig.update_layout(
+            title=f"Нет данных о типах ударов для {team}",
+            height=height
+        )
+        return fig
+    
+    # Преобразуем словарь в списки для построения графика
+    labels = list(shot_types.keys())
+    values = list(shot_types.values())
+    
+    # Создаем круговую диаграмму
+    fig = go.Figure(data=[go.Pie(
+        labels=labels,
+        values=values,
+        hole=.3,
+        marker_colors=[color, color+'90', color+'70', color+'50', color+'30']
+    )])
+    
+    fig.update_layout(
+        title=f"Типы ударов - {team}",
+        height=height
+    )
+    
+    return fig
+
+# Функция для создания диаграммы результатов ударов
+def create_shot_outcomes_chart(team_stats, team, color, height=400):
+    """
+    Создает диаграмму результатов ударов команды.
+    """
+    # Собираем данные о результатах ударов
+    shot_outcomes = {
+        'Голы': team_stats[team].get('goals', 0),
+        'Удары в створ (не голы)': team_stats[team].get('shots_on_target', 0) - team_stats[team].get('goals', 0),
+        'Удары мимо': team_stats[team].get('shots_off_target', 0),
+        'Заблокированные удары': team_stats[team].get('blocked_shots', 0)
+    }
+    
+    # Преобразуем словарь в списки для построения графика
+    labels = list(shot_outcomes.keys())
+    values = list(shot_outcomes.values())
+    
+    # Цвета для разных исходов
+    colors = ['#2ecc71', '#3498db', '#e74c3c', '#95a5a6']
+    
+    # Создаем круговую диаграмму
+    fig = go.Figure(data=[go.Pie(
+        labels=labels,
+        values=values,
+        hole=.3,
+        marker_colors=colors
+    )])
+    
+    fig.update_layout(
+        title=f"Результаты ударов - {team}",
+        height=height
+    )
+    
+    return fig
+
+# Функция для создания графика статистики игроков
+def create_player_stats_chart(team_stats, team, category, color, height=500, top_n=10):
+    """
+    Создает график статистики игроков по выбранной категории.
+    
+    Args:
+        team_stats: Статистика команд
+        team: Команда для анализа
+        category: Категория статистики ('goals', 'passes', 'pass_accuracy', etc.)
+        color: Цвет для графика
+        height: Высота графика
+        top_n: Количество лучших игроков для отображения
+    """
+    player_stats = team_stats[team].get('player_stats', {})
+    
+    # Категория для отображения
+    category_display = {
+        'goals': 'Голы',
+        'shots': 'Удары',
+        'passes': 'Пасы',
+        'pass_accuracy': 'Точность пасов (%)',
+        'tackles': 'Отборы',
+        'interceptions': 'Перехваты',
+        'goal_conversion': 'Конверсия ударов в голы (%)'
+    }
+    
+    # Создаем данные для графика
+    data = []
+    for player, stats in player_stats.items():
+        if category in stats:
+            data.append({
+                'Игрок': player,
+                category_display.get(category, category): stats[category]
+            })
+    
+    # Сортируем по убыванию и берем топ N
+    data = sorted(data, key=lambda x: x[category_display.get(category, category)], reverse=True)[:top_n]
+    
+    if not data:
+        fig = go.Figure()
+        fig.update_layout(
+            title=f"Нет данных о {category_display.get(category, category)} для игроков {team}",
+            height=height
+        )
+        return fig
+    
+    # Создаем DataFrame
+    df = pd.DataFrame(data)
+    
+# Создаем горизонтальную столбчатую диаграмму
+    fig = px.bar(
+        df,
+        y='Игрок',
+        x=category_display.get(category, category),
+        color_discrete_sequence=[color],
+        height=height,
+        orientation='h'
+    )
+    
+    fig.update_layout(
+        title=f"Топ-{len(data)} игроков по {category_display.get(category, category).lower()} - {team}",
+        xaxis_title=category_display.get(category, category),
+        yaxis_title=None
+    )
+    
+    return fig
+
+# Функция для получения названия периода матча
+def get_period_name(half):
+    """
+    Возвращает название периода: таймы 1-2, дополнительные таймы 3-4, серия пенальти 5.
+    """
+    if half in (1, 2):
+        return f"{half} тайм"
+    if half in (3, 4):
+        return f"{half - 2}-й доп. тайм"
+    if half == 5:
+        return "Серия пенальти"
+    return f"Период {half}"
+
+# Функция для создания графика сравнения статистики по таймам
+def create_half_comparison_chart(team_stats, colors, height=400):
+    """
+    Создает график сравнения статистики команд по таймам.
+    """
+    teams = list(team_stats.keys())
+    periods = sorted(set().union(*(team_stats[team]['half_stats'] for team in teams)))
+    
+    # Создаем данные для графика
+    data = []
+    for team in teams:
+        for half in periods:
+            half_stats = team_stats[team]['half_stats'].get(half, {})
+            
+            data.append({
+                'Команда': team,
+                'Тайм': get_period_name(half),
+                'Метрика': 'Удары',
+                'Значение': half_stats.get('shots', 0)
+            })
+            
+            data.append({
+                'Команда': team,
+                'Тайм': get_period_name(half),
+                'Метрика': 'Голы',
+                'Значение': half_stats.get('goals', 0)
+            })
+            
+            data.append({
+                'Команда': team,
+                'Тайм': get_period_name(half),
+                'Метрика': 'Пасы / 10',  # Делим на 10 для лучшей визуализации
+                'Значение': half_stats.get('passes', 0) / 10
+            })
+            
+            data.append({
+                'Команда': team,
+                'Тайм': get_period_name(half),
+                'Метрика': 'Точность пасов (%)',
+                'Значение': half_stats.get('passes', 0) > 0 and half_stats.get('successful_passes', 0) / half_stats.get('passes', 0) * 100 or 0
+            })
+    
+    df = pd.DataFrame(data)
+    
+    # Создаем график
+    fig = px.bar(
+        df, 
+        x='Метрика', 
+        y='Значение', 
+        color='Команда',
+        barmode='group',
+        facet_col='Тайм',
+        color_discrete_map={teams[0]: colors['team1'], teams[1]: colors['team2']} if len(teams) > 1 else None,
+        height=height
+    )
+    
+    fig.update_layout(
+        title='Сравнение по таймам',
+        xaxis_title=None,
+        yaxis_title='Значение',
+        legend_title='Команда'
+    )
+    
+    return fig
+
+# Названия итогов цепочек владения
+CHAIN_OUTCOME_NAMES = {
+    'Goal': 'Гол',
+    'Shot': 'Удар',
+    'Foul': 'Фол',
+    'Offside': 'Офсайд',
+    'Turnover': 'Потеря мяча',
+    'Period End': 'Конец тайма'
+}
+
+# Функция для создания графика итогов цепочек владения
+def create_possession_chains_chart(team_stats, colors, height=400):
+    """
+    Создает график распределения цепочек владения по итогам.
+    """
+    teams = list(team_stats.keys())
+    
+    # Создаем данные для графика
+    data = []
+    for team in teams:
+        outcomes = team_stats[team].get('chain_outcomes', {})
+        for outcome, name in CHAIN_OUTCOME_NAMES.items():
+            data.append({
+                'Команда': team,
+                'Итог': name,
+                'Цепочки': outcomes.get(outcome, 0)
+            })
+    
+    df = pd.DataFrame(data)
+    
+    # Создаем график
+    fig = px.bar(
+        df,
+        x='Итог',
+        y='Цепочки',
+        color='Команда',
+        barmode='group',
+        color_discrete_map={teams[0]: colors['team1'], teams[1]: colors['team2']} if len(teams) > 1 else None,
+        height=height
+    )
+    
+    fig.update_layout(
+        title='Итоги цепочек владения',
+        xaxis_title=None,
+        yaxis_title='Количество цепочек',
+        legend_title='Команда'
+    )
+    
+    return fig
+
+# Функция для создания графика по категориям событий
+def create_events_category_chart(team_stats, colors, height=500):
+    """
+    Создает график распределения событий по категориям для команд.
+    """
+    teams = list(team_stats.keys())
+    
+    # Создаем данные для графика
+    data = []
+    for team in teams:
+        event_categories = team_stats[team].get('event_categories', {})
+        for category, count in event_categories.items():
+            data.append({
+                'Команда': team,
+                'Категория': category,
+                'Количество': count
+            })
+    
+    # Сортируем данные
+    df = pd.DataFrame(data)
+    if df.empty:
+        fig = go.Figure()
+        fig.update_layout(
+            title="Нет данных о категориях событий",
+            height=height
+        )
+        return fig
+    
+    # Создаем график
+    fig = px.bar(
+        df,
+        x='Категория',
+        y='Количество',
+        color='Команда',
+        barmode='group',
+        color_discrete_map={teams[0]: colors['team1'], teams[1]: colors['team2']} if len(teams) > 1 else None,
+        height=height
+    )
+    
+    fig.update_layout(
+        title='Распределение событий по категориям',
+        xaxis_title=None,
+        yaxis_title='Количество',
+        legend_title='Команда'
+    )
+    
+    return fig
+
+# Функция для создания графика типов событий для выбранной категории
+def create_event_types_chart(team_stats, team, event_category, color, height=400):
+    """
+    Создает график типов событий для выбранной категории.
+    """
+    event_types = team_stats[team].get('event_types', {}).get(event_category, {})
+    
+    if not event_types:
+        fig = go.Figure()
+        fig.update_layout(
+            title=f"Нет данных о типах событий для категории '{event_category}' команды {team}",
+            height=height
+        )
+        return fig
+    
+    # Создаем данные для графика
+    data = []
+    for event_type, count in event_types.items():
+        data.append({
+            'Тип': event_type,
+            'Количество': count
+        })
+    
+    # Сортируем по количеству
+    data = sorted(data, key=lambda x: x['Количество'], reverse=True)
+    
+    # Создаем DataFrame
+    df = pd.DataFrame(data)
+    
+    # Создаем график
+    fig = px.bar(
+        df,
+        y='Тип',
+        x='Количество',
+        color_discrete_sequence=[color],
+        height=height,
+        orientation='h'
+    )
+    
+    fig.update_layout(
+        title=f"Типы событий для категории '{event_category}' - {team}",
+        xaxis_title='Количество',
+        yaxis_title=None
+    )
+    
+    return fig
+
+# Функция для создания графика использования ног
+def create_foot_usage_chart(team_stats, colors, height=400):
+    """
+    Создает график распределения использования ног по командам.
+    """
+    teams = list(team_stats.keys())
+    
+    # Создаем данные для графика
+    data = []
+    for team in teams:
+        foot_usage = team_stats[team].get('foot_used', {})
+        for foot, count in foot_usage.items():
+            # Преобразуем английские названия в русские для отображения
+            foot_display = {
+                'Right': 'Правая',
+                'Left': 'Левая',
+                'Head': 'Голова',
+                'Other': 'Другое'
+            }.get(foot, foot)
+            
+            data.append({
+                'Команда': team,
+                'Часть тела': foot_display,
+                'Количество': count
+            })
+    
+    # Создаем DataFrame
+    df = pd.DataFrame(data)
+    
+    if df.empty:
+        fig = go.Figure()
+        fig.update_layout(
+            title="Нет данных об использовании ног",
+            height=height
+        )
+        return fig
+    
+    # Создаем график
+    fig = px.bar(
+        df,
+        x='Часть тела',
+        y='Количество',
+        color='Команда',
+        barmode='group',
+        color_discrete_map={teams[0]: colors['team1'], teams[1]: colors['team2']} if len(teams) > 1 else None,
+        height=height
+    )
+    
+    fig.update_layout(
+        title='Использование частей тела при игре',
+        xaxis_title=None,
+        yaxis_title='Количество',
+        legend_title='Команда'
+    )
+    
+    return fig
+
+# Функция для создания графика использования ног по типам событий
+def create_foot_by_event_chart(team_stats, team, color, height=400):
+    """
+    Создает график распределения использования ног по типам событий.
+    """
+    foot_by_event = team_stats[team].get('foot_by_event', {})
+    
+    if not foot_by_event:
+        fig = go.Figure()
+        fig.update_layout(
+            title=f"Нет данных об использовании ног по типам событий для {team}",
+            height=height
+        )
+        return fig
+    
+    # Создаем данные для графика
+    data = []
+    for event, foot_data in foot_by_event.items():
+        for foot, count in foot_data.items():
+            # Преобразуем английские названия в русские для отображения
+            foot_display = {
+                'Right': 'Правая',
+                'Left': 'Левая',
+                'Head': 'Голова',
+                'Other': 'Другое'
+            }.get(foot, foot)
+            
+            data.append({
+                'Событие': event,
+                'Часть тела': foot_display,
+                'Количество': count
+            })
+    
+    # Создаем DataFrame
+    df = pd.DataFrame(data)
+    
+    # Создаем график
+    fig = px.bar(
+        df,
+        x='Событие',
+        y='Количество',
+        color='Часть тела',
+        barmode='stack',
+        height=height
+    )
+    
+    fig.update_layout(
+        title=f"Использование частей тела по типам событий - {team}",
+        xaxis_title=None,
+        yaxis_title='Количество',
+        legend_title='Часть тела'
+    )
+    
+    return fig
+
+# Функция для создания графика действий вратаря
+def create_goalkeeper_actions_chart(team_stats, team, color, height=400):
+    """
+    Создает график действий вратаря.
+    """
+    gk_actions = team_stats[team].get('gk_actions', {})
+    
+    if not gk_actions:
+        fig = go.Figure()
+        fig.update_layout(
+            title=f"Нет данных о действиях вратаря для {team}",
+            height=height
+        )
+        return fig
+    
+    # Создаем данные для графика
+    data = []
+    for action, count in gk_actions.items():
+        data.append({
+            'Действие': action,
+            'Количество': count
+        })
+    
+    # Сортируем по количеству
+    data = sorted(data, key=lambda x: x['Количество'], reverse=True)
+    
+    # Создаем DataFrame
+    df = pd.DataFrame(data)
+    
+    # Создаем график
+    fig = px.bar(
+        df,
+        y='Действие',
+        x='Количество',
+        color_discrete_sequence=[color],
+        height=height,
+        orientation='h'
+    )
+    
+    fig.update_layout(
+        title=f"Действия вратаря - {team}",
+        xaxis_title='Количество',
+        yaxis_title=None
+    )
+    
+    return fig
+
+# Функция для создания графика типов сейвов
+def create_save_types_chart(team_stats, team, color, height=400):
+    """
+    Создает диаграмму типов сейвов вратаря.
+    """
+    save_types = team_stats[team].get('save_types', {})
+    
+    if not save_types:
+        fig = go.Figure()
+        fig.update_layout(
+            title=f"Нет данных о типах сейвов для {team}",
+            height=height
+        )
+        return fig
+    
+    # Преобразуем словарь в списки для построения графика
+    labels = list(save_types.keys())
+    values = list(save_types.values())
+    
+    # Создаем круговую диаграмму
+    fig = go.Figure(data=[go.Pie(
+        labels=labels,
+        values=values,
+        hole=.3,
+        marker_colors=[color, color+'90', color+'70', color+'50', color+'30']
+    )])
+    
+    fig.update_layout(
+        title=f"Типы сейвов вратаря - {team}",
+        height=height
+    )
+    
+    return fig
+
+# Функция для создания графика результатов под давлением
+def create_pressure_results_chart(team_stats, team, color, height=500):
+    """
+    Создает график результатов действий под давлением.
+    """
+    pressure_results = team_stats[team].get('pressure_results', {})
+    
+    if not pressure_results:
+        fig = go.Figure()
+        fig.update_layout(
+            title=f"Нет данных о результатах под давлением для {team}",
+            height=height
+        )
+        return fig
+    
+    # Создаем данные для графика
+    data = []
+    for pressure, results in pressure_results.items():
+        for result, count in results.items():
+            # Преобразуем названия для отображения
+            pressure_display = 'Под давлением' if pressure == 'Yes' else 'Без давления'
+            
+            data.append({
+                'Давление': pressure_display,
+                'Результат': result,
+                'Количество': count
+            })
+    
+    # Создаем DataFrame
+    df = pd.DataFrame(data)
+    
+    if df.empty:
+        return go.Figure()
+    
+    # Создаем график
+    fig = px.bar(
+        df,
+        x='Давление',
+        y='Количество',
+        color='Результат',
+        barmode='stack',
+        color_discrete_sequence=px.colors.qualitative.Set1,
+        height=height
+    )
+    
+    fig.update_layout(
+        title=f"Результаты действий под давлением - {team}",
+        xaxis_title=None,
+        yaxis_title='Количество',
+        legend_title='Результат'
+    )
+    
+    return fig
+
+# Функция для создания сетевой диаграммы пасов
+def create_pass_network_chart(team_stats, team, color, height=600, min_passes=2, batched=True):
+    """
+    Создает график сети пасов между игроками одной команды. Игроки расположены
+    в своих средних позициях на поле (X1/Y1), размер узла - PageRank игрока.
+    
+    Args:
+        batched: Пакетная отрисовка - связи группируются по толщине линии в несколько
+            трасс с разрывами (NaN), все игроки выводятся одной трассой маркеров.
+            При False каждая связь и каждый игрок рисуются отдельной трассой.
+    """
+    if not team_stats[team].get('pass_combinations', {}):
+        fig = go.Figure()
+        fig.update_layout(
+            title=f"Нет данных о комбинациях пасов для {team}",
+            height=height
+        )
+        return fig
+    
+    # Разреженная сеть пасов, отфильтрованная по минимальному количеству пасов
+    network = PassNetwork.from_team_stats(team_stats[team], min_passes)
+    edges = network.edges()
+    
+    if not edges:
+        fig = go.Figure()
+        fig.update_layout(
+            title=f"Недостаточно данных для сети пасов команды {team}",
+            height=height
+        )
+        return fig
+    
+    all_players = network.players
+    metrics = network.metrics()
+    
+    # Позиции игроков - средние координаты; игроки без координат размещаются по кругу в центре поля
+    player_positions = {}
+    unplaced = metrics[metrics['x'].isna() | metrics['y'].isna()].index
+    for i, player_id in enumerate(unplaced):
+        angle = 2 * math.pi * i / len(unplaced)
+        metrics.loc[player_id, ['x', 'y']] = (50 + 30 * math.cos(angle), 50 + 30 * math.sin(angle))
+    for player, x, y in zip(all_players, metrics['x'], metrics['y']):
+        player_positions[player] = (x, y)
+    
+    # Размер узла растет с PageRank (при равном PageRank у всех игроков - 18)
+    player_sizes = dict(zip(all_players, 10 + metrics['pagerank'] * len(all_players) * 8))
+    player_details = {
+        row.player: (f"{row.passes_out} отдано, {row.passes_in} получено, партнеров: {row.degree}<br>"
+                     f"PageRank: {row.pagerank:.3f}, посредничество: {row.betweenness:.3f}")
+        for row in metrics.itertuples()
+    }
+    
+    # Создаем граф на схеме поля
+    fig = go.Figure()
+    fig.add_shape(type="rect", x0=0, y0=0, x1=100, y1=100, line=dict(color="white"), fillcolor="rgba(0,100,0,0.3)", layer="below")
+    fig.add_shape(type="line", x0=50, y0=0, x1=50, y1=100, line=dict(color="white"), layer="below")
+    fig.add_shape(type="rect", x0=0, y0=30, x1=16, y1=70, line=dict(color="white"), layer="below")
+    fig.add_shape(type="rect", x0=84, y0=30, x1=100, y1=70, line=dict(color="white"), layer="below")
+    
+    if batched:
+        _add_batched_pass_network_traces(fig, edges, all_players, player_positions, player_sizes, player_details, color)
+    else:
+        _add_pass_network_traces(fig, edges, all_players, player_positions, player_sizes, player_details, color)
+    
+    # Настраиваем макет
+    fig.update_layout(
+        title=f"Сеть пасов команды {team}",
+        height=height,
+        showlegend=False,
+        xaxis=dict(showgrid=False, zeroline=False, range=[0, 100], showticklabels=False),
+        yaxis=dict(showgrid=False, zeroline=False, range=[0, 100], showticklabels=False, scaleanchor="x", scaleratio=1),
+        plot_bgcolor="rgba(0,0,0,0)"
+    )
+    
+    return fig
+
+# Подписи столбцов таблицы центральности игроков
+PASS_NETWORK_COLUMN_NAMES = {
+    'player': 'Игрок',
+    'x': 'Средний X',
+    'y': 'Средний Y',
+    'passes_out': 'Отдано пасов',
+    'passes_in': 'Получено пасов',
+    'degree': 'Партнеров',
+    'pagerank': 'PageRank',
+    'betweenness': 'Посредничество',
+}
+
+# Количество групп толщины линий в пакетной сети пасов
+PASS_NETWORK_WIDTH_BUCKETS = 4
+
+# Отрисовка сети пасов отдельными трассами для каждой связи и игрока
+def _add_pass_network_traces(fig, edges, all_players, player_positions, player_sizes, player_details, color):
+    """
+    Добавляет в фигуру по одной трассе на каждую связь и каждого игрока.
+    """
+    # Добавляем связи (пасы)
+    for player1, player2, count in edges:
+        start_pos = player_positions[player1]
+        end_pos = player_positions[player2]
+        
+        # Ширина линии пропорциональна количеству пасов
+        width = min(10, 1 + count / 2)
+        
+        fig.add_trace(go.Scatter(
+            x=[start_pos[0], end_pos[0]],
+            y=[start_pos[1], end_pos[1]],
+            mode='lines',
+            line=dict(
+                width=width,
+                color=color
+            ),
+            opacity=0.7,
+            showlegend=False,
+            hoverinfo='text',
+            text=f"{player1} → {player2}: {count} пасов"
+        ))
+    
+    # Добавляем узлы (игроков)
+    for player in all_players:
+        pos = player_positions[player]
+        
+        fig.add_trace(go.Scatter(
+            x=[pos[0]],
+            y=[pos[1]],
+            mode='markers+text',
+            marker=dict(
+                size=player_sizes[player],
+                color=color,
+                line=dict(width=2, color='white')
+            ),
+            text=player,
+            textposition="top center",
+            hoverinfo='text',
+            hovertext=f"{player}<br>{player_details[player]}",
+            showlegend=False
+        ))
+
+# Пакетная отрисовка сети пасов: несколько трасс связей и одна трасса игроков
+def _add_batched_pass_network_traces(fig, edges, all_players, player_positions, player_sizes, player_details, color):
+    """
+    Добавляет в фигуру по одной трассе на группу толщины связей и одну трассу игроков.
+    Подсказки при наведении совпадают с обычным режимом.
+    """
+    # Ширина линии пропорциональна количеству пасов (как в обычном режиме),
+    # затем связи раскладываются по небольшому числу групп толщины
+    widths = np.array([min(10, 1 + count / 2) for _, _, count in edges])
+    bounds = np.linspace(widths.min(), widths.max(), PASS_NETWORK_WIDTH_BUCKETS + 1)
+    buckets = np.clip(np.searchsorted(bounds, widths, side='right') - 1, 0, PASS_NETWORK_WIDTH_BUCKETS - 1)
+    
+    for bucket in np.unique(buckets):
+        bucket_edges = [edge for edge, edge_bucket in zip(edges, buckets) if edge_bucket == bucket]
+        
+        # Каждая связь - два конца и разрыв (None), подсказка на обоих концах связи
+        xs, ys, texts = [], [], []
+        for player1, player2, count in bucket_edges:
+            start_pos = player_positions[player1]
+            end_pos = player_positions[player2]
+            text = f"{player1} → {player2}: {count} пасов"
+            xs.extend([start_pos[0], end_pos[0], None])
+            ys.extend([start_pos[1], end_pos[1], None])
+            texts.extend([text, text, None])
+        
+        fig.add_trace(go.Scatter(
+            x=xs,
+            y=ys,
+            mode='lines',
+            line=dict(
+                width=float(widths[buckets == bucket].mean()),
+                color=color
+            ),
+            opacity=0.7,
+            showlegend=False,
+            hoverinfo='text',
+            text=texts,
+            connectgaps=False
+        ))
+    
+    # Все игроки одной трассой маркеров
+    fig.add_trace(go.Scatter(
+        x=[player_positions[player][0] for player in all_players],
+        y=[player_positions[player][1] for player in all_players],
+        mode='markers+text',
+        marker=dict(
+            size=[player_sizes[player] for player in all_players],
+            color=color,
+            line=dict(width=2, color='white')
+        ),
+        text=all_players,
+        textposition="top center",
+        hoverinfo='text',
+        hovertext=[f"{player}<br>{player_details[player]}" for player in all_players],
+        showlegend=False
+    ))
+
+# Функция для создания графика игроков по использованию разных ног
+def create_player_foot_usage_chart(team_stats, team, color, height=500, top_n=10):
+    """
+    Создает график распределения использования ног разными игроками.
+    """
+    player_foot_usage = team_stats[team].get('player_foot_usage', {})
+    
+    if not player_foot_usage:
+        fig = go.Figure()
+        fig.update_layout(
+            title=f"Нет данных об использовании ног игроками команды {team}",
+            height=height
+        )
+        return fig
+    
+    # Создаем данные для графика
+    data = []
+    for player, foot_data in player_foot_usage.items():
+        total_actions = sum(foot_data.values())
+        if total_actions < 3:  # Пропускаем игроков с малым количеством действий
+            continue
+            
+        # Рассчитываем соотношение правой/левой ноги
+        right_pct = foot_data.get('Right', 0) / total_actions * 100 if total_actions > 0 else 0
+        left_pct = foot_data.get('Left', 0) / total_actions * 100 if total_actions > 0 else 0
+        
+        # Вычисляем "двуногость" - насколько игрок одинаково пользуется обеими ногами
+        if right_pct > 0 and left_pct > 0:
+            two_footedness = min(right_pct, left_pct) / max(right_pct, left_pct) * 100
+        else:
+            two_footedness = 0
+        
+        data.append({
+            'Игрок': player,
+            'Всего действий': total_actions,
+            'Правая (%)': right_pct,
+            'Левая (%)': left_pct,
+            'Двуногость (%)': two_footedness
+        })
+    
+    # Сортируем по общему количеству действий и берем топ N
+    data = sorted(data, key=lambda x: x['Всего действий'], reverse=True)[:top_n]
+    
+    if not data:
+        fig = go.Figure()
+        fig.update_layout(
+            title=f"Недостаточно данных об использовании ног игроками команды {team}",
+            height=height
+        )
+        return fig
+    
+    # Создаем DataFrame
+    df = pd.DataFrame(data)
+    
+    # Создаем график
+    fig = go.Figure()
+    
+    # Добавляем столбцы для правой ноги
+    fig.add_trace(go.Bar(
+        y=df['Игрок'],
+        x=df['Правая (%)'],
+        name='Правая нога (%)',
+        orientation='h',
+        marker=dict(color='rgba(58, 71, 80, 0.6)')
+    ))
+    
+    # Добавляем столбцы для левой ноги
+    fig.add_trace(go.Bar(
+        y=df['Игрок'],
+        x=df['Левая (%)'],
+        name='Левая нога (%)',
+        orientation='h',
+        marker=dict(color='rgba(246, 78, 139, 0.6)')
+    ))
+    
+    # Добавляем метки с процентом "двуногости"
+    for i, row in df.iterrows():
+        fig.add_annotation(
+            x=row['Правая (%)'] + row['Левая (%)'] + 5,
+            y=row['Игрок'],
+            text=f"Двуногость: {row['Двуногость (%)']:.1f}%",
+            showarrow=False,
+            font=dict(color="black", size=10),
+            align="left"
+        )
+    
+    # Настраиваем макет
+    fig.update_layout(
+        title=f"Использование правой и левой ноги игроками - {team}",
+        barmode='stack',
+        height=height,
+        xaxis=dict(title='Процент использования (%)'),
+        yaxis=dict(title=None)
+    )
+    
+    return fig
+
+# Цвета результатов ударов на карте ударов
+SHOT_RESULT_COLORS = {
+    'Goal': '#2ecc71',
+    'On Target': '#3498db',
+    'Off Target': '#e74c3c',
+    'Blocked': '#95a5a6'
+}
+
+# Названия результатов ударов для отображения
+SHOT_RESULT_NAMES = {
+    'Goal': 'Голы',
+    'On Target': 'В створ',
+    'Off Target': 'Мимо',
+    'Blocked': 'Заблокированы',
+    '': 'Без результата'
+}
+
+# Функция для отображения карты ударов
+def create_shot_heatmap(team_stats, team, color, height=500):
+    """
+    Создает карту ударов на футбольном поле по координатам каждого удара (X1, Y1).
+    Удары выводятся WebGL-трассами (по одной на результат удара): фильтрация
+    по результату кликом в легенде выполняется в браузере без перестроения графика.
+    """
+    shot_points = team_stats[team].get('shot_points', {})
+    total_shots = len(shot_points.get('x', []))
+    
+    if total_shots == 0:
+        # Если нет данных, создаем пустую фигуру
+        fig = go.Figure()
+        fig.update_layout(
+            title=f"Нет данных о координатах ударов для {team}",
+            height=height
+        )
+        return fig
+    
+    # Создаем фигуру с футбольным полем
+    fig = go.Figure()
+    
+    # Добавляем поле
+    # Внешние границы
+    fig.add_shape(type="rect", x0=0, y0=0, x1=100, y1=100, line=dict(color="white"), fillcolor="rgba(0,100,0,0.3)", layer="below")
+    
+    # Штрафные площади
+    fig.add_shape(type="rect", x0=0, y0=30, x1=16, y1=70, line=dict(color="white"), layer="below")
+    fig.add_shape(type="rect", x0=84, y0=30, x1=100, y1=70, line=dict(color="white"), layer="below")
+    
+    # Ворота
+    fig.add_shape(type="rect", x0=0, y0=45, x1=1, y1=55, line=dict(color="white"), layer="below")
+    fig.add_shape(type="rect", x0=99, y0=45, x1=100, y1=55, line=dict(color="white"), layer="below")
+    
+    # Группируем удары по результату одним векторным проходом
+    shots = pd.DataFrame(shot_points)
+    for result, group in shots.groupby('result', sort=False):
+        fig.add_trace(go.Scattergl(
+            x=group['x'].to_numpy(),
+            y=group['y'].to_numpy(),
+            mode="markers",
+            name=f"{SHOT_RESULT_NAMES.get(result, result)} ({len(group)})",
+            marker=dict(
+                size=10 if result == 'Goal' else 8,
+                color=SHOT_RESULT_COLORS.get(result, color),
+                opacity=0.8,
+                line=dict(width=1, color="white")
+            ),
+            customdata=group[['player', 'result']].to_numpy(),
+            hovertemplate="%{customdata[0]}<br>%{customdata[1]}<br>X: %{x:.1f}, Y: %{y:.1f}<extra></extra>"
+        ))
+    
+    # Настраиваем макет
+    fig.update_layout(
+        title=f"Карта ударов - {team} ({total_shots})",
+        height=height,
+        xaxis=dict(showgrid=False, zeroline=False, range=[0, 100], showticklabels=False),
+        yaxis=dict(showgrid=False, zeroline=False, range=[0, 100], showticklabels=False, scaleanchor="x", scaleratio=1),
+        plot_bgcolor="rgba(0,0,0,0)",
+        margin=dict(l=0, r=0, t=40, b=0),
+        legend=dict(title="Результат", orientation="h", y=-0.05)
+    )
+    
+    return fig
+
+# Функция для создания графика событий, отобранных фильтром
+def create_filtered_events_chart(counts, color, height=400, top_n=15):
+    """
+    Создает график количества отобранных событий по игрокам.
+    
+    Args:
+        counts: Series игрок -> количество событий (результат EventIndex.counts_by)
+    """
+    counts = counts.head(top_n)
+    
+    if counts.empty:
+        fig = go.Figure()
+        fig.update_layout(
+            title="Нет событий, подходящих под фильтры",
+            height=height
+        )
+        return fig
+    
+    # Создаем график
+    fig = px.bar(
+        x=counts.to_numpy(),
+        y=counts.index.astype(str),
+        orientation='h',
+        color_discrete_sequence=[color],
+        height=height
+    )
+    
+    fig.update_layout(
+        title='Отобранные события по игрокам',
+        xaxis_title='Количество событий',
+        yaxis_title=None,
+        yaxis={'categoryorder': 'total ascending'}
+    )
+    
+    return fig
+
+# Функция для создания графика разбивки событий по оси куба
+def create_event_breakdown_chart(counts, teams, colors, axis_title, height=400, top_n=20):
+    """
+    Создает график количества событий команд по значениям одной оси куба событий.
+    
+    Args:
+        counts: Series (команда, значение оси) -> количество (результат EventCube.sum)
+        teams: Команды матча (порядок определяет цвета)
+        axis_title: Название оси разбивки
+    """
+    if counts.empty:
+        fig = go.Figure()
+        fig.update_layout(
+            title="Нет событий для разбивки",
+            height=height
+        )
+        return fig
+    
+    # Пустые значения показываем отдельной категорией, оставляем top_n самых частых
+    df = counts.reset_index()
+    df.columns = ['Команда', 'Значение', 'Количество']
+    df['Значение'] = df['Значение'].map(lambda value: 'Не указано' if pd.isna(value) or value == '' else str(value))
+    top_values = df.groupby('Значение')['Количество'].sum().nlargest(top_n).index
+    df = df[df['Значение'].isin(top_values)]
+    
+    # Создаем график
+    fig = px.bar(
+        df,
+        x='Значение',
+        y='Количество',
+        color='Команда',
+        barmode='group',
+        color_discrete_map={teams[0]: colors['team1'], teams[1]: colors['team2']} if len(teams) > 1 else None,
+        height=height
+    )
+    
+    fig.update_layout(
+        title=f'Разбивка событий: {axis_title}',
+        xaxis_title=None,
+        yaxis_title='Количество',
+        legend_title='Команда',
+        xaxis={'categoryorder': 'total descending'}
+    )
+    
+    return fig
+
+# Графики отчета по обеим командам: функции вида f(team_stats, colors, height)
+REPORT_MATCH_CHARTS = [
+    create_team_stats_chart,
+    create_pass_stats_chart,
+    create_half_comparison_chart,
+    create_possession_chains_chart,
+    create_events_category_chart,
+    create_foot_usage_chart,
+]
+
+# Графики отчета по одной команде: функции вида f(team_stats, team, color, height)
+REPORT_TEAM_CHARTS = [
+    create_pass_heatmap,
+    create_pass_zones_chart,
+    create_pass_network_chart,
+    create_shot_heatmap,
+    create_shot_types_chart,
+    create_shot_outcomes_chart,
+    create_pressure_results_chart,
+    create_goalkeeper_actions_chart,
+]
@@ -0,0 +1,242 @@
+"""
+Пакетный режим без интерфейса: построение отчетов по файлам матчей и загрузка
+матчей в базу SQLite.
+
+Запуск: python football_cli.py report|ingest ...
+
+Модуль не импортирует streamlit; plotly загружается только процессами,
+которые строят графики отчета.
+"""
+import io
+import re
+import os
+import sys
+import json
+import glob
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+from football_analysis import (
+    BINARY_TABLE_EXTENSIONS, REQUIRED_COLUMNS, compute_content_hash, read_match_csv,
+    read_match_table, analyze_match_file, generate_match_insights, pass_network_table,
+    EventStore, to_json_stats,
+)
+
+# Имя файла манифеста пакетных отчетов (хэши обработанных файлов)
+REPORT_MANIFEST = "manifest.json"
+
+# Функция для поиска файлов матчей по каталогам и шаблонам
+def collect_match_files(inputs):
+    """
+    Возвращает отсортированный список файлов матчей. Каталоги просматриваются
+    без вложенных папок, остальные аргументы считаются путями или шаблонами glob.
+    """
+    extensions = ('.csv',) + BINARY_TABLE_EXTENSIONS
+    paths = set()
+    for pattern in inputs:
+        if os.path.isdir(pattern):
+            candidates = [os.path.join(pattern, name) for name in os.listdir(pattern)]
+        else:
+            candidates = glob.glob(pattern)
+        paths.update(
+            os.path.abspath(path) for path in candidates
+            if os.path.isfile(path) and path.lower().endswith(extensions)
+        )
+    return sorted(paths)
+
+# Функция для записи отчета по одному матчу (выполняется в отдельном процессе)
+def write_match_report(path, report_dir, detail_level="Средняя", height=500):
+    """
+    Анализирует файл матча и записывает в report_dir:
+    team_stats.json, insights.json, метрики сетей пасов pass_network.csv
+    и графики в charts/*.html.
+    Возвращает список команд матча.
+    """
+    # Графики нужны только этому процессу пула, поэтому plotly загружается здесь
+    from football_charts import REPORT_MATCH_CHARTS, REPORT_TEAM_CHARTS, get_color_scheme
+    
+    with open(path, "rb") as match_file:
+        team_stats = analyze_match_file(os.path.basename(path), match_file.read()).finalize()
+    teams = list(team_stats.keys())
+    colors = get_color_scheme({"color_scheme": "Стандартная"}, teams)
+    
+    charts_dir = os.path.join(report_dir, "charts")
+    os.makedirs(charts_dir, exist_ok=True)
+    
+    # Статистика и выводы по каждой команде
+    insights = generate_match_insights(team_stats, detail_level)
+    with open(os.path.join(report_dir, "team_stats.json"), "w", encoding="utf-8") as stats_file:
+        json.dump(to_json_stats(team_stats), stats_file, ensure_ascii=False, indent=2)
+    with open(os.path.join(report_dir, "insights.json"), "w", encoding="utf-8") as insights_file:
+        json.dump(to_json_stats(insights), insights_file, ensure_ascii=False, indent=2)
+    pass_network_table(team_stats, min_passes=2).to_csv(os.path.join(report_dir, "pass_network.csv"), index=False)
+    
+    # Графики (библиотека plotly.js подключается из CDN, чтобы файлы оставались небольшими)
+    for create_chart in REPORT_MATCH_CHARTS:
+        fig = create_chart(team_stats, colors, height)
+        fig.write_html(os.path.join(charts_dir, f"{create_chart.__name__}.html"), include_plotlyjs="cdn")
+    for i, team in enumerate(teams):
+        color = colors["team1"] if i == 0 else colors["team2"]
+        team_name = re.sub(r"[^\w\-]+", "_", str(team))
+        for create_chart in REPORT_TEAM_CHARTS:
+            fig = create_chart(team_stats, team, color, height)
+            fig.write_html(
+                os.path.join(charts_dir, f"{create_chart.__name__}_{team_name}.html"),
+                include_plotlyjs="cdn"
+            )
+    
+    return teams
+
+# Функция пакетного построения отчетов из командной строки
+def run_report_cli(argv=None):
+    """
+    Строит отчеты по всем матчам из указанных каталогов или шаблонов в пуле процессов.
+    Файлы, содержимое которых не изменилось с прошлого запуска, пропускаются.
+    Возвращает код завершения (1, если хотя бы один файл не удалось обработать).
+    
+    Пример: python football_cli.py report data/matches "archive/*.csv" --output reports
+    """
+    parser = argparse.ArgumentParser(
+        prog="football_cli.py report",
+        description="Пакетное построение отчетов по файлам матчей"
+    )
+    parser.add_argument("inputs", nargs="+", help="Каталоги, файлы или шаблоны glob с матчами")
+    parser.add_argument("--output", "-o", default="reports", help="Каталог для отчетов")
+    parser.add_argument("--workers", "-j", type=int, default=None, help="Количество процессов (по умолчанию - число ядер)")
+    parser.add_argument("--detail", default="Средняя", choices=["Минимальная", "Средняя", "Подробная"],
+                        help="Уровень детализации выводов")
+    parser.add_argument("--force", action="store_true", help="Перестроить отчеты для неизмененных файлов")
+    args = parser.parse_args(argv)
+    
+    paths = collect_match_files(args.inputs)
+    if not paths:
+        print("Файлы матчей не найдены", file=sys.stderr)
+        return 1
+    os.makedirs(args.output, exist_ok=True)
+    
+    # Манифест: имя отчета -> исходный файл и хэш содержимого
+    manifest_path = os.path.join(args.output, REPORT_MANIFEST)
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding="utf-8") as manifest_file:
+            manifest = json.load(manifest_file)
+    
+    # Имена отчетов по именам файлов; совпадающие имена получают числовой суффикс
+    pending = {}
+    names = set()
+    skipped = 0
+    for path in paths:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        name = stem
+        suffix = 2
+        while name in names:
+            name = f"{stem}-{suffix}"
+            suffix += 1
+        names.add(name)
+        
+        with open(path, "rb") as match_file:
+            content_hash = compute_content_hash(match_file.read())
+        entry = manifest.get(name, {})
+        report_dir = os.path.join(args.output, name)
+        if (not args.force and entry.get("hash") == content_hash
+                and entry.get("source") == path and os.path.isdir(report_dir)):
+            skipped += 1
+            continue
+        pending[name] = (path, content_hash, report_dir)
+    
+    failed = 0
+    workers = min(args.workers or os.cpu_count() or 1, max(len(pending), 1))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            name: executor.submit(write_match_report, path, report_dir, args.detail)
+            for name, (path, content_hash, report_dir) in pending.items()
+        }
+        for name, future in futures.items():
+            path, content_hash, report_dir = pending[name]
+            try:
+                teams = future.result()
+            except Exception as e:
+                failed += 1
+                manifest.pop(name, None)
+                print(f"{path}: ошибка - {e}", file=sys.stderr)
+                continue
+            manifest[name] = {"source": path, "hash": content_hash, "teams": [str(team) for team in teams]}
+            print(f"{path} -> {report_dir}")
+    
+    # Манифест записывается через временный файл, чтобы прерванный запуск не повредил его
+    temporary_path = manifest_path + ".tmp"
+    with open(temporary_path, "w", encoding="utf-8") as manifest_file:
+        json.dump(manifest, manifest_file, ensure_ascii=False, indent=2)
+    os.replace(temporary_path, manifest_path)
+    
+    print(f"Обработано: {len(pending) - failed}, пропущено без изменений: {skipped}, ошибок: {failed}")
+    return 1 if failed else 0
+
+# Функция загрузки матчей в базу SQLite из командной строки
+def run_ingest_cli(argv=None):
+    """
+    Сохраняет файлы матчей в базу событий; уже загруженные файлы (по хэшу
+    содержимого) пропускаются. Возвращает код завершения (1 при ошибках).
+    
+    Пример: python football_cli.py ingest data/matches "archive/*.csv" --db events.sqlite
+    """
+    parser = argparse.ArgumentParser(
+        prog="football_cli.py ingest",
+        description="Загрузка файлов матчей в базу SQLite"
+    )
+    parser.add_argument("inputs", nargs="+", help="Каталоги, файлы или шаблоны glob с матчами")
+    parser.add_argument("--db", default=None, help="Файл базы (по умолчанию FOOTBALL_EVENT_DB или кэш матчей)")
+    args = parser.parse_args(argv)
+    
+    paths = collect_match_files(args.inputs)
+    if not paths:
+        print("Файлы матчей не найдены", file=sys.stderr)
+        return 1
+    store = EventStore(args.db) if args.db else EventStore()
+    
+    added = skipped = failed = 0
+    for path in paths:
+        try:
+            with open(path, "rb") as match_file:
+                file_bytes = match_file.read()
+            match_key = compute_content_hash(file_bytes)
+            if store.has_match(match_key):
+                skipped += 1
+                continue
+            name = os.path.basename(path)
+            if name.lower().endswith(BINARY_TABLE_EXTENSIONS):
+                df = read_match_table(io.BytesIO(file_bytes), name)
+            else:
+                df = read_match_csv(io.BytesIO(file_bytes))
+            if not all(column in df.columns for column in REQUIRED_COLUMNS):
+                raise ValueError("нет обязательных столбцов " + ", ".join(REQUIRED_COLUMNS))
+            store.ingest(df, match_key, name)
+        except Exception as e:
+            failed += 1
+            print(f"{path}: ошибка - {e}", file=sys.stderr)
+            continue
+        added += 1
+        print(f"{path} -> {match_key[:12]}")
+    
+    print(f"Загружено: {added}, уже в базе: {skipped}, ошибок: {failed}")
+    return 1 if failed else 0
+
+# Команды пакетного режима
+CLI_COMMANDS = {
+    "report": run_report_cli,
+    "ingest": run_ingest_cli,
+}
+
+# Функция запуска команды пакетного режима по аргументам командной строки
+def run_cli(argv):
+    """
+    Выполняет команду argv[0] (report или ingest) с остальными аргументами.
+    Возвращает код завершения.
+    """
+    if not argv or argv[0] not in CLI_COMMANDS:
+        print(f"Использование: python football_cli.py {{{'|'.join(CLI_COMMANDS)}}} ...", file=sys.stderr)
+        return 2
+    return CLI_COMMANDS[argv[0]](argv[1:])
+
+if __name__ == "__main__":
+    sys.exit(run_cli(sys.argv[1:]))